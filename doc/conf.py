@@ -325,7 +325,7 @@ graphviz_output_format = 'svg'
 
 # Example configuration for intersphinx: refer to the Python standard library.
 intersphinx_mapping = {
-    'python': ('https://docs.python.org/3.4', None)
+    'python': ('https://docs.python.org/3.5', None)
 }
 
 # Setup theme if not building in readthedocs.org
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Host wide admission of OpenSwitch boots.
+
+Booting a switch is CPU and memory hungry, when many processes (like the
+workers of ``pytest-xdist``) boot switches at the same time the host thrashes
+and the boots time out. The boots are admitted through a number of slots that
+are shared by all the processes of the host: every slot is a lock file and a
+boot holds one of them until it finishes. The processes that wait queue on
+another lock file, so only the first one in the queue looks for a free slot
+and the rest are admitted in turn.
+
+The locks are ``flock`` locks, the kernel releases them if a process dies.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from time import sleep
+from fcntl import flock, LOCK_EX, LOCK_NB, LOCK_UN
+from os import makedirs, getuid, getloadavg
+from os.path import join, exists
+from tempfile import gettempdir
+from threading import Lock
+
+from topology_docker_openswitch.cgroup import host_memory
+from topology_docker_openswitch.placement import host_cpus
+
+
+ADMISSION_DIR = join(gettempdir(), 'ops-boot-{}'.format(getuid()))
+
+# Resources a booting switch needs, used to compute the number of slots of the
+# host and to tell if there is headroom for another boot.
+BOOT_CPUS = 1.0
+BOOT_MEMORY = 512 * 1024 * 1024
+
+
+def boot_slots():
+    """
+    Compute the number of boots the host can run at the same time, from its
+    CPUs and available memory.
+
+    :rtype: int
+    """
+    slots = int(len(host_cpus()) // BOOT_CPUS)
+
+    memory = host_memory(available=True)
+    if memory is not None:
+        slots = min(slots, memory // BOOT_MEMORY)
+
+    return max(1, int(slots))
+
+
+def has_headroom():
+    """
+    Tell if the host has the CPU and memory another boot needs right now.
+
+    :rtype: bool
+    """
+    if getloadavg()[0] + BOOT_CPUS > len(host_cpus()):
+        return False
+
+    memory = host_memory(available=True)
+    return memory is None or memory >= BOOT_MEMORY
+
+
+class BootAdmission(object):
+    """
+    Admission of the boots of a process, see the module documentation.
+
+    Call :meth:`acquire` before a boot and :meth:`release` with the slot it
+    returned after it. The slots are shared with the other processes that use
+    the same directory, and with the other threads of the process.
+
+    :param int slots: Number of boots that run at the same time, computed
+     from the host resources by default.
+    :param str directory: Directory of the lock files.
+    :param float poll_interval: Seconds between checks for a free slot.
+    :param bool check_headroom: Do not start a boot while the host is short
+     of CPU or memory, unless no other boot is running.
+    """
+
+    def __init__(self, slots=None, directory=ADMISSION_DIR, poll_interval=0.5,
+                 check_headroom=True):
+        self.slots = slots or boot_slots()
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.check_headroom = check_headroom
+
+        self._queue = Lock()
+
+    def _open(self, name):
+        if not exists(self.directory):
+            try:
+                makedirs(self.directory)
+            except OSError:
+                # Created by another process at the same time.
+                pass
+        return open(join(self.directory, name), 'a')
+
+    def _try_slots(self):
+        """
+        Take the first free slot.
+
+        :return: The open slot file, or None if all the slots are taken.
+        """
+        taken = 0
+        free = None
+
+        for index in range(self.slots):
+            slot = self._open('slot-{}.lock'.format(index))
+            try:
+                flock(slot, LOCK_EX | LOCK_NB)
+            except (IOError, OSError):
+                slot.close()
+                taken += 1
+                continue
+
+            if free is None:
+                free = slot
+            else:
+                flock(slot, LOCK_UN)
+                slot.close()
+
+        if free is not None and taken and self.check_headroom and \
+                not has_headroom():
+            flock(free, LOCK_UN)
+            free.close()
+            return None
+
+        return free
+
+    def acquire(self):
+        """
+        Wait for a slot.
+
+        :return: The slot, to be released with :meth:`release`.
+        """
+        with self._queue:
+            queue = self._open('queue.lock')
+            try:
+                flock(queue, LOCK_EX)
+
+                slot = self._try_slots()
+                while slot is None:
+                    sleep(self.poll_interval)
+                    slot = self._try_slots()
+            finally:
+                flock(queue, LOCK_UN)
+                queue.close()
+
+        return slot
+
+    def release(self, slot):
+        """
+        Release a slot.
+
+        :param slot: The slot returned by :meth:`acquire`.
+        """
+        flock(slot, LOCK_UN)
+        slot.close()
+
+
+_ADMISSION = {'admission': None}
+
+
+def enable_boot_admission(slots=None, **kwargs):
+    """
+    Admit the boots of this process through a :class:`BootAdmission`.
+
+    :param int slots: Number of slots, computed from the host resources by
+     default.
+    :param kwargs: Other arguments of :class:`BootAdmission`.
+    :rtype: :class:`BootAdmission`
+    """
+    _ADMISSION['admission'] = BootAdmission(slots=slots, **kwargs)
+    return _ADMISSION['admission']
+
+
+def disable_boot_admission():
+    """
+    Stop admitting the boots of this process.
+    """
+    _ADMISSION['admission'] = None
+
+
+def get_boot_admission():
+    """
+    Get the boot admission of this process.
+
+    :rtype: :class:`BootAdmission`
+    :return: The admission, or None if it is not enabled.
+    """
+    return _ADMISSION['admission']
+
+
+__all__ = [
+    'BootAdmission', 'boot_slots', 'has_headroom', 'enable_boot_admission',
+    'disable_boot_admission', 'get_boot_admission'
+]
@@ -0,0 +1,521 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+asyncio based OpenSwitch connections and shells.
+
+The connections and shells of this module follow the same login and prompt
+handling steps as the pexpect based ones, but they read their terminals
+without blocking, so one event loop can drive many switches at the same
+time without a thread per session.
+
+This module requires Python 3.5 or newer.
+"""
+
+import re
+import asyncio
+from abc import ABCMeta, abstractmethod
+from os import read, write, close as close_fd
+from pty import openpty
+from fcntl import fcntl, F_GETFL, F_SETFL
+from os import O_NONBLOCK
+from codecs import getincrementaldecoder
+from shlex import split as shsplit
+
+from six import add_metaclass
+
+from topology_docker_openswitch.shell import (
+    BASH_FORCED_PROMPT, BASH_START_SHELL_PROMPT,
+    VTYSH_FORCED_PROMPT, VTYSH_STANDARD_PROMPT, _VTYSH_FORCED
+)
+
+
+DEFAULT_TIMEOUT = 30
+
+
+class AsyncSpawn(object):
+    """
+    Non-blocking process attached to a pseudo terminal.
+
+    This is a minimal asyncio counterpart of :class:`pexpect.spawn`. The
+    ``before``, ``after`` and ``match`` attributes have the same meaning.
+
+    :param str command: Command to execute.
+    :param float timeout: Default timeout of :meth:`expect`.
+    """
+
+    def __init__(self, command, timeout=DEFAULT_TIMEOUT):
+        self.command = command
+        self.timeout = timeout
+        self.before = ''
+        self.after = ''
+        self.match = None
+
+        self._process = None
+        self._fd = None
+        self._buffer = ''
+        self._eof = False
+        self._data = None
+        self._decoder = getincrementaldecoder('utf-8')(errors='ignore')
+
+    async def start(self):
+        master, slave = openpty()
+
+        try:
+            self._process = await asyncio.create_subprocess_exec(
+                *shsplit(self.command),
+                stdin=slave, stdout=slave, stderr=slave,
+                start_new_session=True
+            )
+        finally:
+            close_fd(slave)
+
+        fcntl(master, F_SETFL, fcntl(master, F_GETFL) | O_NONBLOCK)
+
+        self._fd = master
+        self._data = asyncio.Event()
+        asyncio.get_event_loop().add_reader(master, self._read)
+
+    def _read(self):
+        try:
+            data = read(self._fd, 65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            # The slave side of the terminal was closed.
+            data = b''
+
+        if not data:
+            self._eof = True
+            asyncio.get_event_loop().remove_reader(self._fd)
+        else:
+            self._buffer += self._decoder.decode(data)
+
+        self._data.set()
+
+    def send(self, data):
+        write(self._fd, data.encode('utf-8'))
+
+    def sendline(self, line=''):
+        self.send('{}\n'.format(line))
+
+    async def expect(self, patterns, timeout=None):
+        """
+        Wait until one of the patterns matches the output of the process.
+
+        :param patterns: A regular expression or a list of them.
+        :param float timeout: Seconds to wait, defaults to the spawn timeout.
+        :rtype: int
+        :return: The index of the pattern that matched. If several patterns
+         match, the one that matches first in the output is chosen.
+        """
+        if not isinstance(patterns, (list, tuple)):
+            patterns = [patterns]
+
+        compiled = [re.compile(pattern) for pattern in patterns]
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + timeout
+
+        while True:
+            best = None
+
+            for index, regex in enumerate(compiled):
+                match = regex.search(self._buffer)
+                if match is not None and (
+                    best is None or match.start() < best[1].start()
+                ):
+                    best = (index, match)
+
+            if best is not None:
+                index, match = best
+                self.before = self._buffer[:match.start()]
+                self.after = match.group(0)
+                self.match = match
+                self._buffer = self._buffer[match.end():]
+                return index
+
+            if self._eof:
+                raise EOFError(
+                    'End of output of {} while waiting for {}.'.format(
+                        self.command, patterns
+                    )
+                )
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(
+                    'Timeout waiting for {} in the output of {}.'.format(
+                        patterns, self.command
+                    )
+                )
+
+            self._data.clear()
+            try:
+                await asyncio.wait_for(self._data.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def isalive(self):
+        return self._process is not None and \
+            self._process.returncode is None and not self._eof
+
+    async def close(self):
+        if self._fd is None:
+            return
+
+        asyncio.get_event_loop().remove_reader(self._fd)
+        close_fd(self._fd)
+        self._fd = None
+
+        if self._process.returncode is None:
+            self._process.terminate()
+            await self._process.wait()
+
+
+@add_metaclass(ABCMeta)
+class AsyncOpenswitchConnection(object):
+    """
+    Base class of the asyncio OpenSwitch connections.
+
+    :param str user: User to log in with.
+    :param str password: Password of the user.
+    :param float timeout: Default timeout of every expect.
+    :param bool prepare_console: Disable the terminal echo from a bash shell
+     after logging in.
+    """
+
+    def __init__(self, user='admin', password='admin',
+                 timeout=DEFAULT_TIMEOUT, prepare_console=True):
+        self._user = user
+        self._password = password
+        self._timeout = timeout
+        self._prepare_console = prepare_console
+        self._initial_prompt = VTYSH_STANDARD_PROMPT
+        self._spawn = None
+        self._shells = {}
+
+    @abstractmethod
+    def _get_connect_command(self):
+        """
+        Get the command that starts the session.
+
+        :rtype: str
+        """
+
+    async def connect(self):
+        """
+        Start the connection process and log in.
+        """
+        self._spawn = AsyncSpawn(
+            self._get_connect_command(), timeout=self._timeout
+        )
+        await self._spawn.start()
+        await self.login()
+
+    @abstractmethod
+    async def login(self):
+        """
+        Log in through the started session, up to the vtysh prompt.
+        """
+
+    async def disconnect(self):
+        if self._spawn is not None:
+            await self._spawn.close()
+            self._spawn = None
+
+    def is_connected(self):
+        return self._spawn is not None and self._spawn.isalive()
+
+    async def _prepare(self):
+        """
+        See :func:`topology_docker_openswitch.connection._prepare_console`.
+        """
+        spawn = self._spawn
+
+        spawn.sendline('start-shell')
+        index = await spawn.expect(
+            [self._initial_prompt, BASH_START_SHELL_PROMPT]
+        )
+
+        if bool(index):
+            spawn.sendline('stty -echo; exit')
+            await spawn.expect(self._initial_prompt)
+
+    def get_shell(self, name):
+        """
+        Get a shell of this connection, creating it if needed.
+
+        :param str name: ``vtysh``, ``bash``, ``bash_swns`` or ``vsctl``.
+        """
+        if name not in self._shells:
+            self._shells[name] = SHELLS[name](self)
+        return self._shells[name]
+
+
+class AsyncOpenswitchDockerConnection(AsyncOpenswitchConnection):
+    """
+    asyncio variant of
+    :class:`topology_docker_openswitch.connection.OpenswitchDockerConnection`.
+
+    :param str container_id: Container unique identifier.
+    """
+
+    def __init__(self, container_id, **kwargs):
+        self._container_id = container_id
+        super(AsyncOpenswitchDockerConnection, self).__init__(**kwargs)
+
+    def _get_connect_command(self):
+        return 'docker exec -i -t {} login'.format(self._container_id)
+
+    async def login(self):
+        spawn = self._spawn
+
+        await spawn.expect(r'(?<!Last )login:')
+        spawn.sendline(self._user)
+
+        await spawn.expect(r'Password:')
+        spawn.sendline(self._password)
+
+        await spawn.expect(self._initial_prompt)
+
+        if self._prepare_console:
+            await self._prepare()
+
+
+class AsyncOpenswitchSSHConnection(AsyncOpenswitchConnection):
+    """
+    asyncio variant of
+    :class:`topology_docker_openswitch.connection.OpenswitchSSHConnection`.
+
+    :param str address: Address of the node.
+    :param int port: SSH port of the node.
+    """
+
+    def __init__(self, address, port=22, **kwargs):
+        self._address = address
+        self._port = port
+        super(AsyncOpenswitchSSHConnection, self).__init__(**kwargs)
+
+    def _get_connect_command(self):
+        return (
+            'ssh -t -o StrictHostKeyChecking=no '
+            '-o UserKnownHostsFile=/dev/null -p {} {}@{}'.format(
+                self._port, self._user, self._address
+            )
+        )
+
+    async def login(self):
+        spawn = self._spawn
+
+        await spawn.expect(r'[pP]assword:')
+        spawn.sendline(self._password)
+
+        await spawn.expect(self._initial_prompt)
+
+        if self._prepare_console:
+            await self._prepare()
+
+
+class AsyncOpenSwitchShell(object):
+    """
+    Base class of the asyncio OpenSwitch shells.
+
+    :param connection: Connection that holds the shell.
+    :type connection: :class:`AsyncOpenswitchConnection`
+    :param str prompt: Regular expression that matches the shell prompt.
+    :param str prefix: Prefix prepended to every command.
+    :param bool try_filter_echo: Remove the echo of the command from the
+     response.
+    """
+
+    def __init__(self, connection, prompt, prefix=None,
+                 try_filter_echo=False):
+        self._connection = connection
+        self._prompt = prompt
+        self._prefix = prefix
+        self._try_filter_echo = try_filter_echo
+        self._last_command = None
+
+    @property
+    def _spawn(self):
+        return self._connection._spawn
+
+    async def enter(self):
+        pass
+
+    async def exit(self):
+        pass
+
+    async def send_command(self, command, matches=None, timeout=None):
+        """
+        Send a command and wait for the prompt or the given matches.
+
+        :rtype: int
+        :return: Index of the match.
+        """
+        if self._prefix is not None:
+            command = '{}{}'.format(self._prefix, command)
+
+        self._last_command = command
+        self._spawn.sendline(command)
+
+        return await self._spawn.expect(
+            matches or [self._prompt], timeout=timeout
+        )
+
+    def get_response(self):
+        """
+        Get the response of the last command.
+
+        :rtype: str
+        """
+        lines = self._spawn.before.strip().replace('\r', '').splitlines()
+
+        if self._try_filter_echo and lines and \
+                self._last_command is not None and \
+                lines[0].strip() == self._last_command.strip():
+            lines.pop(0)
+
+        return '\n'.join(lines)
+
+    async def execute(self, command, timeout=None):
+        """
+        Enter the shell, send a command, get its response and exit the shell.
+
+        :rtype: str
+        """
+        await self.enter()
+        try:
+            await self.send_command(command, timeout=timeout)
+            return self.get_response()
+        finally:
+            await self.exit()
+
+
+class AsyncOpenSwitchVtyshShell(AsyncOpenSwitchShell):
+    """
+    asyncio variant of
+    :class:`topology_docker_openswitch.shell.OpenSwitchVtyshShell`.
+    """
+
+    def __init__(self, connection):
+        super(AsyncOpenSwitchVtyshShell, self).__init__(
+            connection, VTYSH_FORCED_PROMPT, try_filter_echo=True
+        )
+        self._prompt_handled = False
+
+    async def enter(self):
+        if self._prompt_handled:
+            return
+
+        spawn = self._spawn
+        spawn.sendline('set prompt {}'.format(_VTYSH_FORCED))
+
+        if await spawn.expect([VTYSH_STANDARD_PROMPT, VTYSH_FORCED_PROMPT]):
+            self._prompt = VTYSH_FORCED_PROMPT
+        else:
+            self._try_filter_echo = True
+            self._prompt = VTYSH_STANDARD_PROMPT
+
+        self._prompt_handled = True
+
+    async def exit(self):
+        # The shell is left in the exec context, where the other shells
+        # expect it.
+        pass
+
+
+class AsyncOpenSwitchBashShell(AsyncOpenSwitchShell):
+    """
+    asyncio variant of
+    :class:`topology_docker_openswitch.shell.OpenSwitchBashShell`.
+    """
+
+    def __init__(self, connection, **kwargs):
+        super(AsyncOpenSwitchBashShell, self).__init__(
+            connection, BASH_FORCED_PROMPT, **kwargs
+        )
+
+    async def enter(self):
+        spawn = self._spawn
+
+        spawn.sendline('start-shell')
+        await spawn.expect(BASH_START_SHELL_PROMPT)
+
+        # Setting the prompt and disabling the echo are sent together to
+        # save a round trip. The prompt is split with an empty quoted string
+        # so that the echo of this line does not match it.
+        half = len(BASH_FORCED_PROMPT) // 2
+        spawn.sendline('stty -echo; export PS1={}\'\'{}'.format(
+            BASH_FORCED_PROMPT[:half], BASH_FORCED_PROMPT[half:]
+        ))
+        await spawn.expect(self._prompt)
+
+    async def exit(self):
+        spawn = self._spawn
+        spawn.sendline('exit')
+        await spawn.expect([VTYSH_FORCED_PROMPT, VTYSH_STANDARD_PROMPT])
+
+
+class AsyncOpenSwitchVsctlShell(AsyncOpenSwitchBashShell):
+    """
+    asyncio variant of
+    :class:`topology_docker_openswitch.shell.OpenSwitchVsctlShell`.
+    """
+
+    def __init__(self, connection):
+        super(AsyncOpenSwitchVsctlShell, self).__init__(
+            connection, prefix='ovs-vsctl '
+        )
+
+
+class AsyncOpenSwitchBashSwnsShell(AsyncOpenSwitchBashShell):
+    """
+    asyncio variant of
+    :class:`topology_docker_openswitch.shell.OpenSwitchBashSwnsShell`.
+    """
+
+    async def enter(self):
+        await super(AsyncOpenSwitchBashSwnsShell, self).enter()
+
+        spawn = self._spawn
+        spawn.sendline('sudo ip netns exec swns bash')
+        await spawn.expect(self._prompt)
+
+    async def exit(self):
+        spawn = self._spawn
+        spawn.sendline('exit')
+        await spawn.expect(self._prompt)
+
+        await super(AsyncOpenSwitchBashSwnsShell, self).exit()
+
+
+SHELLS = {
+    'vtysh': AsyncOpenSwitchVtyshShell,
+    'bash': AsyncOpenSwitchBashShell,
+    'bash_swns': AsyncOpenSwitchBashSwnsShell,
+    'vsctl': AsyncOpenSwitchVsctlShell
+}
+
+
+__all__ = [
+    'AsyncSpawn',
+    'AsyncOpenswitchDockerConnection', 'AsyncOpenswitchSSHConnection',
+    'AsyncOpenSwitchVtyshShell', 'AsyncOpenSwitchBashShell',
+    'AsyncOpenSwitchBashSwnsShell', 'AsyncOpenSwitchVsctlShell'
+]
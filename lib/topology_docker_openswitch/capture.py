@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Out-of-band capture of large command outputs.
+
+Commands that produce a lot of output are slow to run through the pexpect
+terminal. The OpenSwitch shells can redirect the output of a command to a file
+in the shared directory of the node instead, this module provides the host
+side of that mechanism.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from mmap import mmap, ACCESS_READ
+from itertools import count
+from os import makedirs, chmod, remove, getpid
+from os.path import join, exists, getsize
+
+
+CAPTURE_DIR = 'capture'
+
+_CAPTURE_COUNTER = count()
+
+
+class CaptureFiles(object):
+    """
+    Paths of a capture file as seen from the host and from the container.
+
+    :param str shared_dir: Shared directory of the node in the host.
+    :param str shared_dir_mount: Directory where ``shared_dir`` is mounted
+     inside the container.
+    :param str name: Name that identifies the shell that makes the capture.
+    """
+
+    def __init__(self, shared_dir, shared_dir_mount, name):
+        capture_dir = join(shared_dir, CAPTURE_DIR)
+
+        if not exists(capture_dir):
+            makedirs(capture_dir)
+            # The container user that runs the command is not necessarily the
+            # owner of the shared directory in the host.
+            chmod(capture_dir, 0o777)
+
+        filename = '{}_{}_{}.out'.format(
+            name, getpid(), next(_CAPTURE_COUNTER)
+        )
+
+        self.host_path = join(capture_dir, filename)
+        self.container_path = '/'.join(
+            [shared_dir_mount.rstrip('/'), CAPTURE_DIR, filename]
+        )
+
+
+class CapturedOutput(object):
+    """
+    Read only view of a command output captured in a file.
+
+    The file is memory-mapped, so the output is never fully loaded into the
+    memory of the test process unless it is explicitly requested by calling
+    :meth:`read` or :meth:`text`. Use :meth:`lines` to stream it instead.
+
+    Instances can be used as context managers, the file is closed and removed
+    when the context is exited.
+
+    :param str path: Path of the capture file in the host.
+    :param str encoding: Encoding used to decode the captured output.
+    """
+
+    def __init__(self, path, encoding='utf-8'):
+        self.path = path
+        self.encoding = encoding
+        self._fd = open(path, 'rb')
+        self._mmap = None
+
+        # Empty files can not be memory-mapped.
+        if getsize(path):
+            self._mmap = mmap(self._fd.fileno(), 0, access=ACCESS_READ)
+
+    def __len__(self):
+        return len(self._mmap) if self._mmap is not None else 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close(remove_file=True)
+
+    @property
+    def view(self):
+        """
+        Memory-mapped view of the captured output.
+
+        :rtype: mmap.mmap or bytes
+        :return: The memory map of the output file, or an empty bytes object
+         if the output is empty.
+        """
+        return self._mmap if self._mmap is not None else b''
+
+    def read(self):
+        """
+        Read the whole captured output.
+
+        :rtype: bytes
+        """
+        return self.view[:]
+
+    def text(self):
+        """
+        Read and decode the whole captured output.
+
+        :rtype: str
+        """
+        return self.read().decode(self.encoding, 'ignore')
+
+    def lines(self):
+        """
+        Iterate over the decoded lines of the captured output.
+
+        Lines are read one at a time from the memory map, so this is the
+        preferred way to process big outputs.
+        """
+        if self._mmap is None:
+            return
+
+        self._mmap.seek(0)
+        for line in iter(self._mmap.readline, b''):
+            yield line.decode(self.encoding, 'ignore').rstrip('\r\n')
+
+    def close(self, remove_file=False):
+        """
+        Close the capture file.
+
+        :param bool remove_file: Remove the capture file from the host too.
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._fd.close()
+
+        if remove_file and exists(self.path):
+            remove(self.path)
+
+
+__all__ = ['CaptureFiles', 'CapturedOutput']
@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Host side access to the cgroups of docker containers.
+
+The resource usage of a container is read directly from its cgroup files,
+which is much cheaper than asking the docker daemon for it. Both the cgroup v1
+hierarchy (one mount per controller) and the unified cgroup v2 hierarchy are
+supported.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from json import dump
+from time import time
+from threading import Thread, Event
+from collections import OrderedDict
+from os import sysconf, walk
+from os.path import join, exists
+
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+# Paths where docker places the cgroup of a container, relative to the
+# hierarchy root, for the cgroupfs and systemd cgroup drivers.
+_CONTAINER_CGROUPS = ('docker/{}', 'system.slice/docker-{}.scope')
+
+
+def is_unified(root=CGROUP_ROOT):
+    """
+    Tell if the host uses the unified cgroup v2 hierarchy.
+
+    :param str root: Mount point of the cgroup filesystem.
+    :rtype: bool
+    """
+    return exists(join(root, 'cgroup.controllers'))
+
+
+def container_cgroup(container_id, controller, root=CGROUP_ROOT):
+    """
+    Find the cgroup directory of a container.
+
+    :param str container_id: Full identifier of the container.
+    :param str controller: Name of the cgroup v1 controller, like ``memory``
+     or ``cpuacct``. It is ignored in the unified hierarchy.
+    :param str root: Mount point of the cgroup filesystem.
+    :rtype: str
+    :return: Path of the cgroup directory, or None if it was not found.
+    """
+    base = root if is_unified(root) else join(root, controller)
+
+    for template in _CONTAINER_CGROUPS:
+        path = join(base, template.format(container_id))
+        if exists(path):
+            return path
+    return None
+
+
+def read_value(path):
+    """
+    Read a cgroup file that holds a single integer.
+
+    :rtype: int
+    :return: The value, or None if the file could not be read.
+    """
+    try:
+        with open(path) as fd:
+            return int(fd.read().strip())
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def memory_usage(container_id, root=CGROUP_ROOT):
+    """
+    Get the memory used by a container.
+
+    :param str container_id: Full identifier of the container.
+    :param str root: Mount point of the cgroup filesystem.
+    :rtype: int
+    :return: Memory usage in bytes, or None if it is not available.
+    """
+    cgroup = container_cgroup(container_id, 'memory', root=root)
+
+    if cgroup is None:
+        return None
+    if is_unified(root):
+        return read_value(join(cgroup, 'memory.current'))
+    return read_value(join(cgroup, 'memory.usage_in_bytes'))
+
+
+def cpu_usage(container_id, root=CGROUP_ROOT):
+    """
+    Get the CPU time used by a container since it started.
+
+    :param str container_id: Full identifier of the container.
+    :param str root: Mount point of the cgroup filesystem.
+    :rtype: int
+    :return: CPU time in nanoseconds, or None if it is not available.
+    """
+    cgroup = container_cgroup(container_id, 'cpuacct', root=root)
+
+    if cgroup is None:
+        return None
+    if not is_unified(root):
+        return read_value(join(cgroup, 'cpuacct.usage'))
+
+    try:
+        with open(join(cgroup, 'cpu.stat')) as fd:
+            for line in fd:
+                if line.startswith('usage_usec '):
+                    return int(line.split()[1]) * 1000
+    except (IOError, OSError, ValueError):
+        pass
+    return None
+
+
+def pids_current(container_id, root=CGROUP_ROOT):
+    """
+    Get the number of processes and threads of a container.
+
+    :param str container_id: Full identifier of the container.
+    :param str root: Mount point of the cgroup filesystem.
+    :rtype: int
+    :return: The number of tasks, or None if it is not available.
+    """
+    cgroup = container_cgroup(container_id, 'pids', root=root)
+
+    if cgroup is None:
+        return None
+    return read_value(join(cgroup, 'pids.current'))
+
+
+def process_usage(container_id, root=CGROUP_ROOT, proc='/proc'):
+    """
+    Get the CPU time and resident memory of the processes of a container,
+    added up by process name.
+
+    The processes of the child cgroups are included, systemd runs the daemons
+    of the container in a cgroup per service.
+
+    :param str container_id: Full identifier of the container.
+    :param str root: Mount point of the cgroup filesystem.
+    :param str proc: Mount point of the proc filesystem of the host.
+    :rtype: dict
+    :return: The CPU time in nanoseconds and the resident memory in bytes of
+     every process name.
+    """
+    cgroup = container_cgroup(container_id, 'cpuacct', root=root)
+    if cgroup is None:
+        return {}
+
+    pids = []
+    for directory, _, files in walk(cgroup):
+        if 'cgroup.procs' not in files:
+            continue
+        try:
+            with open(join(directory, 'cgroup.procs')) as fd:
+                pids.extend(fd.read().split())
+        except (IOError, OSError):
+            # The cgroup was removed while it was read.
+            continue
+
+    tick = 1000000000 // sysconf(str('SC_CLK_TCK'))
+    page_size = sysconf(str('SC_PAGE_SIZE'))
+    usage = {}
+
+    for pid in pids:
+        try:
+            with open(join(proc, pid, 'stat')) as fd:
+                stat = fd.read()
+        except (IOError, OSError):
+            # The process finished after the cgroup was read.
+            continue
+
+        # The name is between parentheses and may contain spaces, the fields
+        # after it start with the state.
+        name = stat[stat.find('(') + 1:stat.rfind(')')]
+        fields = stat[stat.rfind(')') + 2:].split()
+
+        cpu, rss = usage.get(name, (0, 0))
+        usage[name] = (
+            cpu + (int(fields[11]) + int(fields[12])) * tick,
+            rss + int(fields[21]) * page_size
+        )
+
+    return usage
+
+
+class ResourceSampler(Thread):
+    """
+    Thread that samples the CPU, memory and pids usage of a container from
+    its cgroup files.
+
+    Every sample has the time, the CPU used in the interval as a percentage
+    of one core, the memory in bytes, the number of tasks and the CPU
+    percentage and memory of the processes of the container, by name. Call
+    :meth:`stop` to finish the sampling and write the samples and a summary
+    to a JSON file.
+
+    :param str container_id: Full identifier of the container.
+    :param float interval: Seconds between samples.
+    :param str path: Path of the JSON file written when the sampling stops.
+    :param str root: Mount point of the cgroup filesystem.
+    """
+
+    def __init__(self, container_id, interval=1.0, path=None,
+                 root=CGROUP_ROOT):
+        super(ResourceSampler, self).__init__(
+            name='resources-{}'.format(container_id[:12])
+        )
+        self.daemon = True
+
+        self.container_id = container_id
+        self.interval = interval
+        self.path = path
+        self.root = root
+        self.samples = []
+
+        self._stopped = Event()
+        self._last = None
+
+    def sample(self):
+        """
+        Take a sample.
+
+        The CPU percentages of the first sample are None, they are computed
+        from the difference with the previous sample.
+        """
+        now = time()
+        cpu = cpu_usage(self.container_id, root=self.root)
+        processes = process_usage(self.container_id, root=self.root)
+
+        cpu_percent = None
+        process_percent = dict((name, None) for name in processes)
+
+        if self._last is not None:
+            last_time, last_cpu, last_processes = self._last
+            elapsed = (now - last_time) * 1000000000
+
+            if cpu is not None and last_cpu is not None and elapsed:
+                cpu_percent = round((cpu - last_cpu) * 100 / elapsed, 2)
+
+            for name, (process_cpu, rss) in processes.items():
+                if name in last_processes and elapsed:
+                    process_percent[name] = round(
+                        (process_cpu - last_processes[name][0]) * 100 /
+                        elapsed, 2
+                    )
+
+        self._last = (now, cpu, processes)
+
+        self.samples.append(OrderedDict([
+            ('time', round(now, 3)),
+            ('cpu_percent', cpu_percent),
+            ('memory', memory_usage(self.container_id, root=self.root)),
+            ('pids', pids_current(self.container_id, root=self.root)),
+            ('processes', dict(
+                (name, [process_percent[name], rss])
+                for name, (process_cpu, rss) in processes.items()
+            )),
+        ]))
+
+    def run(self):
+        while True:
+            self.sample()
+            if self._stopped.wait(self.interval):
+                return
+
+    def stop(self):
+        """
+        Stop the sampling and write the results, if a path was given.
+
+        :rtype: dict
+        :return: The results, see :meth:`results`.
+        """
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
+
+        results = self.results()
+
+        if self.path is not None:
+            with open(self.path, 'w') as fd:
+                dump(results, fd, indent=1)
+
+        return results
+
+    def results(self):
+        """
+        Get the summary and the samples.
+
+        The summary has the mean and maximum CPU percentage and memory, the
+        maximum number of tasks, and the mean CPU percentage and maximum
+        memory of every process name, the busiest first.
+
+        :rtype: dict
+        """
+        def stats(values):
+            values = [value for value in values if value is not None]
+            if not values:
+                return OrderedDict([('mean', None), ('max', None)])
+            return OrderedDict([
+                ('mean', round(sum(values) / len(values), 2)),
+                ('max', max(values)),
+            ])
+
+        process_names = set()
+        for sample in self.samples:
+            process_names.update(sample['processes'])
+
+        processes = []
+        for name in process_names:
+            values = [
+                sample['processes'][name] for sample in self.samples
+                if name in sample['processes']
+            ]
+            processes.append(OrderedDict([
+                ('name', name),
+                ('cpu_percent', stats(value[0] for value in values)['mean']),
+                ('memory', max(value[1] for value in values)),
+            ]))
+
+        processes.sort(
+            key=lambda process: process['cpu_percent'] or 0, reverse=True
+        )
+
+        summary = OrderedDict([
+            ('interval', self.interval),
+            ('samples', len(self.samples)),
+            ('cpu_percent', stats(
+                sample['cpu_percent'] for sample in self.samples
+            )),
+            ('memory', stats(sample['memory'] for sample in self.samples)),
+            ('pids', stats(sample['pids'] for sample in self.samples)['max']),
+            ('processes', processes),
+        ])
+
+        return OrderedDict([
+            ('container', self.container_id),
+            ('summary', summary),
+            ('samples', self.samples),
+        ])
+
+
+def host_memory(available=False):
+    """
+    Get the total memory of the host.
+
+    :param bool available: Get the memory available for new processes
+     instead.
+    :rtype: int
+    :return: Memory in bytes, or None if it is not available.
+    """
+    field = 'MemAvailable:' if available else 'MemTotal:'
+
+    try:
+        with open('/proc/meminfo') as fd:
+            for line in fd:
+                if line.startswith(field):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError, ValueError):
+        pass
+    return None
+
+
+__all__ = [
+    'is_unified', 'container_cgroup', 'read_value', 'memory_usage',
+    'cpu_usage', 'pids_current', 'process_usage', 'ResourceSampler',
+    'host_memory'
+]
@@ -1,121 +1,486 @@
-# -*- coding: utf-8 -*-
-
-"""
-OpenSwitch node module
-"""
-
-from __future__ import unicode_literals, absolute_import
-from __future__ import print_function, division
-
-from time import sleep
-
-from topology_docker.connection import (
-    DockerConnection, DockerSSHConnection
-)
-from topology_docker_openswitch.shell import (
-    BASH_FORCED_PROMPT, BASH_START_SHELL_PROMPT,
-    VTYSH_STANDARD_PROMPT
-)
-
-
-class OpenswitchDockerConnection(DockerConnection):
-    """
-    Docker ``exec`` connection for the Topology docker.
-
-    This class implements a ``_get_connect_command()`` method that allows to
-    interact with a shell through a ``docker exec`` interactive command, and
-    extends the constructor to request for container related parameters.
-
-    :param str container: Container unique identifier.
-    :param str command: Command to be executed with the ``docker exec`` that
-     will launch an interactive session.
-    """
-
-    def __init__(self, identifier, parent_node, user='admin',
-                 password='admin', **kwargs):
-        self._container_id = parent_node.container_id
-        super(DockerConnection, self).__init__(
-            identifier, parent_node, user=user, password=password,
-            initial_prompt=VTYSH_STANDARD_PROMPT, **kwargs)
-
-    def _get_connect_command(self):
-        return 'docker exec -i -t {} login'.format(
-            self._container_id
-        )
-
-    def login(self):
-        """
-        See :meth:`CommonConnection.login` for more information.
-        """
-        spawn = self._spawn
-
-        spawn.expect(r'(?<!Last )login:')
-
-        spawn.sendline(self._user)
-        # This is necessary to avoid wrong matching due to OpenSwitch slow
-        # output return.
-        sleep(0.5)
-
-        spawn.expect(r'Password:')
-        spawn.sendline(self._password)
-
-        spawn.expect(self._initial_prompt)
-
-        # only admins have access to the shell,
-        # so start-shell will not always succeed
-        # if it works we get the bash prompt and set it up
-        # if not we will be at the vtysh prompt
-        spawn.sendline('start-shell')
-        index = spawn.expect([self._initial_prompt, BASH_START_SHELL_PROMPT])
-
-        if bool(index):
-            spawn.sendline('export PS1={}'.format(BASH_FORCED_PROMPT))
-            spawn.expect(BASH_FORCED_PROMPT)
-            spawn.sendline('stty -echo')
-            spawn.expect(BASH_FORCED_PROMPT)
-            spawn.sendline('exit')
-            spawn.expect(self._initial_prompt)
-
-
-class OpenswitchSSHConnection(DockerSSHConnection):
-    """
-    SSH connection class
-    """
-
-    def __init__(self, identifier, parent_node, user='admin',
-                 password='admin', *args, **kwargs):
-        super(OpenswitchSSHConnection, self).__init__(
-            identifier, parent_node, initial_prompt=VTYSH_STANDARD_PROMPT,
-            user=user, password=password, *args, **kwargs
-        )
-
-    def login(self):
-        """
-        See :meth:`CommonConnection.login` for more information.
-        """
-        super(OpenswitchSSHConnection, self).login()
-
-        spawn = self._spawn
-
-        spawn.sendline('')
-        spawn.expect(self._initial_prompt)
-
-        # only admins have access to the shell,
-        # so start-shell will not always succeed
-        # if it works we get the bash prompt and set it up
-        # if not we will be at the vtysh prompt
-        spawn.sendline('start-shell')
-        index = spawn.expect([self._initial_prompt, BASH_START_SHELL_PROMPT])
-
-        if bool(index):
-            spawn.sendline('export PS1={}'.format(BASH_FORCED_PROMPT))
-            spawn.expect(BASH_FORCED_PROMPT)
-            spawn.sendline('stty -echo')
-            spawn.expect(BASH_FORCED_PROMPT)
-            spawn.sendline('exit')
-            spawn.expect(self._initial_prompt)
-
-
-__all__ = [
-    'OpenswitchSSHConnection'
-]
+# -*- coding: utf-8 -*-
+
+"""
+OpenSwitch node module
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from time import time
+from glob import glob
+from threading import Lock
+from os import makedirs, getuid, devnull
+from os.path import join, exists
+from tempfile import gettempdir
+from subprocess import call, check_output
+
+from six.moves import shlex_quote
+
+from topology_docker.connection import (
+    DockerConnection, DockerSSHConnection
+)
+from topology_docker_openswitch.ringlog import RingBufferLog
+from topology_docker_openswitch.recording import SessionRecorder
+from topology_docker_openswitch.overhead import record_overhead
+from topology_docker_openswitch.tracing import (
+    TracedSpawn, create_tracer, tracing_enabled
+)
+from topology_docker_openswitch.simulator import simulator_command
+from topology_docker_openswitch.shell import (
+    BASH_START_SHELL_PROMPT, VTYSH_STANDARD_PROMPT
+)
+
+
+# SSH connections of the same node and user share one authenticated
+# transport through an SSH ControlMaster socket in this directory. The master
+# outlives the connection that started it while the others use it, for this
+# number of seconds at most once it is idle.
+SSH_CONTROL_DIR = join(gettempdir(), 'ops-ssh-{}'.format(getuid()))
+SSH_CONTROL_PERSIST = 600
+
+# Number of logged in connections that use every SSH master, the last one to
+# be disconnected closes it.
+_SSH_MASTER_USERS = {}
+_SSH_MASTER_LOCK = Lock()
+
+
+def _prepare_console(connection):
+    """
+    Disable the echo of the terminal of a connection that is at the vtysh
+    prompt.
+
+    Only admins have access to the shell, so start-shell will not always
+    succeed. If it works the echo is disabled from the bash shell and it is
+    exited back to vtysh, if not the connection is left at the vtysh prompt.
+    Both operations are sent in one line to save a round trip.
+
+    The users that are known not to have access to start-shell are kept in
+    the ``no_start_shell_users`` set of the node, the preparation is skipped
+    for them in the next connections to it.
+
+    :param connection: The connection whose terminal will be prepared.
+    """
+    node = connection._parent_node
+    no_start_shell_users = getattr(node, 'no_start_shell_users', None)
+    if no_start_shell_users is None:
+        no_start_shell_users = node.no_start_shell_users = set()
+
+    if connection._user in no_start_shell_users:
+        return
+
+    spawn = connection._spawn
+
+    spawn.sendline('start-shell')
+    index = spawn.expect(
+        [connection._initial_prompt, BASH_START_SHELL_PROMPT]
+    )
+
+    if not bool(index):
+        no_start_shell_users.add(connection._user)
+        return
+
+    # The echo setting belongs to the terminal, so it is kept once the bash
+    # shell is exited. The bash prompt is never seen again, so there is no
+    # need to set it.
+    spawn.sendline('stty -echo; exit')
+    spawn.expect(connection._initial_prompt)
+
+
+def _create_tracer(connection, identifier, parent_node, trace):
+    """
+    Create the tracer of a connection, if it is traced.
+
+    :param bool trace: True to trace the connection, None to trace it only if
+     tracing is enabled, see
+     :func:`topology_docker_openswitch.tracing.enable_tracing`.
+    """
+    if trace is None:
+        trace = tracing_enabled()
+
+    connection.tracer = create_tracer(
+        connection._node_identifier, identifier
+    ) if trace else None
+
+
+def _trace_spawn(connection):
+    """
+    Replace the spawn of a traced connection with a tracing proxy.
+
+    The operations done until a shell uses the terminal are attributed to
+    the console.
+    """
+    tracer = connection.tracer
+    if tracer is None:
+        return
+
+    tracer.shell = None
+    if not isinstance(connection._spawn, TracedSpawn):
+        connection._spawn = TracedSpawn(connection._spawn, tracer)
+
+
+def _ssh_control(control_path, operation):
+    """
+    Send a control operation to an SSH master.
+
+    :rtype: bool
+    :return: True if the operation succeeded.
+    """
+    with open(devnull, 'w') as null:
+        return call(
+            ['ssh', '-S', control_path, '-O', operation, 'openswitch'],
+            stdout=null, stderr=null
+        ) == 0
+
+
+def get_container_address(container_id):
+    """
+    Get the IP address of a container in the docker bridge network.
+
+    :param str container_id: Container unique identifier.
+    :rtype: str
+    """
+    return check_output([
+        'docker', 'inspect', '--format', '{{.NetworkSettings.IPAddress}}',
+        container_id
+    ]).decode('utf-8').strip()
+
+
+def close_ssh_masters(container_id):
+    """
+    Close the SSH master connections of a container.
+
+    :param str container_id: Container unique identifier.
+    """
+    for control_path in glob(
+        join(SSH_CONTROL_DIR, '{}-*'.format(container_id[:12]))
+    ):
+        _ssh_control(control_path, 'exit')
+
+
+class OpenswitchDockerConnection(DockerConnection):
+    """
+    Docker ``exec`` connection for the Topology docker.
+
+    This class implements a ``_get_connect_command()`` method that allows to
+    interact with a shell through a ``docker exec`` interactive command, and
+    extends the constructor to request for container related parameters.
+
+    :param str container: Container unique identifier.
+    :param str command: Command to be executed with the ``docker exec`` that
+     will launch an interactive session.
+    :param bool prepare_console: Disable the terminal echo from a bash shell
+     after logging in.
+    :param int log_buffer_size: If given, the output read from the console
+     is logged to a :class:`topology_docker_openswitch.ringlog.RingBufferLog`
+     that keeps this number of bytes in memory, instead of the log of the
+     spawn. Older output is appended, compressed, to a file in the shared
+     directory of the node. The output held in memory is written to the log
+     of the spawn by :meth:`flush_log`, which is called when the login fails.
+    :param str record: Path of a session file where the commands sent through
+     the shells of this connection and their responses are recorded, see
+     :class:`topology_docker_openswitch.recording.SessionRecorder`. It is
+     written when the connection is disconnected.
+    :param bool trace: Record the ``sendline`` and ``expect`` operations of
+     the connection in a
+     :class:`topology_docker_openswitch.tracing.ConsoleTracer`. By default
+     they are only recorded if tracing is enabled.
+    """
+
+    def __init__(self, identifier, parent_node, user='admin',
+                 password='admin', prepare_console=True, log_buffer_size=None,
+                 record=None, trace=None, **kwargs):
+        self._parent_node = parent_node
+        self._container_id = parent_node.container_id
+        self._prepare_console = prepare_console
+        self._log_buffer_size = log_buffer_size
+        self._log_spill_path = join(
+            parent_node.shared_dir, 'console_{}.log.gz'.format(identifier)
+        )
+        self.log = None
+        self._framework_log = None
+        self._log_flushed = 0
+        self.login_time = None
+        self.recorder = SessionRecorder(record) if record else None
+        self._node_identifier = parent_node.identifier
+        _create_tracer(self, identifier, parent_node, trace)
+        super(DockerConnection, self).__init__(
+            identifier, parent_node, user=user, password=password,
+            initial_prompt=VTYSH_STANDARD_PROMPT, **kwargs)
+
+    def _get_connect_command(self):
+        return 'docker exec -i -t {} login'.format(
+            self._container_id
+        )
+
+    def login(self):
+        """
+        See :meth:`CommonConnection.login` for more information.
+
+        No fixed delays are used, every step waits for the prompt it needs.
+        The user is only sent once the ``login:`` prompt has been read, so the
+        ``Password:`` prompt that follows can not be mistaken. The time it
+        took is stored in the ``login_time`` attribute.
+        """
+        start = time()
+        _trace_spawn(self)
+        spawn = self._spawn
+
+        if self._log_buffer_size is not None:
+            if self.log is None:
+                self.log = RingBufferLog(
+                    self._log_buffer_size, spill_path=self._log_spill_path
+                )
+            # The ring buffer replaces the log of the framework, which only
+            # gets the output when the log is flushed.
+            if spawn.logfile_read is not self.log:
+                self._framework_log = spawn.logfile_read
+            spawn.logfile_read = self.log
+
+        try:
+            spawn.expect(r'(?<!Last )login:')
+            spawn.sendline(self._user)
+
+            spawn.expect(r'Password:')
+            spawn.sendline(self._password)
+
+            spawn.expect(self._initial_prompt)
+
+            if self._prepare_console:
+                _prepare_console(self)
+        except Exception:
+            self.flush_log()
+            raise
+
+        self.login_time = time() - start
+        record_overhead(self._node_identifier, 'login', self.login_time)
+
+    def disconnect(self, *args, **kwargs):
+        """
+        See :meth:`CommonConnection.disconnect` for more information.
+        """
+        super(OpenswitchDockerConnection, self).disconnect(*args, **kwargs)
+
+        if self.log is not None:
+            self.log.close()
+
+        if self.recorder is not None:
+            self.recorder.save()
+
+    def flush_log(self):
+        """
+        Write the console output held in memory, that was not written yet, to
+        the log of the spawn.
+
+        It does nothing if the connection was not created with
+        ``log_buffer_size``.
+        """
+        if self.log is None or self._framework_log is None:
+            return
+
+        self._log_flushed = self.log.dump(
+            self._framework_log, self._log_flushed
+        )
+
+    def log_tail(self, size=4096):
+        """
+        Get the newest console output, for error messages.
+
+        :param int size: Maximum number of bytes to return.
+        :rtype: str
+        :return: The newest output, or an empty string if the connection was
+         not created with ``log_buffer_size``.
+        """
+        if self.log is None:
+            return ''
+        return self.log.tail(size)
+
+
+class OpenswitchSimulatorConnection(OpenswitchDockerConnection):
+    """
+    Connection to a local simulator of the console of an OpenSwitch node.
+
+    It behaves like :class:`OpenswitchDockerConnection`, but the console is
+    played by :mod:`topology_docker_openswitch.simulator` in a local PTY
+    instead of a container, so the connection and shells can be exercised
+    without booting an image.
+
+    The parent node only needs the ``container_id`` and ``shared_dir``
+    attributes.
+
+    :param simulator_options: Keyword arguments of
+     :class:`topology_docker_openswitch.simulator.ConsoleSimulator`. The
+     ``user`` and ``password`` of the connection are passed to it too.
+    """
+
+    def __init__(self, identifier, parent_node, user='admin',
+                 password='admin', **kwargs):
+        self._simulator_options = dict(
+            (name, kwargs.pop(name)) for name in [
+                'hostname', 'set_prompt', 'start_shell', 'latency',
+                'output_size'
+            ] if name in kwargs
+        )
+        self._simulator_options.update(user=user, password=password)
+
+        super(OpenswitchSimulatorConnection, self).__init__(
+            identifier, parent_node, user=user, password=password, **kwargs
+        )
+
+    def _get_connect_command(self):
+        return simulator_command(**self._simulator_options)
+
+
+class OpenswitchReplayConnection(OpenswitchSimulatorConnection):
+    """
+    Connection that answers the commands of its shells from a recorded
+    session, without a switch.
+
+    The console is played by the simulator, like in
+    :class:`OpenswitchSimulatorConnection`, and the commands recorded by a
+    connection created with the ``record`` argument get their recorded
+    responses.
+
+    :param str replay: Path of the session file.
+    :param float time_scale: Factor applied to the recorded duration of every
+     exchange. The default, 0, answers at once, 1 replays the recorded timing.
+    :param bool strict: Fail, by closing the console, when a command that is
+     not in the recording is sent. If False, such commands are simulated.
+    """
+
+    def __init__(self, identifier, parent_node, replay=None, time_scale=0.0,
+                 strict=True, **kwargs):
+        if replay is None:
+            raise Exception('Replay connections require a session file.')
+
+        super(OpenswitchReplayConnection, self).__init__(
+            identifier, parent_node, **kwargs
+        )
+
+        self._simulator_options.update(
+            replay=replay, time_scale=time_scale, strict=strict
+        )
+
+
+class OpenswitchSSHConnection(DockerSSHConnection):
+    """
+    SSH connection class
+
+    Connections of the same node and user are multiplexed over one SSH master
+    connection. Only the first one performs the SSH handshake and
+    authentication, the rest open a new channel on the already authenticated
+    transport. The master is closed, and its control socket removed, when the
+    last connection that uses it is disconnected.
+
+    :param bool prepare_console: Disable the terminal echo from a bash shell
+     after logging in.
+    :param bool multiplex: Share an SSH master connection with the other
+     connections of the same node and user.
+    :param bool trace: Record the ``sendline`` and ``expect`` operations of
+     the connection, see :class:`OpenswitchDockerConnection`.
+    """
+
+    def __init__(self, identifier, parent_node, user='admin',
+                 password='admin', prepare_console=True, multiplex=True,
+                 trace=None, *args, **kwargs):
+        self._parent_node = parent_node
+        self._container_id = parent_node.container_id
+        self._prepare_console = prepare_console
+        self._multiplex = multiplex
+        self._multiplexed = False
+        self._control_path = None
+        self.login_time = None
+        self._node_identifier = parent_node.identifier
+        _create_tracer(self, identifier, parent_node, trace)
+        super(OpenswitchSSHConnection, self).__init__(
+            identifier, parent_node, initial_prompt=VTYSH_STANDARD_PROMPT,
+            user=user, password=password, *args, **kwargs
+        )
+
+    def _get_control_path(self):
+        if not exists(SSH_CONTROL_DIR):
+            makedirs(SSH_CONTROL_DIR, 0o700)
+
+        return join(
+            SSH_CONTROL_DIR,
+            '{}-{}'.format(self._container_id[:12], self._user)
+        )
+
+    def _get_connect_command(self):
+        """
+        Add the SSH multiplexing options to the connection command.
+        """
+        command = super(OpenswitchSSHConnection, self)._get_connect_command()
+
+        if not self._multiplex or not command.startswith('ssh '):
+            return command
+
+        control_path = self._get_control_path()
+
+        # If a master is already running, this connection will not be asked
+        # for a password.
+        self._multiplexed = _ssh_control(control_path, 'check')
+        self._control_path = control_path
+
+        return 'ssh -o ControlMaster=auto -o ControlPath={} ' \
+            '-o ControlPersist={} {}'.format(
+                shlex_quote(control_path), SSH_CONTROL_PERSIST, command[4:]
+            )
+
+    def login(self):
+        """
+        See :meth:`CommonConnection.login` for more information.
+
+        The authentication is skipped if the connection was multiplexed over
+        an existing SSH master, vtysh shows its prompt as soon as the session
+        starts. The time it took is stored in the ``login_time`` attribute.
+        """
+        start = time()
+        _trace_spawn(self)
+
+        spawn = self._spawn
+
+        if not self._multiplexed:
+            super(OpenswitchSSHConnection, self).login()
+            spawn.sendline('')
+
+        spawn.expect(self._initial_prompt)
+
+        if self._prepare_console:
+            _prepare_console(self)
+
+        if self._control_path is not None:
+            with _SSH_MASTER_LOCK:
+                _SSH_MASTER_USERS[self._control_path] = \
+                    _SSH_MASTER_USERS.get(self._control_path, 0) + 1
+
+        self.login_time = time() - start
+        record_overhead(self._node_identifier, 'login', self.login_time)
+
+    def disconnect(self, *args, **kwargs):
+        """
+        See :meth:`CommonConnection.disconnect` for more information.
+
+        The SSH master is closed if no other connection uses it.
+        """
+        super(OpenswitchSSHConnection, self).disconnect(*args, **kwargs)
+
+        control_path = self._control_path
+        if control_path is None:
+            return
+        self._control_path = None
+
+        with _SSH_MASTER_LOCK:
+            users = _SSH_MASTER_USERS.pop(control_path, 0) - 1
+            if users > 0:
+                _SSH_MASTER_USERS[control_path] = users
+
+        if users <= 0:
+            _ssh_control(control_path, 'exit')
+
+
+__all__ = [
+    'OpenswitchSSHConnection', 'OpenswitchSimulatorConnection',
+    'OpenswitchReplayConnection',
+    'close_ssh_masters', 'get_container_address'
+]
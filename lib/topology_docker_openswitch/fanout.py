@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Topology-wide command fan-out for OpenSwitch nodes.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from time import time
+from threading import Thread
+from traceback import format_exc
+
+from six.moves import queue
+
+
+class FanOutResult(object):
+    """
+    Result of the commands sent to one node by :func:`fan_out`.
+
+    :var str node: Node identifier.
+    :var list responses: Responses of the commands that were executed, in the
+     same order as the commands.
+    :var error: Exception raised by the command that failed, if any. The
+     commands after it are not executed.
+    :var str traceback: Formatted traceback of the error, if any.
+    :var float elapsed: Seconds spent executing the commands in the node.
+    """
+
+    def __init__(self, node):
+        self.node = node
+        self.responses = []
+        self.error = None
+        self.traceback = None
+        self.elapsed = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return 'FanOutResult({!r}, ok={})'.format(self.node, self.ok)
+
+
+def _openswitch_nodes(topology):
+    """
+    Get the OpenSwitch node objects of a topology.
+
+    :param topology: A topology manager, or an iterable of node objects.
+    """
+    if hasattr(topology, 'nodes') and hasattr(topology, 'get'):
+        nodes = [topology.get(node) for node in topology.nodes]
+    else:
+        nodes = list(topology)
+
+    return [
+        node for node in nodes
+        if node.metadata.get('type', None) == 'openswitch'
+    ]
+
+
+def fan_out(topology, commands, shell='vtysh', max_workers=8):
+    """
+    Send the same commands to all the OpenSwitch nodes of a topology at once.
+
+    The commands are sent to each node in order, through the given shell of
+    its default connection. Up to ``max_workers`` nodes are handled at the
+    same time. A failure in one node does not stop the others, it is reported
+    in the result of that node.
+
+    :param topology: A topology manager, or an iterable of node objects. Only
+     nodes of ``openswitch`` type are used.
+    :param commands: A command or a list of commands.
+    :param str shell: Name of the shell to send the commands through.
+    :param int max_workers: Maximum number of nodes handled at the same time.
+    :rtype: dict
+    :return: A dictionary that maps node identifiers to
+     :class:`FanOutResult` objects.
+    """
+    if not isinstance(commands, (list, tuple)):
+        commands = [commands]
+
+    nodes = _openswitch_nodes(topology)
+    results = dict(
+        (node.identifier, FanOutResult(node.identifier)) for node in nodes
+    )
+    pending = queue.Queue()
+
+    for node in nodes:
+        pending.put(node)
+
+    def worker():
+        while True:
+            try:
+                node = pending.get_nowait()
+            except queue.Empty:
+                return
+
+            result = results[node.identifier]
+            start = time()
+
+            try:
+                shellobj = node.get_shell(shell)
+                for command in commands:
+                    shellobj.send_command(command)
+                    result.responses.append(shellobj.get_response())
+            except Exception as error:
+                result.error = error
+                result.traceback = format_exc()
+
+            result.elapsed = time() - start
+
+    workers = [
+        Thread(target=worker) for i in range(min(max_workers, len(nodes)))
+    ]
+    for thread in workers:
+        thread.daemon = True
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    return results
+
+
+__all__ = ['FanOutResult', 'fan_out']
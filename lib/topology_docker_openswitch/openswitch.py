@@ -25,23 +25,43 @@ from __future__ import unicode_literals, absolute_import
 from __future__ import print_function, division
 
 from json import loads
-from subprocess import check_output, CalledProcessError
-from platform import system, linux_distribution
+from subprocess import check_output, CalledProcessError, STDOUT
 from logging import StreamHandler, getLogger, INFO, Formatter
 from sys import stdout
-from os.path import join, dirname, normpath, abspath
+from time import sleep, time
+from tempfile import mkdtemp
+from os import symlink, rmdir, remove
+from os.path import join, dirname, normpath, abspath, exists
+from shlex import split as shlex_split
+import platform
 
 from topology_docker.node import DockerNode
 from topology_docker_openswitch.connection import (
     OpenswitchDockerConnection,
-    OpenswitchSSHConnection
+    OpenswitchReplayConnection,
+    OpenswitchSSHConnection,
+    close_ssh_masters,
+    get_container_address
 )
 from topology_docker_openswitch.shell import (
     OpenSwitchVtyshShell,
     OpenSwitchBashShell,
     OpenSwitchBashSwnsShell,
-    OpenSwitchVsctlShell
+    OpenSwitchVsctlShell,
+    LazyShell
 )
+from topology_docker_openswitch.rest import OpenswitchRestConnection
+from topology_docker_openswitch.ovsdb import (
+    OvsdbClient, OvsdbReplica, OvsdbSnapshot
+)
+from topology_docker_openswitch.warmpool import (
+    ClaimedContainerClient, get_warm_pool
+)
+from topology_docker_openswitch.overhead import record_overhead
+from topology_docker_openswitch.cgroup import ResourceSampler
+from topology_docker_openswitch.placement import resource_limits
+from topology_docker_openswitch.admission import get_boot_admission
+from topology_docker_openswitch.workers import WorkerConnections
 
 
 # When a failure happens during boot time, logs and other information is
@@ -50,11 +70,37 @@ from topology_docker_openswitch.shell import (
 # hook later. Non-failing containers will append their log paths here also.
 LOG_PATHS = []
 LOG = getLogger(__name__)
-LOG_HDLR = StreamHandler(stream=stdout)
-LOG_HDLR.setFormatter(Formatter('%(asctime)s %(message)s'))
-LOG_HDLR.setLevel(INFO)
-LOG.addHandler(LOG_HDLR)
-LOG.setLevel(INFO)
+
+# The handler that prints the log to stdout is added when the first node is
+# created, see _setup_logging.
+LOG_HDLR = None
+
+# Binds every OpenSwitch container is created with.
+DEFAULT_BINDS = ('/dev/log:/dev/log', '/sys/fs/cgroup:/sys/fs/cgroup')
+
+# Unix socket paths are limited to 108 characters, longer paths are reached
+# through a symbolic link in a temporary directory.
+_UNIX_PATH_MAX = 100
+
+# OVSDB tables that hold the configuration of the switch, the ones snapshots
+# save by default. The rows of other tables, like Interface, Subsystem or
+# Daemon, are created by the daemons and are left alone.
+SNAPSHOT_TABLES = (
+    'System', 'Bridge', 'VRF', 'Port', 'VLAN', 'Route', 'Nexthop',
+    'BGP_Router', 'BGP_Neighbor', 'Mirror', 'ACL', 'QoS', 'Queue_Profile',
+    'Schedule_Profile'
+)
+
+# OVSDB columns of those tables where the daemons report status or counters.
+# They are not part of the configuration, so snapshots leave them alone. The
+# columns the schema marks as status or statistics are skipped too, this list
+# covers the images whose schema does not.
+SNAPSHOT_SKIP_COLUMNS = (
+    'cur_cfg', 'next_cfg', 'statistics', 'status', 'link_state',
+    'admin_state', 'hw_ready_state', 'lacp_status', 'mac_in_use',
+    'forwarding_state', 'bond_status', 'route_status', 'hw_bond_config',
+    'rstp_statistics'
+)
 
 
 def log_commands(
@@ -94,38 +140,238 @@ def log_commands(
                 )
 
 
+def _linux_distribution(os_release='/etc/os-release'):
+    """
+    Get the name of the Linux distribution of the host.
+
+    ``platform.linux_distribution`` was removed in Python 3.8, the name is
+    read from the ``os-release`` file there.
+
+    :param str os_release: Path of the ``os-release`` file.
+    :rtype: str
+    :return: The name, or an empty string if it is unknown.
+    """
+    linux_distribution = getattr(platform, 'linux_distribution', None)
+    if linux_distribution is not None:
+        return linux_distribution()[0]
+
+    try:
+        with open(os_release) as fd:
+            for line in fd:
+                key, _, value = line.strip().partition('=')
+                if key == 'NAME':
+                    return ''.join(shlex_split(value))
+    except (IOError, OSError):
+        pass
+    return ''
+
+
+def _setup_logging():
+    """
+    Print the log of this module to stdout.
+
+    This is done when the first node is created instead of when this module
+    is imported, so the runs that create no nodes are not affected.
+    """
+    global LOG_HDLR
+
+    if LOG_HDLR is not None:
+        return
+
+    LOG_HDLR = StreamHandler(stream=stdout)
+    LOG_HDLR.setFormatter(Formatter('%(asctime)s %(message)s'))
+    LOG_HDLR.setLevel(INFO)
+    LOG.addHandler(LOG_HDLR)
+    LOG.setLevel(INFO)
+
+
+def _mount_tmpfs(path, size):
+    """
+    Mount a tmpfs filesystem on a directory of the host.
+
+    Mounting requires privileges, if it fails the directory is left as it
+    is.
+
+    :param str path: The directory.
+    :param str size: Size cap of the filesystem, like ``64m``.
+    :rtype: bool
+    :return: True if the filesystem was mounted.
+    """
+    try:
+        check_output([
+            'mount', '-t', 'tmpfs', '-o', 'size={},mode=0777'.format(size),
+            'tmpfs', path
+        ], stderr=STDOUT)
+    except (CalledProcessError, OSError) as error:
+        LOG.warning(
+            'Unable to mount a tmpfs on {}, it is kept on disk: {}'.format(
+                path, error
+            )
+        )
+        return False
+    return True
+
+
+def tmpfs_host_config(tmpfs_logs, create_host_config_kwargs=None):
+    """
+    Add a tmpfs for ``/var/log`` to the host config arguments of a container.
+
+    :param str tmpfs_logs: Size cap of the tmpfs, like ``64m``.
+    :param dict create_host_config_kwargs: Host config arguments of the node,
+     they are not modified.
+    :rtype: dict
+    :return: The arguments for docker-py's ``create_host_config()``.
+    """
+    host_config = dict(create_host_config_kwargs or {})
+    host_config['tmpfs'] = dict(host_config.get('tmpfs', {}))
+    host_config['tmpfs']['/var/log'] = 'size={}'.format(tmpfs_logs)
+    return host_config
+
+
 class OpenSwitchNode(DockerNode):
     """
     Custom OpenSwitch node for the Topology Docker platform engine.
     This custom node loads an OpenSwitch image and has vtysh as default
     shell (in addition to bash).
     See :class:`topology_docker.node.DockerNode`.
+
+    :param ovsdb_tables: Names of the OVSDB tables (or a dictionary that maps
+     table names to lists of columns) to keep replicated in memory once the
+     node has booted. See :meth:`wait_for`.
+    :param int worker_connections: Number of additional docker connections to
+     be used for background commands. See :meth:`send_background_command`.
+    :param bool warm_pool: Take an already booted container from the warm pool
+     started for the container arguments of the node, if there is one with
+     containers ready. See :mod:`topology_docker_openswitch.warmpool`.
+    :param float cpus: CPU quota of the container, in CPUs.
+    :param mem_limit: Memory limit of the container, in bytes or as a string
+     with a unit, like ``512m``.
+    :param str cpuset: CPUs the container may run on, like ``0-3``, or
+     ``auto`` to spread the switches across the CPUs of the host, see
+     :class:`topology_docker_openswitch.placement.CpuPlacement`.
+    :param str tmpfs_logs: Mount ``/var/log`` of the container on a tmpfs of
+     this size, like ``64m``. See :meth:`persist_logs`.
+    :param str tmpfs_shared_dir: Mount a tmpfs of this size on the shared
+     directory of the node in the host, which needs privileges. It is
+     unmounted when the node is stopped.
+
+    Nodes with a tmpfs shared directory do not take containers from the warm
+    pool, it has to be mounted before their container starts.
     """
 
     def __init__(
             self, identifier,
             image='topology/ops:latest', binds=None,
             environment={'container': 'docker'},
-            **kwargs):
+            ovsdb_tables=None, worker_connections=0, warm_pool=True,
+            cpus=None, mem_limit=None, cpuset=None, tmpfs_logs=None,
+            tmpfs_shared_dir=None, **kwargs):
+
+        _setup_logging()
+
+        # A claimed warm container is used instead of creating one, see the
+        # _client property.
+        self._warm_container = None
+        if warm_pool and not tmpfs_shared_dir:
+            pool = get_warm_pool(
+                image=image, binds=binds, environment=environment,
+                tmpfs_logs=tmpfs_logs, **kwargs
+            )
+            if pool is not None:
+                self._warm_container = pool.claim()
 
         # Add binded directories
-        container_binds = [
-            '/dev/log:/dev/log',
-            '/sys/fs/cgroup:/sys/fs/cgroup'
-        ]
+        container_binds = list(DEFAULT_BINDS)
         if binds is not None:
             container_binds.append(binds)
 
+        if tmpfs_logs:
+            kwargs['create_host_config_kwargs'] = tmpfs_host_config(
+                tmpfs_logs, kwargs.pop('create_host_config_kwargs', None)
+            )
+
         super(OpenSwitchNode, self).__init__(
             identifier, image=image, command='/sbin/init',
             binds=';'.join(container_binds), hostname='switch',
-            network_mode='bridge', environment={'container': 'docker'},
+            network_mode='bridge', environment=environment,
             **kwargs
         )
 
+        if self._warm_container is not None:
+            self._use_warm_container()
+
         # FIXME: Remove this attribute to merge with version > 1.6.0
         self.shared_dir_mount = '/tmp'
 
+        self._ovsdb_tables = ovsdb_tables
+        self._ovsdb_replica = None
+        self._ovsdb = None
+        self._ovsdb_link = None
+        self._snapshot = None
+        self._restores = 0
+        self._sampler = None
+        self._tmpfs_logs = tmpfs_logs
+
+        self._workers = WorkerConnections(self, worker_connections)
+
+        # The container is not started yet, so its bind mount will see the
+        # tmpfs.
+        self.shared_dir_tmpfs = bool(tmpfs_shared_dir) and _mount_tmpfs(
+            self._shared_dir, tmpfs_shared_dir
+        )
+
+        self.resource_limits = resource_limits(
+            cpus=cpus, mem_limit=mem_limit, cpuset=cpuset
+        )
+        if self.resource_limits:
+            self._client.update_container(
+                self._container_id, **self.resource_limits
+            )
+
+    @property
+    def _client(self):
+        return self._docker_client
+
+    @_client.setter
+    def _client(self, client):
+        # DockerNode creates its container with the client it sets here. If a
+        # warm container was claimed, it is returned instead of creating one.
+        if self._warm_container is not None and \
+                not isinstance(client, ClaimedContainerClient):
+            client = ClaimedContainerClient(client, self._warm_container)
+        self._docker_client = client
+
+    def _use_warm_container(self):
+        """
+        Finish taking the claimed warm container, once DockerNode has set up
+        the node with it.
+        """
+        container = self._warm_container
+
+        self._docker_client = self._docker_client.client
+        self._container_name = container.name
+
+        # DockerNode created an empty shared directory for a new container.
+        try:
+            rmdir(self._shared_dir)
+        except OSError:
+            pass
+        self._shared_dir = container.shared_dir
+
+    def start(self):
+        """
+        See :meth:`topology_docker.node.DockerNode.start` for more information.
+
+        Containers taken from a warm pool are already running.
+        """
+        if self._warm_container is None:
+            super(OpenSwitchNode, self).start()
+            return
+
+        self._pid = self._client.inspect_container(
+            self._container_id
+        )['State']['Pid']
+
     def _docker_register_connection_types(self):
         """
         See :meth:`DockerNode._docker_register_connection_types`
@@ -133,6 +379,8 @@ class OpenSwitchNode(DockerNode):
         """
         self._register_connection_type('docker', OpenswitchDockerConnection)
         self._register_connection_type('ssh', OpenswitchSSHConnection)
+        self._register_connection_type('rest', OpenswitchRestConnection)
+        self._register_connection_type('replay', OpenswitchReplayConnection)
 
     @property
     def default_connection(self):
@@ -168,7 +416,8 @@ class OpenSwitchNode(DockerNode):
         connection_type = connection_type or self._default_connection_type
 
         if connection_type is "docker":
-            if connection is not None and connection != '0':
+            if connection is not None and connection != '0' and \
+                    not self._is_worker_connection(connection):
                 raise Exception('Only one "console" connection is available.')
 
         super(OpenSwitchNode, self).connect(
@@ -176,14 +425,86 @@ class OpenSwitchNode(DockerNode):
             via_node=via_node, **kwargs
         )
 
+    def get_async_connection(self, connection_type='docker', **kwargs):
+        """
+        Create an asyncio connection to this node.
+
+        The connection is not connected, await its ``connect`` coroutine in an
+        event loop to log in. This requires Python 3.5 or newer.
+
+        See :mod:`topology_docker_openswitch.aio` for more information.
+
+        :param str connection_type: ``docker`` or ``ssh``.
+        """
+        from topology_docker_openswitch.aio import (
+            AsyncOpenswitchDockerConnection, AsyncOpenswitchSSHConnection
+        )
+
+        if connection_type == 'docker':
+            return AsyncOpenswitchDockerConnection(self.container_id, **kwargs)
+        if connection_type == 'ssh':
+            return AsyncOpenswitchSSHConnection(
+                get_container_address(self.container_id), **kwargs
+            )
+        raise Exception(
+            'Unknown asyncio connection type {}.'.format(connection_type)
+        )
+
+    def _is_worker_connection(self, connection):
+        return connection in self._workers
+
+    def send_background_command(self, command, shell='bash', silent=True,
+                                timeout=None):
+        """
+        Send a command through one of the worker connections of the node.
+
+        Worker connections are additional docker connections that are never
+        used as the default connection, so the "console" connection ``'0'``
+        seen by the test keeps its behavior. They are meant to run read only
+        or monitoring commands from other threads without waiting for the
+        commands of the test. Each worker runs one command at a time, this
+        call blocks until a worker is free.
+
+        Worker connections are created the first time they are used, see
+        :class:`topology_docker_openswitch.workers.WorkerConnections`.
+
+        :param str command: Command to send.
+        :param str shell: Name of the shell to use.
+        :param bool silent: Do not log the command and its response.
+        :param int timeout: Seconds to wait for a free worker.
+        :rtype: str
+        :return: The response of the command.
+        """
+        return self._workers.send_command(
+            command, shell=shell, silent=silent, timeout=timeout
+        )
+
     def _register_shells(self, connectionobj):
         """
         See :meth:`CommonNode._register_shells` for more information.
         """
-        connectionobj._register_shell('vtysh', OpenSwitchVtyshShell())
-        connectionobj._register_shell('bash', OpenSwitchBashShell())
-        connectionobj._register_shell('bash_swns', OpenSwitchBashSwnsShell())
-        connectionobj._register_shell('vsctl', OpenSwitchVsctlShell())
+        # REST connections do not have shells.
+        if isinstance(connectionobj, OpenswitchRestConnection):
+            return
+
+        shell_kwargs = {
+            'shared_dir': self.shared_dir,
+            'shared_dir_mount': self.shared_dir_mount
+        }
+
+        # Shells are created and set up the first time they are used.
+        connectionobj._register_shell(
+            'vtysh', LazyShell(OpenSwitchVtyshShell, **shell_kwargs)
+        )
+        connectionobj._register_shell(
+            'bash', LazyShell(OpenSwitchBashShell, **shell_kwargs)
+        )
+        connectionobj._register_shell(
+            'bash_swns', LazyShell(OpenSwitchBashSwnsShell, **shell_kwargs)
+        )
+        connectionobj._register_shell(
+            'vsctl', LazyShell(OpenSwitchVsctlShell, **shell_kwargs)
+        )
 
     def notify_post_build(self):
         """
@@ -191,9 +512,27 @@ class OpenSwitchNode(DockerNode):
         reached.
 
         See :meth:`DockerNode.notify_post_build` for more information.
+
+        If the boot admission is enabled, the system setup waits for a slot,
+        see :mod:`topology_docker_openswitch.admission`.
         """
         super(OpenSwitchNode, self).notify_post_build()
-        self._setup_system()
+
+        admission = get_boot_admission()
+        slot = None
+
+        if admission is not None:
+            start = time()
+            slot = admission.acquire()
+            record_overhead(self.identifier, 'admission', time() - start)
+
+        try:
+            start = time()
+            self._setup_system()
+            record_overhead(self.identifier, 'boot', time() - start)
+        finally:
+            if slot is not None:
+                admission.release(slot)
 
     def _setup_system(self):
         """
@@ -228,6 +567,7 @@ class OpenSwitchNode(DockerNode):
                 'Ubuntu': 'cat /var/log/upstart/docker.log',
                 'CentOS Linux': 'grep docker /var/log/daemon.log',
                 'debian': 'journalctl -u docker.service',
+                'Debian GNU/Linux': 'journalctl -u docker.service',
                 # FIXME: find the right values for the next dictionary keys:
                 # 'boot2docker': 'cat /var/log/docker.log',
                 # 'debian': 'cat /var/log/daemon.log',
@@ -241,7 +581,14 @@ class OpenSwitchNode(DockerNode):
             # log file depends on the Linux distribution. These locations are
             # defined the in "platforms_log_location" dictionary.
 
-            operating_system = system()
+            # The logs are collected and the error raised even if the docker
+            # log file is not found.
+            execution_machine_commands = [
+                'tail -n 2000 /var/log/syslog',
+                'docker ps -a'
+            ]
+
+            operating_system = platform.system()
 
             if operating_system != 'Linux':
                 LOG.warning(
@@ -249,20 +596,22 @@ class OpenSwitchNode(DockerNode):
                         operating_system
                     )
                 )
-                return
-
-            linux_distro = linux_distribution()[0]
-
-            if linux_distro not in platforms_log_location.keys():
-                LOG.warning(
-                    'Unknown Linux distribution {}.'.format(
-                        linux_distro
+            else:
+                linux_distro = _linux_distribution()
+
+                if linux_distro not in platforms_log_location.keys():
+                    LOG.warning(
+                        'Unknown Linux distribution {}.'.format(
+                            linux_distro
+                        )
+                    )
+                else:
+                    execution_machine_commands.append(
+                        '{} | tail -n {}'.format(
+                            platforms_log_location[linux_distro],
+                            lines_to_dump
+                        )
                     )
-                )
-
-            docker_log_command = '{} | tail -n {}'.format(
-                platforms_log_location[linux_distro], lines_to_dump
-            )
 
             container_commands = [
                 'ovs-vsctl list Daemon',
@@ -275,12 +624,6 @@ class OpenSwitchNode(DockerNode):
                 'cat /var/log/messages'
             ]
 
-            execution_machine_commands = [
-                'tail -n 2000 /var/log/syslog',
-                'docker ps -a',
-                docker_log_command
-            ]
-
             log_commands(
                 container_commands,
                 '{}/container_logs'.format(self.shared_dir_mount),
@@ -307,8 +650,243 @@ class OpenSwitchNode(DockerNode):
 
         if hasattr(self, 'ports'):
             self.ports.update(mappings)
+        else:
+            self.ports = mappings
+
+        if self._ovsdb_tables:
+            self._ovsdb_replica = OvsdbReplica(
+                self.get_ovsdb(), self._ovsdb_tables
+            )
+            self._ovsdb_replica.start()
+
+    def get_ovsdb(self, timeout=30):
+        """
+        Get a JSON-RPC client connected to the OVSDB server of the node.
+
+        The OVSDB server of the container is told to listen on an additional
+        unix socket in the shared directory, which makes it reachable from the
+        host. This allows to read and write many rows in a single transaction
+        instead of running one ``ovs-vsctl`` command per operation.
+
+        :param float timeout: Timeout in seconds for socket operations.
+        :rtype: :class:`topology_docker_openswitch.ovsdb.OvsdbClient`
+        """
+        socket_path = join(self.shared_dir, 'db.sock')
+
+        if not exists(socket_path):
+            container_socket = '{}/db.sock'.format(self.shared_dir_mount)
+            self._docker_exec(
+                'ovs-appctl -t ovsdb-server ovsdb-server/add-remote '
+                'punix:{}'.format(container_socket)
+            )
+
+            for i in range(0, 100):
+                if exists(socket_path):
+                    break
+                sleep(0.1)
+            else:
+                raise Exception(
+                    'OVSDB socket {} was not created.'.format(socket_path)
+                )
+
+            # The test process may not be running as root.
+            self._docker_exec('chmod 0777 {}'.format(container_socket))
+
+        # The link is reused by the next clients and removed when the node is
+        # stopped.
+        if len(socket_path) > _UNIX_PATH_MAX:
+            if self._ovsdb_link is None:
+                link_path = join(mkdtemp(prefix='ops'), 'db.sock')
+                symlink(socket_path, link_path)
+                self._ovsdb_link = link_path
+            socket_path = self._ovsdb_link
+
+        return OvsdbClient(path=socket_path, timeout=timeout)
+
+    def wait_for(self, table, predicate, timeout=30):
+        """
+        Wait until a predicate on the rows of an OVSDB table is true.
+
+        The table must be one of the tables passed in the ``ovsdb_tables``
+        argument of the node. The check is done against the in-memory replica
+        every time it is updated, no commands are sent to the node.
+
+        See :meth:`topology_docker_openswitch.ovsdb.OvsdbReplica.wait_for` for
+        more information.
+        """
+        if self._ovsdb_replica is None:
+            raise Exception(
+                'Node {} does not replicate any OVSDB table.'.format(
+                    self.identifier
+                )
+            )
+        return self._ovsdb_replica.wait_for(table, predicate, timeout=timeout)
+
+    def snapshot(self, tables=SNAPSHOT_TABLES,
+                 skip_columns=SNAPSHOT_SKIP_COLUMNS):
+        """
+        Save the current state of the switch so it can be restored later with
+        :meth:`restore`.
+
+        The running configuration of OpenSwitch lives in its OVSDB database,
+        so the state is saved by reading the contents of the database. Taking
+        a snapshot right after the node has booted gives a clean baseline to
+        go back to after each test, instead of building the topology again.
+
+        :param list tables: Names of the OVSDB tables to save, the
+         configuration tables by default. ``None`` saves all of them.
+        :param skip_columns: Names of OVSDB columns that are neither saved nor
+         restored, in addition to the status columns of the schema.
+        :rtype: :class:`topology_docker_openswitch.ovsdb.OvsdbSnapshot`
+        :return: The snapshot. It is also kept by the node as the default one
+         for :meth:`restore`.
+        """
+        self._snapshot = OvsdbSnapshot.take(
+            self._get_ovsdb_client(), tables=tables,
+            skip_columns=skip_columns
+        )
+        return self._snapshot
+
+    def restore(self, snapshot=None):
+        """
+        Bring the switch back to the state saved by :meth:`snapshot`.
+
+        Only the differences between the saved and the current state are sent
+        to the OVSDB server, all of them in a single transaction. The
+        container, its interfaces and the port mapping are not touched.
+
+        :param snapshot: Snapshot to restore, the last one taken by
+         :meth:`snapshot` by default.
+        :type snapshot: :class:`topology_docker_openswitch.ovsdb.OvsdbSnapshot`
+        :rtype: int
+        :return: Number of OVSDB operations needed to restore the state.
+        """
+        if snapshot is None:
+            snapshot = self._snapshot
+
+        if snapshot is None:
+            raise Exception(
+                'Node {} has no snapshot to restore.'.format(self.identifier)
+            )
+
+        operations = snapshot.restore(self._get_ovsdb_client())
+
+        # Restoring does not change System.cur_cfg, the generation of the show
+        # command cache must change anyway.
+        if operations:
+            self._restores += 1
+
+        return operations
+
+    def _get_ovsdb_client(self):
+        """
+        Get the OVSDB client shared by the methods of the node.
+        """
+        if self._ovsdb is None:
+            self._ovsdb = self.get_ovsdb()
+        return self._ovsdb
+
+    def start_resource_sampling(self, interval=1.0, path=None):
+        """
+        Start sampling the CPU, memory and pids usage of the container in a
+        background thread, reading its cgroup files.
+
+        :param float interval: Seconds between samples.
+        :param str path: Path of the JSON file where the samples and their
+         summary are written when the sampling stops. By default
+         ``resources.json`` in the shared directory of the node, so it is
+         collected with the test logs.
+        :rtype: :class:`topology_docker_openswitch.cgroup.ResourceSampler`
+        """
+        self.stop_resource_sampling()
+
+        self._sampler = ResourceSampler(
+            self.container_id, interval=interval,
+            path=path or join(self.shared_dir, 'resources.json')
+        )
+        self._sampler.start()
+        return self._sampler
+
+    def stop_resource_sampling(self):
+        """
+        Stop sampling the resource usage of the container and write the
+        results.
+
+        :rtype: dict
+        :return: The results, see
+         :meth:`topology_docker_openswitch.cgroup.ResourceSampler.results`,
+         or None if the sampling was not started.
+        """
+        if self._sampler is None:
+            return None
+
+        sampler = self._sampler
+        self._sampler = None
+        return sampler.stop()
+
+    def persist_logs(self):
+        """
+        Copy ``/var/log`` of the container to ``var_log`` in the shared
+        directory, if it is on a tmpfs.
+
+        The tmpfs is lost with the container, the plugin calls this when it
+        collects the artifacts of a test.
+        """
+        if not self._tmpfs_logs:
             return
-        self.ports = mappings
+
+        self._docker_exec(
+            'cp -a /var/log {}/var_log'.format(self.shared_dir_mount)
+        )
+
+    def flush_console_logs(self):
+        """
+        Write the console output held in the ring buffers of the connections
+        to their logs, see
+        :meth:`topology_docker_openswitch.connection.OpenswitchDockerConnection.flush_log`.
+        """
+        for connection in self.available_connections():
+            flush_log = getattr(
+                self.get_connection(connection=connection), 'flush_log', None
+            )
+            if flush_log is not None:
+                flush_log()
+
+    def enable_show_cache(self, shell='vtysh'):
+        """
+        Enable the cache of ``show`` command responses of a vtysh shell.
+
+        The cache is invalidated every time the value of ``System.cur_cfg``
+        changes. See
+        :meth:`topology_docker_openswitch.shell.OpenSwitchVtyshShell.enable_cache`
+        for more information.
+
+        :param str shell: Name of the vtysh shell.
+        :rtype: :class:`topology_docker_openswitch.shell.OpenSwitchVtyshShell`
+        :return: The shell, its ``cache_stats`` attribute holds the cache
+         statistics.
+        """
+        shellobj = self.get_shell(shell)
+        shellobj.enable_cache(generation=self._config_generation)
+        return shellobj
+
+    def _config_generation(self):
+        """
+        Get the current value of ``System.cur_cfg``.
+
+        The value is taken from the OVSDB replica if the ``System`` table is
+        replicated, otherwise it is queried through OVSDB. It is paired with
+        the number of snapshot restores, which change the configuration too.
+        """
+        if self._ovsdb_replica is not None and \
+                'System' in self._ovsdb_replica.tables:
+            rows = list(self._ovsdb_replica.rows('System').values())
+        else:
+            rows = self._get_ovsdb_client().select(
+                'System', columns=['cur_cfg']
+            )
+
+        return (self._restores, rows[0]['cur_cfg'] if rows else None)
 
     def set_port_state(self, portlbl, state):
         """
@@ -331,11 +909,38 @@ class OpenSwitchNode(DockerNode):
 
         This method exits and stops the container.
         """
+        self.stop_resource_sampling()
+
+        if self._ovsdb_replica is not None:
+            self._ovsdb_replica.stop()
+            self._ovsdb_replica = None
+        if self._ovsdb is not None:
+            self._ovsdb.close()
+            self._ovsdb = None
+        if self._ovsdb_link is not None:
+            try:
+                remove(self._ovsdb_link)
+                rmdir(dirname(self._ovsdb_link))
+            except OSError:
+                pass
+            self._ovsdb_link = None
+
+        self._workers.disconnect()
 
         for connection in self.available_connections():
-            conn = self.get_connection(connection=connection)
-            conn.disconnect()
+            if not self._is_worker_connection(connection):
+                conn = self.get_connection(connection=connection)
+                conn.disconnect()
+        close_ssh_masters(self.container_id)
         super(OpenSwitchNode, self).stop()
 
+        if self.shared_dir_tmpfs:
+            try:
+                check_output(['umount', self._shared_dir], stderr=STDOUT)
+            except (CalledProcessError, OSError) as error:
+                LOG.warning('Unable to unmount {}: {}'.format(
+                    self._shared_dir, error
+                ))
+
 
-__all__ = ['OpenSwitchNode']
+__all__ = ['OpenSwitchNode', 'tmpfs_host_config']
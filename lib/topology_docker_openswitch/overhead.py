@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Registry of the time spent by the test infrastructure.
+
+The nodes, connections and shells report how long their boot, login, shell
+setup and teardown collection took, and the pytest plugin attributes those
+times to the test that was running.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from threading import Lock
+from collections import OrderedDict
+
+
+# Phases of the overhead, in the order they are reported.
+PHASES = ('admission', 'boot', 'login', 'shell_setup', 'teardown')
+
+
+class OverheadRegistry(object):
+    """
+    Collection of overhead records.
+
+    Every record is the test that was running, the node, the phase and the
+    seconds it took.
+    """
+
+    def __init__(self):
+        self.test = None
+        self.records = []
+        self._lock = Lock()
+
+    def record(self, node, phase, seconds):
+        """
+        Add an overhead record for the current test.
+
+        :param str node: Identifier of the node.
+        :param str phase: One of :data:`PHASES`.
+        :param float seconds: Time spent.
+        """
+        with self._lock:
+            self.records.append((self.test, node, phase, seconds))
+
+    def clear(self):
+        with self._lock:
+            self.test = None
+            del self.records[:]
+
+    def totals(self, test=None):
+        """
+        Add up the time spent in every phase.
+
+        :param str test: Only add the records of this test.
+        :rtype: OrderedDict
+        :return: The seconds of every phase, in the order of :data:`PHASES`.
+        """
+        totals = OrderedDict((phase, 0.0) for phase in PHASES)
+
+        with self._lock:
+            for record_test, node, phase, seconds in self.records:
+                if test is None or record_test == test:
+                    totals[phase] = totals.get(phase, 0.0) + seconds
+
+        return totals
+
+    def slowest(self, key='node', count=5):
+        """
+        Get the nodes or tests with the most overhead.
+
+        :param str key: ``node`` or ``test``.
+        :param int count: Maximum number of results.
+        :rtype: list
+        :return: Pairs of node or test and seconds, slowest first.
+        """
+        index = 1 if key == 'node' else 0
+        sums = {}
+
+        with self._lock:
+            for record in self.records:
+                sums[record[index]] = sums.get(record[index], 0.0) + \
+                    record[3]
+
+        return sorted(
+            sums.items(), key=lambda item: item[1], reverse=True
+        )[:count]
+
+
+OVERHEAD = OverheadRegistry()
+
+
+def record_overhead(node, phase, seconds):
+    """
+    Add an overhead record for the current test to the global registry.
+
+    :param str node: Identifier of the node.
+    :param str phase: One of :data:`PHASES`.
+    :param float seconds: Time spent.
+    """
+    OVERHEAD.record(node, phase, seconds)
+
+
+__all__ = ['PHASES', 'OverheadRegistry', 'OVERHEAD', 'record_overhead']
@@ -0,0 +1,809 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+OVSDB JSON-RPC client for OpenSwitch nodes.
+
+This module implements the subset of the OVSDB management protocol (RFC 7047)
+needed to query and modify the OpenSwitch database directly through its
+socket, without going through ``ovs-vsctl`` or a pexpect terminal.
+
+    https://tools.ietf.org/html/rfc7047
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from json import dumps, JSONDecoder
+from codecs import getincrementaldecoder
+from itertools import count
+from uuid import UUID
+from time import time
+from threading import Thread, Condition
+from socket import socket, timeout as socket_timeout
+from socket import AF_UNIX, AF_INET, SOCK_STREAM
+
+from six import string_types
+
+
+DEFAULT_DATABASE = 'OpenSwitch'
+
+
+class OvsdbError(Exception):
+    """
+    Error returned by the OVSDB server.
+
+    :param error: The error object returned by the server.
+    """
+
+    def __init__(self, error):
+        self.error = error
+
+        if isinstance(error, dict):
+            message = '{}: {}'.format(
+                error.get('error', 'unknown error'),
+                error.get('details', '')
+            )
+        else:
+            message = str(error)
+
+        super(OvsdbError, self).__init__(message)
+
+
+class NamedUuid(object):
+    """
+    Reference to a row inserted in the same transaction.
+
+    :param str name: The ``uuid-name`` of the inserted row.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return 'NamedUuid({!r})'.format(self.name)
+
+
+def encode_datum(value):
+    """
+    Encode a Python value into its OVSDB JSON representation.
+
+    Dictionaries are encoded as maps, lists, tuples and sets as sets,
+    :class:`uuid.UUID` objects as UUIDs and :class:`NamedUuid` objects as
+    named UUIDs. Any other value is considered an atom and left unchanged.
+    """
+    if isinstance(value, dict):
+        return ['map', [
+            [encode_datum(key), encode_datum(val)]
+            for key, val in value.items()
+        ]]
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return ['set', [encode_datum(element) for element in value]]
+    if isinstance(value, UUID):
+        return ['uuid', str(value)]
+    if isinstance(value, NamedUuid):
+        return ['named-uuid', value.name]
+    return value
+
+
+def decode_datum(value):
+    """
+    Decode an OVSDB JSON value into a Python value.
+
+    This is the reverse of :func:`encode_datum`. Sets are decoded as lists
+    since their elements are not always hashable.
+    """
+    if isinstance(value, list) and len(value) == 2 and \
+            isinstance(value[0], string_types):
+        kind, content = value
+
+        if kind == 'uuid':
+            return UUID(content)
+        if kind == 'named-uuid':
+            return NamedUuid(content)
+        if kind == 'set':
+            return [decode_datum(element) for element in content]
+        if kind == 'map':
+            return dict(
+                (decode_datum(key), decode_datum(val))
+                for key, val in content
+            )
+    return value
+
+
+def decode_row(row):
+    """
+    Decode all the columns of a row returned by the OVSDB server.
+
+    :param dict row: Row as returned by the server.
+    :rtype: dict
+    """
+    return dict(
+        (column, decode_datum(value)) for column, value in row.items()
+    )
+
+
+def encode_where(where):
+    """
+    Encode a list of ``(column, function, value)`` conditions.
+    """
+    return [
+        [column, function, encode_datum(value)]
+        for column, function, value in (where or [])
+    ]
+
+
+class Transaction(object):
+    """
+    Builder of a multi operation OVSDB transaction.
+
+    Operations are accumulated by calling the methods of this object and are
+    sent to the server in one single ``transact`` request by calling
+    :meth:`commit`.
+
+    :param client: The client that will commit the transaction.
+    :type client: :class:`OvsdbClient`
+    :param str database: Database name.
+    """
+
+    def __init__(self, client, database=DEFAULT_DATABASE):
+        self._client = client
+        self._database = database
+        self._operations = []
+        self._names = count()
+
+    @property
+    def operations(self):
+        return list(self._operations)
+
+    def add(self, operation):
+        """
+        Add a raw OVSDB operation.
+
+        :param dict operation: Operation as defined in RFC 7047, already
+         encoded.
+        :rtype: int
+        :return: Index of the operation result in the list returned by
+         :meth:`commit`.
+        """
+        self._operations.append(operation)
+        return len(self._operations) - 1
+
+    def select(self, table, where=None, columns=None):
+        operation = {
+            'op': 'select', 'table': table, 'where': encode_where(where)
+        }
+        if columns is not None:
+            operation['columns'] = list(columns)
+        return self.add(operation)
+
+    def insert(self, table, row, name=None):
+        """
+        Insert a row.
+
+        :rtype: :class:`NamedUuid`
+        :return: A reference to the new row that can be used as a value in
+         other operations of this same transaction.
+        """
+        name = name or 'row{}'.format(next(self._names))
+        self.add({
+            'op': 'insert', 'table': table, 'row': self._encode_row(row),
+            'uuid-name': name
+        })
+        return NamedUuid(name)
+
+    def update(self, table, row, where=None):
+        return self.add({
+            'op': 'update', 'table': table, 'where': encode_where(where),
+            'row': self._encode_row(row)
+        })
+
+    def mutate(self, table, mutations, where=None):
+        """
+        Mutate rows.
+
+        :param list mutations: List of ``(column, mutator, value)`` tuples.
+        """
+        return self.add({
+            'op': 'mutate', 'table': table, 'where': encode_where(where),
+            'mutations': [
+                [column, mutator, encode_datum(value)]
+                for column, mutator, value in mutations
+            ]
+        })
+
+    def delete(self, table, where=None):
+        return self.add({
+            'op': 'delete', 'table': table, 'where': encode_where(where)
+        })
+
+    def wait(self, table, rows, columns, where=None, until='==',
+             timeout=0):
+        return self.add({
+            'op': 'wait', 'table': table, 'where': encode_where(where),
+            'columns': list(columns), 'until': until,
+            'rows': [self._encode_row(row) for row in rows],
+            'timeout': timeout
+        })
+
+    def comment(self, comment):
+        return self.add({'op': 'comment', 'comment': comment})
+
+    def commit(self):
+        """
+        Send all the operations to the server in one transaction.
+
+        :rtype: list
+        :return: The result of every operation, in the same order they were
+         added. Rows of ``select`` results are decoded with
+         :func:`decode_row` and ``insert`` UUIDs are returned as
+         :class:`uuid.UUID` objects.
+        """
+        return self._client.transact(
+            self._operations, database=self._database
+        )
+
+    @staticmethod
+    def _encode_row(row):
+        return dict(
+            (column, encode_datum(value)) for column, value in row.items()
+        )
+
+
+class OvsdbClient(object):
+    """
+    OVSDB JSON-RPC client.
+
+    The client connects either to a unix socket, if ``path`` is given, or to a
+    TCP address.
+
+    :param str path: Path of the unix socket of the OVSDB server.
+    :param tuple address: ``(host, port)`` tuple of an OVSDB TCP remote.
+    :param float timeout: Timeout in seconds for socket operations.
+    """
+
+    def __init__(self, path=None, address=None, timeout=30):
+        if (path is None) == (address is None):
+            raise Exception('Exactly one of path or address must be given.')
+
+        self._ids = count()
+        self._buffer = ''
+        self._decoder = JSONDecoder()
+        self._utf8 = getincrementaldecoder('utf-8')()
+        self._notification_handlers = []
+
+        if path is not None:
+            self._socket = socket(AF_UNIX, SOCK_STREAM)
+            target = path
+        else:
+            self._socket = socket(AF_INET, SOCK_STREAM)
+            target = address
+
+        self._socket.settimeout(timeout)
+        self._socket.connect(target)
+
+    def close(self):
+        self._socket.close()
+
+    def settimeout(self, timeout):
+        self._socket.settimeout(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def add_notification_handler(self, handler):
+        """
+        Register a callable to be called with the method and params of every
+        notification (like ``update``) received from the server.
+        """
+        self._notification_handlers.append(handler)
+
+    def send(self, message):
+        self._socket.sendall(dumps(message).encode('utf-8'))
+
+    def receive(self):
+        """
+        Receive the next JSON-RPC message from the server.
+
+        Echo requests from the server are answered here, notifications are
+        dispatched to the registered handlers and returned as well.
+
+        :rtype: dict
+        """
+        while True:
+            message = self._decode_buffered()
+
+            if message is None:
+                data = self._socket.recv(65536)
+                if not data:
+                    raise Exception('OVSDB server closed the connection.')
+                self._buffer += self._utf8.decode(data)
+                continue
+
+            method = message.get('method', None)
+
+            if method == 'echo':
+                self.send({
+                    'id': message['id'], 'result': message['params'],
+                    'error': None
+                })
+                continue
+
+            if method is not None and message.get('id', None) is None:
+                for handler in self._notification_handlers:
+                    handler(method, message['params'])
+
+            return message
+
+    def call(self, method, params):
+        """
+        Send a JSON-RPC request and wait for its response.
+
+        :rtype: The ``result`` of the response.
+        """
+        request_id = next(self._ids)
+        self.send({'method': method, 'params': params, 'id': request_id})
+
+        while True:
+            message = self.receive()
+
+            if message.get('id', None) != request_id or \
+                    'method' in message:
+                continue
+
+            if message.get('error', None) is not None:
+                raise OvsdbError(message['error'])
+
+            return message['result']
+
+    def list_dbs(self):
+        return self.call('list_dbs', [])
+
+    def get_schema(self, database=DEFAULT_DATABASE):
+        return self.call('get_schema', [database])
+
+    def transaction(self, database=DEFAULT_DATABASE):
+        """
+        Create a new multi operation transaction.
+
+        :rtype: :class:`Transaction`
+        """
+        return Transaction(self, database=database)
+
+    def transact(self, operations, database=DEFAULT_DATABASE):
+        """
+        Execute a list of already encoded operations in one transaction.
+
+        See :meth:`Transaction.commit` for the format of the return value.
+        """
+        results = self.call('transact', [database] + list(operations))
+
+        for result in results:
+            if result is not None and 'error' in result:
+                raise OvsdbError(result)
+
+        return [self._decode_result(result) for result in results]
+
+    def select(self, table, where=None, columns=None,
+               database=DEFAULT_DATABASE):
+        """
+        Select rows from a table.
+
+        :rtype: list
+        :return: The decoded rows.
+        """
+        transaction = self.transaction(database=database)
+        transaction.select(table, where=where, columns=columns)
+        return transaction.commit()[0]['rows']
+
+    def _decode_buffered(self):
+        buffered = self._buffer.lstrip()
+
+        if not buffered:
+            self._buffer = ''
+            return None
+
+        try:
+            message, end = self._decoder.raw_decode(buffered)
+        except ValueError:
+            # The message is not complete yet.
+            return None
+
+        self._buffer = buffered[end:]
+        return message
+
+    @staticmethod
+    def _decode_result(result):
+        if result is None:
+            return result
+        if 'rows' in result:
+            result = dict(result)
+            result['rows'] = [decode_row(row) for row in result['rows']]
+        if 'uuid' in result:
+            result = dict(result)
+            result['uuid'] = decode_datum(result['uuid'])
+        return result
+
+
+class OvsdbReplica(object):
+    """
+    Local in-memory replica of some tables of an OVSDB database.
+
+    The replica sends an OVSDB ``monitor`` request and keeps its tables
+    updated in a background thread with the notifications sent by the server.
+    Code that needs to wait for some state of the database can use
+    :meth:`wait_for`, which wakes up on every update instead of polling.
+
+    :param client: A client dedicated to this replica. It must not be used for
+     anything else while the replica is running.
+    :type client: :class:`OvsdbClient`
+    :param tables: Names of the tables to replicate, or a dictionary that maps
+     table names to the list of columns to replicate.
+    :param str database: Database name.
+    """
+
+    def __init__(self, client, tables, database=DEFAULT_DATABASE):
+        if not isinstance(tables, dict):
+            tables = dict((table, None) for table in tables)
+
+        self._client = client
+        self._database = database
+        self._monitor_requests = dict(
+            (table, {} if columns is None else {'columns': list(columns)})
+            for table, columns in tables.items()
+        )
+        self._tables = dict((table, {}) for table in tables)
+        self._condition = Condition()
+        self._running = False
+        self._thread = None
+        self._monitor_id = 'replica{}'.format(id(self))
+
+        client.add_notification_handler(self._handle_notification)
+
+    def start(self):
+        """
+        Load the current contents of the tables and start following their
+        updates.
+        """
+        updates = self._client.call(
+            'monitor',
+            [self._database, self._monitor_id, self._monitor_requests]
+        )
+        self._apply(updates)
+
+        # A short timeout allows the thread to notice when it is stopped.
+        self._client.settimeout(0.5)
+
+        self._running = True
+        self._thread = Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop following updates and close the client.
+        """
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._client.close()
+
+    @property
+    def tables(self):
+        return list(self._tables.keys())
+
+    def rows(self, table):
+        """
+        Get a copy of the current rows of a table.
+
+        :param str table: Table name.
+        :rtype: dict
+        :return: A dictionary that maps row UUIDs to decoded rows.
+        """
+        with self._condition:
+            return dict(self._tables[table])
+
+    def wait_for(self, table, predicate, timeout=30):
+        """
+        Wait until a predicate on the rows of a table is true.
+
+        :param str table: Table name.
+        :param predicate: Callable that receives the list of current rows of
+         the table and returns a true value when the expected state is
+         reached.
+        :param float timeout: Maximum number of seconds to wait.
+        :return: The value returned by the predicate.
+        """
+        deadline = time() + timeout
+
+        with self._condition:
+            while True:
+                result = predicate(list(self._tables[table].values()))
+                if result:
+                    return result
+
+                remaining = deadline - time()
+                if remaining <= 0:
+                    raise Exception(
+                        'Condition on table {} was not met after {} '
+                        'seconds.'.format(table, timeout)
+                    )
+                if not self._running:
+                    raise Exception(
+                        'Replica of table {} is not running.'.format(table)
+                    )
+                self._condition.wait(remaining)
+
+    def _run(self):
+        while self._running:
+            try:
+                self._client.receive()
+            except socket_timeout:
+                continue
+            except Exception:
+                with self._condition:
+                    self._running = False
+                    self._condition.notify_all()
+                raise
+
+    def _handle_notification(self, method, params):
+        if method == 'update' and params[0] == self._monitor_id:
+            self._apply(params[1])
+
+    def _apply(self, updates):
+        with self._condition:
+            for table, rows in updates.items():
+                table_rows = self._tables[table]
+
+                for uuid, row_update in rows.items():
+                    new = row_update.get('new', None)
+
+                    if new is None:
+                        table_rows.pop(uuid, None)
+                    else:
+                        table_rows[uuid] = decode_row(new)
+
+            self._condition.notify_all()
+
+
+class OvsdbSnapshot(object):
+    """
+    Copy of the contents of some tables of an OVSDB database that can be
+    restored later.
+
+    Snapshots are taken with :meth:`take`. :meth:`restore` compares the saved
+    contents with the current ones and sends only the differences, in one
+    single transaction: rows that were added are deleted, rows that were
+    deleted are inserted again and changed columns are updated. Rows keep
+    their UUIDs unless they had to be inserted again, references to those rows
+    are updated accordingly.
+
+    :param str database: Database name.
+    :param dict tables: Dictionary that maps table names to dictionaries that
+     map row UUIDs to decoded rows.
+    :param dict mutable: Dictionary that maps table names to the set of
+     columns that can be updated.
+    """
+
+    def __init__(self, database, tables, mutable):
+        self._database = database
+        self._tables = tables
+        self._mutable = mutable
+
+    @classmethod
+    def take(cls, client, tables=None, skip_columns=(),
+             database=DEFAULT_DATABASE):
+        """
+        Take a snapshot of the current contents of a database.
+
+        :param client: Client to read the database with.
+        :type client: :class:`OvsdbClient`
+        Ephemeral columns, and the columns the schema puts in the ``status``
+        or ``statistics`` categories, are never saved: the daemons write them,
+        they are not part of the configuration.
+
+        :param list tables: Names of the tables to save, all the tables of the
+         database by default. Tables that are not in the database are ignored,
+         so the same list can be used with different versions of the schema.
+        :param skip_columns: Names of other columns that are neither saved nor
+         restored in any table.
+        :param str database: Database name.
+        :rtype: :class:`OvsdbSnapshot`
+        """
+        schema = client.get_schema(database=database)['tables']
+        names = sorted(schema) if tables is None else [
+            name for name in tables if name in schema
+        ]
+        skip = set(skip_columns)
+
+        columns = dict(
+            (name, set(
+                column
+                for column, definition in schema[name]['columns'].items()
+                if column not in skip and not _is_status(definition)
+            ))
+            for name in names
+        )
+        mutable = dict(
+            (name, set(
+                column for column in columns[name]
+                if schema[name]['columns'][column].get('mutable', True)
+            ))
+            for name in names
+        )
+
+        current = cls._select_all(client, names, database)
+        saved = dict(
+            (name, dict(
+                (uuid, dict(
+                    (column, value) for column, value in row.items()
+                    if column in columns[name]
+                ))
+                for uuid, row in current[name].items()
+            ))
+            for name in names
+        )
+
+        return cls(database, saved, mutable)
+
+    @property
+    def tables(self):
+        return list(self._tables.keys())
+
+    def rows(self, table):
+        """
+        Get the saved rows of a table.
+
+        :param str table: Table name.
+        :rtype: dict
+        :return: A dictionary that maps row UUIDs to decoded rows.
+        """
+        return dict(self._tables[table])
+
+    def restore(self, client):
+        """
+        Bring the database back to the contents of the snapshot.
+
+        :param client: Client to modify the database with.
+        :type client: :class:`OvsdbClient`
+        :rtype: int
+        :return: Number of operations needed to restore the snapshot, zero if
+         the database was not modified.
+        """
+        current = self._select_all(client, self._tables, self._database)
+        transaction = client.transaction(database=self._database)
+
+        names = {}
+        for table, rows in self._tables.items():
+            for uuid in rows:
+                if uuid not in current[table]:
+                    names[uuid] = NamedUuid('restore{}'.format(len(names)))
+
+        inserts = {}
+        for table, rows in self._tables.items():
+            current_rows = current[table]
+
+            for uuid, row in rows.items():
+                row = _replace_uuids(row, names)
+
+                if uuid in names:
+                    transaction.insert(table, row, name=names[uuid].name)
+                    inserts[uuid] = len(transaction.operations) - 1
+                    continue
+
+                changed = dict(
+                    (column, value) for column, value in row.items()
+                    if column in self._mutable[table] and
+                    _canonical(value) !=
+                    _canonical(current_rows[uuid].get(column, None))
+                )
+                if changed:
+                    transaction.update(
+                        table, changed, where=[('_uuid', '==', uuid)]
+                    )
+
+            for uuid in current_rows:
+                if uuid not in rows:
+                    transaction.delete(table, where=[('_uuid', '==', uuid)])
+
+        if not transaction.operations:
+            return 0
+
+        results = transaction.commit()
+
+        # Rows inserted again got new UUIDs, the snapshot is updated so it can
+        # be restored again without inserting them once more.
+        if inserts:
+            new_uuids = dict(
+                (uuid, results[index]['uuid'])
+                for uuid, index in inserts.items()
+            )
+            self._tables = dict(
+                (table, dict(
+                    (new_uuids.get(uuid, uuid), _replace_uuids(row, new_uuids))
+                    for uuid, row in rows.items()
+                ))
+                for table, rows in self._tables.items()
+            )
+
+        return len(transaction.operations)
+
+    @staticmethod
+    def _select_all(client, tables, database):
+        transaction = client.transaction(database=database)
+        for table in tables:
+            transaction.select(table)
+        results = transaction.commit()
+
+        return dict(
+            (table, dict((row['_uuid'], row) for row in result['rows']))
+            for table, result in zip(tables, results)
+        )
+
+
+def _is_status(definition):
+    """
+    Tell if a column, given its schema definition, holds data written by the
+    daemons instead of configuration.
+    """
+    return definition.get('ephemeral', False) or \
+        definition.get('category', None) in ('status', 'statistics')
+
+
+def _replace_uuids(value, replacements):
+    """
+    Replace the UUIDs found in a decoded value.
+
+    :param dict replacements: Dictionary that maps the UUIDs to replace to
+     their replacements.
+    """
+    if isinstance(value, dict):
+        return dict(
+            (_replace_uuids(key, replacements),
+             _replace_uuids(val, replacements))
+            for key, val in value.items()
+        )
+    if isinstance(value, list):
+        return [_replace_uuids(element, replacements) for element in value]
+    if isinstance(value, UUID):
+        return replacements.get(value, value)
+    return value
+
+
+def _canonical(value):
+    """
+    Get a representation of a decoded value that does not depend on the order
+    of the elements of its sets and maps, so values can be compared.
+    """
+    if isinstance(value, dict):
+        return sorted(
+            ((_canonical(key), _canonical(val)) for key, val in value.items()),
+            key=repr
+        )
+    if isinstance(value, list):
+        return sorted((_canonical(element) for element in value), key=repr)
+    return value
+
+
+__all__ = [
+    'OvsdbError', 'NamedUuid', 'Transaction', 'OvsdbClient', 'OvsdbReplica',
+    'OvsdbSnapshot', 'encode_datum', 'decode_datum'
+]
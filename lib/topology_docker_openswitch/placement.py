@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+CPU and memory limits of the OpenSwitch containers.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from math import ceil
+from fcntl import flock, LOCK_EX, LOCK_UN
+from os import getuid
+from os.path import join
+from tempfile import gettempdir
+from threading import Lock
+from multiprocessing import cpu_count
+
+
+# CFS period used for the CPU quotas, in microseconds.
+CPU_PERIOD = 100000
+
+# The automatic placement keeps the next CPU in this file, so the processes
+# of the host (like the workers of pytest-xdist) spread their switches
+# together instead of starting all at the same CPU.
+PLACEMENT_PATH = join(gettempdir(), 'ops-cpus-{}'.format(getuid()))
+
+
+def host_cpus():
+    """
+    Get the CPUs this process may run on.
+
+    :rtype: list
+    """
+    try:
+        from os import sched_getaffinity
+        return sorted(sched_getaffinity(0))
+    except ImportError:
+        return list(range(cpu_count()))
+
+
+class CpuPlacement(object):
+    """
+    Round robin assignment of CPUs to containers.
+
+    Every container gets the next CPUs of the list, wrapping around when they
+    run out, so switches are spread evenly across the cores. When there are
+    more than two CPUs the first one is left for the test process that drives
+    the switches.
+
+    :param list cpus: The CPUs to assign, all the CPUs this process may run on
+     by default.
+    :param str path: File where the position of the next CPU is kept, shared
+     with the other placements, in any process, that use the same file. It
+     is kept in memory by default.
+    """
+
+    def __init__(self, cpus=None, path=None):
+        cpus = list(cpus) if cpus is not None else host_cpus()
+        self.cpus = cpus[1:] if len(cpus) > 2 else cpus
+        self.path = path
+        self._next = 0
+        self._lock = Lock()
+
+    def _advance(self, count):
+        """
+        Move the position of the next CPU.
+
+        :param int count: Number of CPUs allocated.
+        :rtype: int
+        :return: The position before moving it.
+        """
+        if self.path is None:
+            position = self._next
+            self._next = (position + count) % len(self.cpus)
+            return position
+
+        with open(self.path, 'a+') as fd:
+            flock(fd, LOCK_EX)
+            try:
+                fd.seek(0)
+                try:
+                    position = int(fd.read() or 0) % len(self.cpus)
+                except ValueError:
+                    position = 0
+
+                fd.seek(0)
+                fd.truncate()
+                fd.write(str((position + count) % len(self.cpus)))
+                fd.flush()
+            finally:
+                flock(fd, LOCK_UN)
+
+        return position
+
+    def allocate(self, count=1):
+        """
+        Get the next CPUs.
+
+        :param int count: Number of CPUs, limited to the number available.
+        :rtype: str
+        :return: The CPUs in the ``cpuset`` format, like ``2,3``.
+        """
+        count = max(1, min(count, len(self.cpus)))
+
+        with self._lock:
+            position = self._advance(count)
+
+        allocated = [
+            self.cpus[(position + index) % len(self.cpus)]
+            for index in range(count)
+        ]
+
+        return ','.join(str(cpu) for cpu in sorted(allocated))
+
+
+_PLACEMENT = {}
+_PLACEMENT_LOCK = Lock()
+
+
+def auto_cpuset(cpus=None):
+    """
+    Get the cpuset of a container in the automatic placement mode.
+
+    The position of the next CPU is shared by the processes of the host
+    through :data:`PLACEMENT_PATH`.
+
+    :param float cpus: CPU quota of the container, it gets as many CPUs as
+     needed to use it. One CPU if it is not given.
+    :rtype: str
+    """
+    with _PLACEMENT_LOCK:
+        if 'placement' not in _PLACEMENT:
+            _PLACEMENT['placement'] = CpuPlacement(path=PLACEMENT_PATH)
+        placement = _PLACEMENT['placement']
+
+    return placement.allocate(int(ceil(cpus)) if cpus else 1)
+
+
+def resource_limits(cpus=None, mem_limit=None, cpuset=None):
+    """
+    Get the container update arguments that apply some resource limits.
+
+    :param float cpus: CPU quota, in CPUs.
+    :param mem_limit: Memory limit, in bytes or as a string with a unit, like
+     ``512m``.
+    :param str cpuset: CPUs the container may run on, like ``0-3``, or
+     ``auto`` to get them from the automatic placement.
+    :rtype: dict
+    :return: Keyword arguments for the ``update_container`` method of the
+     docker client, empty if there are no limits.
+    """
+    limits = {}
+
+    if cpus:
+        cpus = float(cpus)
+        limits['cpu_period'] = CPU_PERIOD
+        limits['cpu_quota'] = int(cpus * CPU_PERIOD)
+
+    if mem_limit:
+        limits['mem_limit'] = mem_limit
+
+    if cpuset == 'auto':
+        cpuset = auto_cpuset(cpus)
+    if cpuset:
+        limits['cpuset_cpus'] = str(cpuset)
+
+    return limits
+
+
+__all__ = [
+    'PLACEMENT_PATH', 'CpuPlacement', 'auto_cpuset', 'resource_limits',
+    'host_cpus'
+]
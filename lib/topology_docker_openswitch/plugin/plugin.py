@@ -15,12 +15,351 @@
 # specific language governing permissions and limitations
 # under the License.
 
+from sys import modules
+from os import environ
 from os.path import exists, basename, splitext, join
 from shutil import copytree, Error, rmtree
 from logging import warning
 from datetime import datetime
+from time import time
 
-from topology_docker_openswitch.openswitch import log_commands
+from pytest import hookimpl
+
+from topology_docker_openswitch.cgroup import host_memory
+from topology_docker_openswitch.plugin.reuse import TopologyPool, topology_key
+from topology_docker_openswitch.warmpool import (
+    start_warm_pool, stop_warm_pools
+)
+from topology_docker_openswitch.tracing import (
+    enable_tracing, export_chrome_trace
+)
+from topology_docker_openswitch.overhead import (
+    OVERHEAD, PHASES, record_overhead
+)
+from topology_docker_openswitch.admission import (
+    enable_boot_admission, disable_boot_admission
+)
+
+
+# Base directory of the artifacts collected after every test.
+ARTIFACTS_DIR = '/tmp/topology/docker'
+
+
+# Number of nodes and tests listed in the overhead summary.
+SLOWEST_COUNT = 5
+
+
+def pytest_addoption(parser):
+    """
+    Pytest hook to add the options of this plugin.
+    """
+    group = parser.getgroup('topology_docker_openswitch')
+    group.addoption(
+        '--topology-reuse',
+        action='store_true',
+        default=False,
+        help='Keep built topologies after their module finishes and reuse '
+             'them in modules with an identical topology'
+    )
+    group.addoption(
+        '--topology-reuse-memory',
+        type=int,
+        default=None,
+        help='Memory in MiB the reused topologies may use before idle ones '
+             'are unbuilt, half of the host memory by default'
+    )
+    group.addoption(
+        '--openswitch-warm-pool',
+        type=int,
+        default=0,
+        metavar='SIZE',
+        help='Number of booted OpenSwitch containers to keep ready for new '
+             'nodes'
+    )
+    group.addoption(
+        '--openswitch-warm-pool-image',
+        default='topology/ops:latest',
+        help='Image of the containers of the warm pool'
+    )
+    group.addoption(
+        '--openswitch-boot-slots',
+        default=None,
+        metavar='SLOTS',
+        help='Number of OpenSwitch nodes of the host that may be set up at '
+             'the same time by all the test processes, "auto" to compute it '
+             'from the CPUs and memory of the host or 0 to not limit them. '
+             'It is "auto" for pytest-xdist workers and 0 otherwise'
+    )
+    group.addoption(
+        '--openswitch-artifacts',
+        choices=['always', 'failed'],
+        default='always',
+        help='Collect the logs and shared directories of the OpenSwitch '
+             'nodes after every test, or only after failed tests'
+    )
+    group.addoption(
+        '--openswitch-sample-resources',
+        type=float,
+        default=None,
+        metavar='INTERVAL',
+        help='Sample the CPU, memory and pids usage of the OpenSwitch '
+             'containers every INTERVAL seconds while the tests run'
+    )
+    group.addoption(
+        '--openswitch-trace',
+        default=None,
+        metavar='PATH',
+        help='Trace the sendline and expect operations of the OpenSwitch '
+             'connections and write them to PATH as a Chrome trace'
+    )
+
+
+def pytest_configure(config):
+    """
+    Pytest hook to enable tracing, start the warm pool and create the
+    topology pool, if they are enabled.
+    """
+    config._openswitch_start = time()
+
+    boot_slots = config.getoption('--openswitch-boot-slots')
+    if boot_slots is None and 'PYTEST_XDIST_WORKER' in environ:
+        boot_slots = 'auto'
+    if boot_slots not in (None, '0'):
+        enable_boot_admission(
+            slots=None if boot_slots == 'auto' else int(boot_slots)
+        )
+
+    if config.getoption('--openswitch-trace'):
+        enable_tracing()
+
+    warm_pool_size = config.getoption('--openswitch-warm-pool')
+    if warm_pool_size:
+        start_warm_pool(
+            image=config.getoption('--openswitch-warm-pool-image'),
+            size=warm_pool_size
+        )
+
+    config._topology_pool = None
+
+    if not config.getoption('--topology-reuse'):
+        return
+
+    budget = config.getoption('--topology-reuse-memory')
+    if budget is not None:
+        budget = budget * 1024 * 1024
+    else:
+        total = host_memory()
+        budget = total // 2 if total is not None else None
+
+    config._topology_pool = TopologyPool(memory_budget=budget)
+    config.pluginmanager.register(
+        TopologyReuse(config._topology_pool),
+        'topology_docker_openswitch_reuse'
+    )
+
+
+def pytest_unconfigure(config):
+    """
+    Pytest hook to remove the containers left in the warm pools and write the
+    trace.
+    """
+    stop_warm_pools()
+    disable_boot_admission()
+
+    trace_path = config.getoption('--openswitch-trace')
+    if trace_path:
+        enable_tracing(False)
+        export_chrome_trace(trace_path)
+
+
+@hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    """
+    Pytest hook to attribute the overhead to the test that is starting.
+    """
+    OVERHEAD.test = item.nodeid
+
+
+@hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """
+    Pytest hook to add the overhead of a test to its JUnit XML properties
+    once its teardown is done, and to remember if the test failed.
+    """
+    if call.when == 'teardown':
+        for phase, seconds in OVERHEAD.totals(test=item.nodeid).items():
+            if seconds:
+                item.user_properties.append(
+                    ('openswitch_{}'.format(phase), '{:.3f}'.format(seconds))
+                )
+
+    outcome = yield
+
+    if outcome.get_result().failed:
+        item._openswitch_failed = True
+
+
+@hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """
+    Pytest hook to sample the resource usage of the OpenSwitch containers
+    while a test runs, if it is enabled.
+
+    The results are written to the shared directory of every node, which is
+    collected with the test logs.
+    """
+    interval = item.config.getoption('--openswitch-sample-resources')
+    topology = item.funcargs.get('topology', None) if interval else None
+    nodes = []
+
+    if topology is not None and topology.engine == 'docker':
+        nodes = [
+            topology.get(node) for node in topology.nodes
+            if topology.get(node).metadata.get('type', None) == 'openswitch'
+        ]
+
+    for node in nodes:
+        node.start_resource_sampling(interval=interval)
+
+    yield
+
+    for node in nodes:
+        try:
+            node.stop_resource_sampling()
+        except Exception as error:
+            warning(
+                'Unable to write the resource usage of node {}: {}'.format(
+                    node.identifier, error
+                )
+            )
+
+
+def pytest_terminal_summary(terminalreporter):
+    """
+    Pytest hook to show the time spent booting nodes, logging in, setting up
+    shells and collecting logs, with the nodes and tests that spent the most.
+    """
+    if not OVERHEAD.records:
+        return
+
+    config = terminalreporter.config
+    elapsed = time() - getattr(config, '_openswitch_start', time())
+    totals = OVERHEAD.totals()
+    overhead = sum(totals.values())
+
+    write_line = terminalreporter.write_line
+    terminalreporter.write_sep('=', 'OpenSwitch overhead')
+
+    for phase in PHASES:
+        write_line('{:<12} {:>10.2f} s'.format(phase, totals[phase]))
+    write_line('{:<12} {:>10.2f} s ({:.0%} of {:.2f} s)'.format(
+        'total', overhead, overhead / elapsed if elapsed else 0, elapsed
+    ))
+
+    for key in ['node', 'test']:
+        write_line('')
+        write_line('Slowest {}s:'.format(key))
+        for name, seconds in OVERHEAD.slowest(key, count=SLOWEST_COUNT):
+            write_line('{:>10.2f} s  {}'.format(seconds, name))
+
+
+def _pooled_topology_key(request):
+    """
+    Get the pool key of the topology of the module of a fixture request, or
+    None if the topology cannot be pooled.
+    """
+    description = getattr(request.module, 'TOPOLOGY', None)
+    if description is None:
+        return None
+
+    config = request.config
+    plugin = getattr(config, '_topology_plugin', None)
+    platform = getattr(plugin, 'platform', None) or config.getoption(
+        '--topology-platform', default=None
+    )
+    if platform != 'docker':
+        return None
+
+    return topology_key(
+        description, platform,
+        inject=getattr(plugin, 'injected_attr', None)
+    )
+
+
+class TopologyReuse(object):
+    """
+    Plugin that hands out pooled topologies, registered when topology reuse
+    is enabled.
+
+    :param pool: The topology pool.
+    :type pool: :class:`topology_docker_openswitch.plugin.reuse.TopologyPool`
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    @hookimpl(tryfirst=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        """
+        Pytest hook to use an idle topology identical to the one of the module
+        as the value of the ``topology`` fixture, instead of building a new
+        one.
+        """
+        if fixturedef.argname != 'topology':
+            return None
+
+        key = _pooled_topology_key(request)
+        if key is None:
+            return None
+
+        manager = self.pool.acquire(key)
+        if manager is None:
+            return None
+
+        if hasattr(fixturedef, 'cache_key'):
+            cache_key = fixturedef.cache_key(request)
+        else:
+            cache_key = getattr(request, 'param_index', 0)
+
+        fixturedef.cached_result = (manager, cache_key, None)
+        fixturedef.addfinalizer(lambda: self.pool.release(manager))
+        return manager
+
+    def pytest_sessionfinish(self, session):
+        """
+        Pytest hook to unbuild the topologies left in the pool.
+        """
+        self.pool.clear()
+
+
+@hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    """
+    Pytest hook to add newly built topologies to the pool.
+    """
+    outcome = yield
+
+    pool = getattr(request.config, '_topology_pool', None)
+    if pool is None or fixturedef.argname != 'topology' or \
+            outcome.excinfo is not None:
+        return
+
+    manager = outcome.get_result()
+    if manager is None or pool.contains(manager):
+        return
+
+    key = _pooled_topology_key(request)
+    if key is not None and manager.is_built():
+        pool.adopt(key, manager)
+
+
+def _artifacts_dir():
+    """
+    Get the directory of the artifacts of this process, every pytest-xdist
+    worker has its own.
+    """
+    worker = environ.get('PYTEST_XDIST_WORKER', None)
+    return join(ARTIFACTS_DIR, worker) if worker else ARTIFACTS_DIR
 
 
 def pytest_runtest_teardown(item):
@@ -34,18 +373,21 @@ def pytest_runtest_teardown(item):
     FIXME: document the item argument
     """
     test_suite = splitext(basename(item.parent.name))[0]
-    path_name = '/tmp/topology/docker/{}_{}_{}'.format(
+    path_name = join(_artifacts_dir(), '{}_{}_{}'.format(
         test_suite, item.name, datetime.now().strftime('%Y_%m_%d_%H_%M_%S')
-    )
+    ))
 
     # Being extra-prudent here
     if exists(path_name):
         rmtree(path_name)
 
     if 'topology' not in item.funcargs:
-        from topology_docker_openswitch.openswitch import LOG_PATHS
+        # The node module is imported only when nodes are created, if it was
+        # not there are no logs to copy.
+        openswitch = modules.get('topology_docker_openswitch.openswitch', None)
+        log_paths = openswitch.LOG_PATHS if openswitch is not None else []
 
-        for log_path in LOG_PATHS:
+        for log_path in log_paths:
             try:
                 destination = join(path_name, basename(log_path))
                 try:
@@ -70,6 +412,13 @@ def pytest_runtest_teardown(item):
     if topology.engine != 'docker':
         return
 
+    # The shared directories of pooled topologies are still in use.
+    pool = getattr(item.config, '_topology_pool', None)
+    pooled = pool is not None and pool.contains(topology)
+
+    collect = item.config.getoption('--openswitch-artifacts') == 'always' \
+        or getattr(item, '_openswitch_failed', False)
+
     logs_path = '/var/log/messages'
 
     for node in topology.nodes:
@@ -78,8 +427,20 @@ def pytest_runtest_teardown(item):
         if node_obj.metadata.get('type', None) != 'openswitch':
             return
 
+        from topology_docker_openswitch.openswitch import log_commands
+
+        start = time()
         shared_dir = node_obj.shared_dir
 
+        # A tmpfs shared directory is unmounted when the node is stopped.
+        remove = not pooled and not node_obj.shared_dir_tmpfs
+
+        if not collect:
+            if remove:
+                rmtree(shared_dir, ignore_errors=True)
+            record_overhead(node, 'teardown', time() - start)
+            continue
+
         try:
             commands = ['cat {}'.format(logs_path)]
             log_commands(
@@ -116,9 +477,28 @@ def pytest_runtest_teardown(item):
                 )
             )
 
+        try:
+            node_obj.flush_console_logs()
+        except Exception as error:
+            warning(
+                'Unable to flush the console logs of node {}: {}'.format(
+                    node_obj.identifier, error
+                )
+            )
+
+        try:
+            node_obj.persist_logs()
+        except Exception as error:
+            warning(
+                'Unable to persist the logs of node {}: {}'.format(
+                    node_obj.identifier, error
+                )
+            )
+
         try:
             copytree(shared_dir, join(path_name, basename(shared_dir)))
-            rmtree(shared_dir)
+            if remove:
+                rmtree(shared_dir)
         except Error as err:
             errors = err.args[0]
             for error in errors:
@@ -128,3 +508,5 @@ def pytest_runtest_teardown(item):
                         src, msg
                     )
                 )
+
+        record_overhead(node, 'teardown', time() - start)
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Pool of built topologies shared by the test modules of a pytest session.
+
+Booting OpenSwitch nodes takes most of the time of a test run. When topology
+reuse is enabled, the topology managers built for a test module are not
+unbuilt when the module finishes, they are kept in a pool instead. A later
+module that describes an identical topology gets one of them back, after its
+OpenSwitch nodes were restored to the state they had right after booting.
+
+Idle topologies are unbuilt, least recently used first, when the memory used
+by the containers of the pool goes over a budget.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from json import dumps
+from time import time
+from hashlib import sha1
+from logging import warning
+
+from topology_docker_openswitch.cgroup import memory_usage
+
+
+def topology_key(description, platform, inject=None):
+    """
+    Compute the key that identifies identical topologies.
+
+    :param description: The ``TOPOLOGY`` of a test module, a string or a
+     dictionary. It includes the images of the nodes.
+    :param str platform: Name of the platform engine.
+    :param inject: Attributes injected into the topology, if any.
+    :rtype: str
+    """
+    return sha1(dumps(
+        [description, platform, inject], sort_keys=True, default=str
+    ).encode('utf-8')).hexdigest()
+
+
+class PooledTopology(object):
+    """
+    A topology manager held by a :class:`TopologyPool`.
+
+    :param str key: Key of the topology.
+    :param manager: The topology manager.
+    :param unbuild: The original ``unbuild`` method of the manager.
+    """
+
+    def __init__(self, key, manager, unbuild):
+        self.key = key
+        self.manager = manager
+        self.unbuild = unbuild
+        self.idle = False
+        self.last_used = time()
+        self.uses = 1
+
+    def openswitch_nodes(self):
+        return [
+            self.manager.get(node) for node in self.manager.nodes
+            if self.manager.get(node).metadata.get('type', None) ==
+            'openswitch'
+        ]
+
+    def memory(self):
+        """
+        Get the memory used by the containers of the topology.
+
+        :rtype: int
+        :return: Memory usage in bytes, containers whose usage cannot be read
+         count as zero.
+        """
+        total = 0
+        for node in self.manager.nodes:
+            container_id = getattr(
+                self.manager.get(node), 'container_id', None
+            )
+            if container_id is not None:
+                total += memory_usage(container_id) or 0
+        return total
+
+
+class TopologyPool(object):
+    """
+    Pool of built topology managers.
+
+    :param int memory_budget: Maximum number of bytes the containers of the
+     pool may use before idle topologies are unbuilt. None means no limit.
+    """
+
+    def __init__(self, memory_budget=None):
+        self.memory_budget = memory_budget
+        self._entries = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def adopt(self, key, manager):
+        """
+        Add a topology that was just built to the pool, in use.
+
+        The ``unbuild`` method of the manager is replaced so that unbuilding
+        it returns it to the pool. A snapshot of every OpenSwitch node is
+        taken to restore them when the topology is reused.
+
+        :param str key: Key of the topology, see :func:`topology_key`.
+        :param manager: A built topology manager.
+        :rtype: bool
+        :return: True if the topology was added to the pool.
+        """
+        entry = PooledTopology(key, manager, manager.unbuild)
+
+        try:
+            for node in entry.openswitch_nodes():
+                node.snapshot()
+        except Exception as error:
+            warning(
+                'Unable to snapshot topology {}, it will not be reused: '
+                '{}'.format(key, error)
+            )
+            return False
+
+        manager.unbuild = lambda: self.release(manager)
+        self._entries.append(entry)
+        self.evict()
+        return True
+
+    def acquire(self, key):
+        """
+        Get an idle topology with the given key, restored to its initial
+        state.
+
+        :param str key: Key of the topology, see :func:`topology_key`.
+        :return: A topology manager, or None if there is no idle topology
+         with that key.
+        """
+        for entry in self._entries:
+            if not entry.idle or entry.key != key:
+                continue
+
+            try:
+                for node in entry.openswitch_nodes():
+                    node.restore()
+            except Exception as error:
+                warning(
+                    'Unable to restore topology {}, it is discarded: '
+                    '{}'.format(key, error)
+                )
+                self._discard(entry)
+                return None
+
+            entry.idle = False
+            entry.uses += 1
+            entry.last_used = time()
+            return entry.manager
+
+        # A new topology is about to be built, make room for it.
+        self.evict()
+        return None
+
+    def release(self, manager):
+        """
+        Return a topology to the pool once its test module is done with it.
+        """
+        for entry in self._entries:
+            if entry.manager is manager:
+                entry.idle = True
+                entry.last_used = time()
+                break
+        self.evict()
+
+    def contains(self, manager):
+        return any(entry.manager is manager for entry in self._entries)
+
+    def evict(self):
+        """
+        Unbuild idle topologies, least recently used first, until the memory
+        used by the pool is within the budget.
+        """
+        if self.memory_budget is None:
+            return
+
+        usage = dict((id(entry), entry.memory()) for entry in self._entries)
+        idle = sorted(
+            (entry for entry in self._entries if entry.idle),
+            key=lambda entry: entry.last_used
+        )
+
+        while idle and sum(usage.values()) > self.memory_budget:
+            entry = idle.pop(0)
+            del usage[id(entry)]
+            self._discard(entry)
+
+    def clear(self):
+        """
+        Unbuild all the topologies of the pool.
+        """
+        for entry in list(self._entries):
+            self._discard(entry)
+
+    def _discard(self, entry):
+        self._entries.remove(entry)
+        entry.manager.unbuild = entry.unbuild
+
+        try:
+            entry.unbuild()
+        except Exception as error:
+            warning(
+                'Unable to unbuild topology {}: {}'.format(entry.key, error)
+            )
+
+
+__all__ = ['TopologyPool', 'PooledTopology', 'topology_key']
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Recording and replay of console sessions.
+
+A session file is a gzip compressed JSON document with the commands sent
+through the shells of a connection and the responses they got, in order.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from time import time
+from json import dumps, loads
+from gzip import open as gzip_open
+from collections import OrderedDict
+
+
+SESSION_VERSION = 1
+
+# Console context the commands of every recorded shell are run in. A replayed
+# command is only answered in the context of the shell it was recorded from.
+SHELL_CONTEXTS = {
+    'OpenSwitchVtyshShell': 'vtysh',
+    'OpenSwitchBashShell': 'bash',
+    'OpenSwitchVsctlShell': 'bash',
+    'OpenSwitchBashSwnsShell': 'swns',
+}
+
+
+class SessionRecorder(object):
+    """
+    Recorder of the commands and responses exchanged through the shells of a
+    connection.
+
+    The shells call :meth:`command_sent` and :meth:`response_read`, the
+    exchanges are kept in memory and written to the session file by
+    :meth:`save`.
+
+    :param str path: Path of the session file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.exchanges = []
+        self._pending = None
+
+    def command_sent(self, shell, command):
+        """
+        Start an exchange.
+
+        :param str shell: Name of the shell the command was sent through.
+        :param str command: The command line, as sent to the terminal.
+        """
+        self._pending = (shell, command, time())
+
+    def response_read(self, response):
+        """
+        Finish the pending exchange, if there is one.
+
+        :param str response: The response to the pending command.
+        """
+        if self._pending is None:
+            return
+
+        shell, command, start = self._pending
+        self._pending = None
+
+        self.exchanges.append(OrderedDict([
+            ('shell', shell),
+            ('command', command),
+            ('response', response),
+            ('duration', round(time() - start, 6)),
+        ]))
+
+    def discard(self):
+        """
+        Forget the pending exchange, for commands that can not be replayed.
+        """
+        self._pending = None
+
+    def save(self):
+        """
+        Write the recorded exchanges to the session file.
+        """
+        document = OrderedDict([
+            ('version', SESSION_VERSION),
+            ('exchanges', self.exchanges),
+        ])
+
+        with gzip_open(self.path, 'wb') as fd:
+            fd.write(dumps(document).encode('utf-8'))
+
+
+def load_session(path):
+    """
+    Load the exchanges of a session file.
+
+    :param str path: Path of the session file.
+    :rtype: list
+    :return: The exchanges, dictionaries with the ``shell``, ``command``,
+     ``response`` and ``duration`` keys.
+    """
+    with gzip_open(path, 'rb') as fd:
+        document = loads(fd.read().decode('utf-8'))
+
+    if document.get('version') != SESSION_VERSION:
+        raise Exception(
+            'Unsupported version {} of session file {}.'.format(
+                document.get('version'), path
+            )
+        )
+
+    return document['exchanges']
+
+
+class SessionReplay(object):
+    """
+    Answers to the commands of a recorded session.
+
+    Commands are answered in the console context of the shell they were
+    recorded from, see :data:`SHELL_CONTEXTS`. A command that was recorded
+    several times in a context gets its responses in the recorded order, the
+    last one is repeated once they are exhausted.
+
+    :param list exchanges: Exchanges as returned by :func:`load_session`.
+    """
+
+    def __init__(self, exchanges):
+        self._answers = {}
+        self._played = {}
+
+        for exchange in exchanges:
+            key = (
+                SHELL_CONTEXTS.get(exchange['shell'], exchange['shell']),
+                exchange['command']
+            )
+            self._answers.setdefault(key, []).append(
+                (exchange['response'], exchange['duration'])
+            )
+
+    def __contains__(self, key):
+        return key in self._answers
+
+    def answer(self, context, command):
+        """
+        Get the next answer to a command.
+
+        :param str context: Console context the command was sent in,
+         ``vtysh``, ``bash`` or ``swns``.
+        :param str command: A command recorded in that context.
+        :rtype: tuple
+        :return: The response and the recorded duration of the exchange.
+        """
+        key = (context, command)
+        answers = self._answers[key]
+        played = self._played.get(key, 0)
+        self._played[key] = played + 1
+
+        return answers[min(played, len(answers) - 1)]
+
+
+__all__ = [
+    'SHELL_CONTEXTS', 'SessionRecorder', 'SessionReplay', 'load_session'
+]
@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+OpenSwitch REST connection module.
+
+This connection talks to the ``restd`` daemon of the OpenSwitch container
+using pooled keep-alive HTTPS connections.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from json import dumps, loads
+from time import time
+from threading import Thread, Lock
+from ssl import create_default_context, CERT_NONE
+
+from six.moves import queue
+from six.moves.http_client import HTTPSConnection, HTTPException
+from six.moves.urllib.parse import urlencode
+from six.moves.http_cookies import SimpleCookie
+
+from topology_docker_openswitch.overhead import record_overhead
+
+
+REST_CONFIG_PATH = '/rest/v1/system/full-configuration'
+
+# Requests with these methods have the same effect if they are sent twice, so
+# they can be retried when a pooled connection fails.
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS')
+
+
+class RestError(Exception):
+    """
+    Error returned by ``restd``.
+
+    :param str method: HTTP method of the failed request.
+    :param str path: Path of the failed request.
+    :param int status: HTTP status code of the response.
+    :param str body: Body of the response.
+    """
+
+    def __init__(self, method, path, status, body):
+        self.status = status
+        self.body = body
+
+        super(RestError, self).__init__(
+            '{} {} failed with status {}: {}'.format(
+                method, path, status, body
+            )
+        )
+
+
+class OpenswitchRestConnection(object):
+    """
+    REST connection to the ``restd`` daemon of an OpenSwitch node.
+
+    Requests are sent through a pool of persistent HTTPS connections, so
+    consecutive requests do not pay for a new TCP and TLS handshake, and bulk
+    operations are spread across the pool.
+
+    It has the interface of the other connections of the node: it is created
+    with the identifier, the node and the credentials, :meth:`connect` logs in
+    with :meth:`login` and the time it took is stored in the ``login_time``
+    attribute. It does not derive from them because it has no terminal and no
+    shells.
+
+    Requests whose method is not in ``IDEMPOTENT_METHODS``, like the login,
+    are sent on a new connection and are never retried, so they can not be
+    applied twice.
+
+    :param str identifier: Connection identifier.
+    :param parent_node: Node that holds this connection.
+    :param str user: ``restd`` user.
+    :param str password: Password of the user.
+    :param str address: Address of ``restd``, the address of the container in
+     the docker bridge network by default.
+    :param int port: Port where ``restd`` listens.
+    :param int pool_size: Maximum number of persistent connections.
+    :param float timeout: Timeout in seconds of every request.
+    """
+
+    def __init__(self, identifier, parent_node, user='netop',
+                 password='netop', address=None, port=443, pool_size=4,
+                 timeout=30, **kwargs):
+        self.identifier = identifier
+        self.login_time = None
+        self._container_id = parent_node.container_id
+        self._node_identifier = parent_node.identifier
+        self._user = user
+        self._password = password
+        self._address = address
+        self._port = port
+        self._pool_size = pool_size
+        self._timeout = timeout
+
+        self._cookie = None
+        self._pool = None
+        self._created = 0
+        self._lock = Lock()
+
+        # restd uses a self signed certificate.
+        self._ssl_context = create_default_context()
+        self._ssl_context.check_hostname = False
+        self._ssl_context.verify_mode = CERT_NONE
+
+    def is_connected(self):
+        return self._pool is not None
+
+    def connect(self):
+        """
+        Create the connection pool and log into ``restd``.
+        """
+        if self._address is None:
+            from topology_docker_openswitch.connection import (
+                get_container_address
+            )
+            self._address = get_container_address(self._container_id)
+
+        self._pool = queue.LifoQueue()
+        self._created = 0
+
+        start = time()
+        self.login()
+        self.login_time = time() - start
+        record_overhead(self._node_identifier, 'login', self.login_time)
+
+    def login(self):
+        """
+        Log into ``restd`` and keep the session cookie for later requests.
+        """
+        body = urlencode({
+            'username': self._user, 'password': self._password
+        })
+
+        status, headers, data = self._request(
+            'POST', '/login', body=body,
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        )
+
+        if status >= 400:
+            raise RestError('POST', '/login', status, data)
+
+        # Only the name and value of the cookies are sent back, not their
+        # attributes, like Path or Expires.
+        cookie = SimpleCookie()
+        cookie.load(str(headers.get('set-cookie', '')))
+        self._cookie = '; '.join(
+            '{}={}'.format(name, morsel.coded_value)
+            for name, morsel in sorted(cookie.items())
+        ) or None
+
+    def disconnect(self):
+        """
+        Close all the connections of the pool.
+        """
+        if self._pool is None:
+            return
+
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+        self._pool = None
+        self._cookie = None
+
+    def request(self, method, path, data=None, headers=None):
+        """
+        Send a request to ``restd``.
+
+        :param str method: HTTP method.
+        :param str path: Resource path.
+        :param data: Object to be sent as JSON in the body of the request.
+        :param dict headers: Additional request headers.
+        :return: The decoded JSON body of the response, or its text if it is
+         not JSON.
+        """
+        request_headers = {'Accept': 'application/json'}
+        body = None
+
+        if data is not None:
+            body = dumps(data)
+            request_headers['Content-Type'] = 'application/json'
+        if self._cookie is not None:
+            request_headers['Cookie'] = self._cookie
+        if headers is not None:
+            request_headers.update(headers)
+
+        status, response_headers, response = self._request(
+            method, path, body=body, headers=request_headers
+        )
+
+        if status >= 400:
+            raise RestError(method, path, status, response)
+
+        if 'json' in response_headers.get('content-type', ''):
+            return loads(response) if response else None
+        return response
+
+    def get(self, path):
+        return self.request('GET', path)
+
+    def put(self, path, data):
+        return self.request('PUT', path, data=data)
+
+    def post(self, path, data):
+        return self.request('POST', path, data=data)
+
+    def delete(self, path):
+        return self.request('DELETE', path)
+
+    def get_many(self, paths):
+        """
+        Get several resources concurrently using the connection pool.
+
+        :param list paths: Resource paths.
+        :rtype: dict
+        :return: A dictionary that maps every path to its response.
+        """
+        return self._bulk([('GET', path, None) for path in paths])
+
+    def put_many(self, resources):
+        """
+        Put several resources concurrently using the connection pool.
+
+        :param dict resources: Dictionary that maps resource paths to the
+         data to put in them.
+        :rtype: dict
+        :return: A dictionary that maps every path to its response.
+        """
+        return self._bulk([
+            ('PUT', path, data) for path, data in resources.items()
+        ])
+
+    def get_config(self, config_type='running'):
+        """
+        Get the full configuration of the switch.
+
+        :param str config_type: ``running`` or ``startup``.
+        """
+        return self.get('{}?type={}'.format(REST_CONFIG_PATH, config_type))
+
+    def put_config(self, config, config_type='running'):
+        """
+        Replace the full configuration of the switch in one request.
+
+        :param dict config: Configuration as returned by :meth:`get_config`.
+        :param str config_type: ``running`` or ``startup``.
+        """
+        return self.put(
+            '{}?type={}'.format(REST_CONFIG_PATH, config_type), config
+        )
+
+    def _bulk(self, requests):
+        results = {}
+        errors = []
+        pending = queue.Queue()
+
+        for request in requests:
+            pending.put(request)
+
+        def worker():
+            while True:
+                try:
+                    method, path, data = pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    results[path] = self.request(method, path, data=data)
+                except Exception as error:
+                    errors.append(error)
+
+        workers = [
+            Thread(target=worker)
+            for i in range(min(self._pool_size, len(requests)))
+        ]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+        return results
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self._pool_size
+            if create:
+                self._created += 1
+
+        if create:
+            return HTTPSConnection(
+                self._address, self._port, timeout=self._timeout,
+                context=self._ssl_context
+            )
+        return self._pool.get(timeout=self._timeout)
+
+    def _request(self, method, path, body=None, headers=None):
+        if self._pool is None:
+            raise Exception(
+                'REST connection {} is not connected.'.format(self.identifier)
+            )
+
+        connection = self._acquire()
+        attempts = 1
+
+        # A persistent connection may have been closed by the server while it
+        # was idle in the pool. Idempotent requests are retried once on a
+        # fresh connection, the rest are sent on a fresh one from the start.
+        if method in IDEMPOTENT_METHODS:
+            attempts = 2
+        else:
+            connection.close()
+
+        for attempt in range(attempts):
+            try:
+                connection.request(method, path, body=body,
+                                   headers=headers or {})
+                response = connection.getresponse()
+                data = response.read().decode('utf-8')
+                response_headers = dict(
+                    (name.lower(), value)
+                    for name, value in response.getheaders()
+                )
+                break
+            except (HTTPException, IOError):
+                connection.close()
+                if attempt == attempts - 1:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+
+        self._pool.put(connection)
+        return response.status, response_headers, data
+
+
+__all__ = ['OpenswitchRestConnection', 'RestError', 'IDEMPOTENT_METHODS']
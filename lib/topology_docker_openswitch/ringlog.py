@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Bounded in-memory session log.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from gzip import open as gzip_open
+from collections import deque
+from threading import Lock
+
+
+class RingBufferLog(object):
+    """
+    File-like object that keeps the last bytes written to it in memory.
+
+    It is meant to be used as the ``logfile_read`` of a pexpect spawn. Once
+    more than ``max_size`` bytes are held, the oldest data is appended in
+    compressed form to ``spill_path``, or discarded if no spill path is
+    given. The memory used by a long-lived session is then bounded no matter
+    how long it runs.
+
+    The overflow is written to the spill file in blocks of at least
+    ``spill_block_size`` bytes, the rest of it is written when :meth:`close`
+    is called.
+
+    :param int max_size: Maximum number of bytes to keep in memory.
+    :param str spill_path: Path of the gzip file where the data that does not
+     fit in memory is appended.
+    :param int spill_block_size: Minimum number of bytes written to the spill
+     file at once.
+    """
+
+    def __init__(self, max_size=64 * 1024, spill_path=None,
+                 spill_block_size=64 * 1024):
+        self.max_size = max_size
+        self.spill_path = spill_path
+        self.spill_block_size = spill_block_size
+        self.spilled = 0
+
+        self._chunks = deque()
+        self._size = 0
+        self._overflow = []
+        self._overflow_size = 0
+        self._lock = Lock()
+
+    def write(self, data):
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+
+        if not data:
+            return
+
+        with self._lock:
+            self._chunks.append(data)
+            self._size += len(data)
+
+            while self._size > self.max_size:
+                chunk = self._chunks.popleft()
+                excess = self._size - self.max_size
+
+                if len(chunk) > excess:
+                    # Keep the newest part of a chunk that only partially
+                    # overflows.
+                    self._chunks.appendleft(chunk[excess:])
+                    chunk = chunk[:excess]
+
+                self._size -= len(chunk)
+                self.spilled += len(chunk)
+
+                if self.spill_path is not None:
+                    self._overflow.append(chunk)
+                    self._overflow_size += len(chunk)
+
+            if self._overflow_size >= self.spill_block_size:
+                self._spill()
+
+    def flush(self):
+        # pexpect flushes its log files after every write, writing the spill
+        # file here would defeat the purpose of writing it in blocks.
+        pass
+
+    def close(self):
+        """
+        Write the pending overflow to the spill file.
+        """
+        with self._lock:
+            self._spill()
+
+    def _spill(self):
+        if not self._overflow:
+            return
+
+        data = b''.join(self._overflow)
+        self._overflow = []
+        self._overflow_size = 0
+
+        # Appending creates a new gzip member, gzip readers handle files
+        # with several members transparently.
+        with gzip_open(self.spill_path, 'ab') as spill:
+            spill.write(data)
+
+    def dump(self, log, position=0):
+        """
+        Write the data held in memory to another file-like object.
+
+        :param log: File-like object to write to.
+        :param int position: Number of bytes written to this log when it was
+         last dumped, only the newer data is written.
+        :rtype: int
+        :return: The number of bytes written to this log so far, to be given
+         as the ``position`` of the next dump.
+        """
+        with self._lock:
+            total = self.spilled + self._size
+            data = b''.join(self._chunks)
+
+        pending = min(max(total - position, 0), len(data))
+        if pending:
+            log.write(data[len(data) - pending:])
+            log.flush()
+
+        return total
+
+    def tail(self, size=None):
+        """
+        Get the newest data written to the log.
+
+        :param int size: Maximum number of bytes to return, defaults to all
+         the bytes held in memory.
+        :rtype: str
+        """
+        with self._lock:
+            data = b''.join(self._chunks)
+
+        if size is not None:
+            data = data[-size:]
+
+        return data.decode('utf-8', 'ignore')
+
+    def __len__(self):
+        return self._size
+
+
+__all__ = ['RingBufferLog']
@@ -22,8 +22,14 @@ OpenSwitch shell module
 from __future__ import unicode_literals, absolute_import
 from __future__ import print_function, division
 
+from time import time
+
+from six.moves import shlex_quote
+
 from topology.platforms.shell import PExpectBashShell
 from topology_docker.shell import DockerShell, DockerBashShell
+from topology_docker_openswitch.capture import CaptureFiles, CapturedOutput
+from topology_docker_openswitch.overhead import record_overhead
 
 
 _VTYSH_PROMPT_TPL = r'(\r\n)?{}(\([-\w\s]+\))?[#>] '
@@ -40,13 +46,66 @@ BASH_FORCED_PROMPT = PExpectBashShell.FORCED_PROMPT
 # regular expression will match the defalut prompt
 BASH_START_SHELL_PROMPT = r'(\r\n)?[\w\W]+\$ '
 
+# Commands that start with these words do not change the state of the switch,
+# their responses can be cached by the vtysh shell.
+_VTYSH_READ_ONLY_COMMANDS = ('show', 'do show')
+
+
+class _InstrumentedShellMixin(object):
+    """
+    Report the commands sent and the responses read through a shell to the
+    ``recorder`` of its connection, and its terminal operations to the
+    ``tracer`` of its connection, if it has them.
+
+    Commands sent with custom ``matches`` are not recorded, their responses
+    do not end in a prompt and can not be replayed.
+    """
+
+    def send_command(self, command, *args, **kwargs):
+        _trace_shell(self)
+
+        recorder = getattr(self._parent_connection, 'recorder', None)
+
+        if recorder is not None:
+            if args or kwargs.get('matches', None) is not None:
+                recorder.discard()
+            else:
+                recorder.command_sent(
+                    self.__class__.__name__, '{}{}'.format(
+                        getattr(self, '_prefix', None) or '', command
+                    )
+                )
+
+        return super(_InstrumentedShellMixin, self).send_command(
+            command, *args, **kwargs
+        )
+
+    def get_response(self, *args, **kwargs):
+        response = super(_InstrumentedShellMixin, self).get_response(
+            *args, **kwargs
+        )
+
+        recorder = getattr(self._parent_connection, 'recorder', None)
+        if recorder is not None:
+            recorder.response_read(response)
+
+        return response
+
 
-class OpenSwitchBashShell(DockerBashShell):
+class OpenSwitchBashShell(_InstrumentedShellMixin, DockerBashShell):
     """
     Openswitch Telnet-connected bash shell.
+
+    :param str shared_dir: Shared directory of the node in the host, used by
+     :meth:`capture`.
+    :param str shared_dir_mount: Directory where ``shared_dir`` is mounted
+     inside the container, used by :meth:`capture`.
     """
 
-    def __init__(self, **kwargs):
+    def __init__(self, shared_dir=None, shared_dir_mount=None, **kwargs):
+        self._shared_dir = shared_dir
+        self._shared_dir_mount = shared_dir_mount
+
         super(OpenSwitchBashShell, self).__init__(
             BASH_FORCED_PROMPT, try_filter_echo=False,
             **kwargs
@@ -76,7 +135,44 @@ class OpenSwitchBashShell(DockerBashShell):
         """
         spawn = self._parent_connection._spawn
         spawn.sendline('exit')
-        spawn.expect(VTYSH_FORCED_PROMPT)
+
+        # The vtysh prompt is only forced when the vtysh shell is set up,
+        # which is delayed until it is used, so it may still be the standard
+        # one.
+        spawn.expect([VTYSH_FORCED_PROMPT, VTYSH_STANDARD_PROMPT])
+
+    def capture(self, command, timeout=None):
+        """
+        Execute a command sending its output to a file instead of the
+        terminal.
+
+        The output is redirected to a file in the shared directory of the node
+        and is read from the host side, so big outputs never go through the
+        pexpect terminal.
+
+        :param str command: Command to execute.
+        :param int timeout: Timeout to wait for the command to finish.
+        :rtype: :class:`topology_docker_openswitch.capture.CapturedOutput`
+        :return: A memory-mapped view of the command output.
+        """
+        capture_files = _get_capture_files(self)
+
+        # The command is grouped so the output of every command of a compound
+        # one is redirected. The prefix of the shell goes inside the group.
+        prefix = self._prefix
+        self._prefix = None
+        try:
+            self.send_command(
+                '{{ {}{}; }} > {} 2>&1'.format(
+                    prefix or '', command,
+                    shlex_quote(capture_files.container_path)
+                ),
+                timeout=timeout, silent=True
+            )
+        finally:
+            self._prefix = prefix
+
+        return CapturedOutput(capture_files.host_path)
 
     def _setup_shell(self):
         """
@@ -96,9 +192,9 @@ class OpenSwitchVsctlShell(OpenSwitchBashShell):
     Openswitch Telnet-connected vsctl shell.
     """
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         super(OpenSwitchVsctlShell, self).__init__(
-            prefix='ovs-vsctl ', timeout=60
+            prefix='ovs-vsctl ', timeout=60, **kwargs
         )
 
 
@@ -109,8 +205,10 @@ class OpenSwitchBashSwnsShell(OpenSwitchBashShell):
     This shell spawns a ``bash`` shell inside the ``swns`` network namespace.
     """
 
-    def __init__(self, **kwargs):
+    def __init__(self, shared_dir=None, shared_dir_mount=None, **kwargs):
         self._start_command = 'sudo ip netns exec swns bash'
+        self._shared_dir = shared_dir
+        self._shared_dir_mount = shared_dir_mount
 
         super(OpenSwitchBashShell, self).__init__(**kwargs)
 
@@ -148,7 +246,7 @@ class OpenSwitchBashSwnsShell(OpenSwitchBashShell):
         spawn.expect(self._prompt)
 
 
-class OpenSwitchVtyshShell(DockerShell):
+class OpenSwitchVtyshShell(_InstrumentedShellMixin, DockerShell):
     """
     OpenSwitch ``vtysh`` shell
 
@@ -189,9 +287,27 @@ class OpenSwitchVtyshShell(DockerShell):
     Once the container is to be destroyed in the normal clean up of nodes, the
     ``vtysh`` shell is exited to the ``bash`` one by sending the ``end``
     command followed by the ``exit`` command.
+
+    The responses of read only ``show`` commands can be cached by calling
+    :meth:`enable_cache`.
+
+    :param str shared_dir: Shared directory of the node in the host, used by
+     :meth:`capture`.
+    :param str shared_dir_mount: Directory where ``shared_dir`` is mounted
+     inside the container, used by :meth:`capture`.
     """
 
-    def __init__(self):
+    def __init__(self, shared_dir=None, shared_dir_mount=None):
+        self._shared_dir = shared_dir
+        self._shared_dir_mount = shared_dir_mount
+
+        self._cache = None
+        self._cache_generation = None
+        self._cache_current_generation = None
+        self._cache_pending_command = None
+        self._cached_response = None
+        self._cache_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
         # The parameter try_filter_echo is disabled by default here to handle
         # images that support the vtysh "set prompt" command and will have its
         # echo disabled since it extends from DockeBashShell. For other
@@ -224,6 +340,167 @@ class OpenSwitchVtyshShell(DockerShell):
         # This is done to handle calls to hostname that change this prompt.
         spawn.expect([self._prompt, '^.*# '])
 
+    def enable_cache(self, generation=None):
+        """
+        Enable the cache of ``show`` command responses.
+
+        While the cache is enabled, a ``show`` command that was already sent
+        is not sent again, its previous response is returned by
+        :meth:`get_response` instead. The cache is cleared every time any
+        other command is sent through this shell and, if ``generation`` is
+        given, every time the value it returns changes.
+
+        :param generation: Callable that returns the current configuration
+         generation of the switch, usually the value of ``System.cur_cfg``.
+        """
+        self._cache = {}
+        self._cache_generation = generation
+        self._cache_current_generation = None
+
+    def disable_cache(self):
+        """
+        Disable and clear the cache of ``show`` command responses.
+        """
+        self._cache = None
+        self._cache_generation = None
+        self._cache_pending_command = None
+        self._cached_response = None
+
+    @property
+    def cache_stats(self):
+        """
+        Hit, miss and invalidation counts of the ``show`` command cache.
+
+        :rtype: dict
+        """
+        return dict(self._cache_stats)
+
+    def send_command(self, command, *args, **kwargs):
+        """
+        See :meth:`topology.platforms.shell.BaseShell.send_command` for more
+        information.
+
+        If the cache is enabled, cached ``show`` commands are not sent.
+        """
+        self._cached_response = None
+        self._cache_pending_command = None
+
+        if self._cache is None:
+            return super(OpenSwitchVtyshShell, self).send_command(
+                command, *args, **kwargs
+            )
+
+        key = ' '.join(command.split())
+        cacheable = '{} '.format(key).startswith(tuple(
+            '{} '.format(read_only) for read_only in _VTYSH_READ_ONLY_COMMANDS
+        )) and not (args or kwargs.get('matches', None) is not None)
+
+        if not cacheable:
+            self._invalidate_cache()
+            return super(OpenSwitchVtyshShell, self).send_command(
+                command, *args, **kwargs
+            )
+
+        if self._cache_generation is not None:
+            generation = self._cache_generation()
+            if generation != self._cache_current_generation:
+                self._invalidate_cache()
+                self._cache_current_generation = generation
+
+        if key in self._cache:
+            self._cache_stats['hits'] += 1
+            self._cached_response = self._cache[key]
+            return 0
+
+        self._cache_stats['misses'] += 1
+        self._cache_pending_command = key
+
+        return super(OpenSwitchVtyshShell, self).send_command(
+            command, *args, **kwargs
+        )
+
+    def get_response(self, *args, **kwargs):
+        """
+        See :meth:`topology.platforms.shell.BaseShell.get_response` for more
+        information.
+
+        If the last command was answered from the cache, the cached response
+        is returned.
+        """
+        if self._cached_response is not None:
+            response = self._cached_response
+            self._cached_response = None
+            return response
+
+        response = super(OpenSwitchVtyshShell, self).get_response(
+            *args, **kwargs
+        )
+
+        if self._cache is not None and \
+                self._cache_pending_command is not None:
+            self._cache[self._cache_pending_command] = response
+            self._cache_pending_command = None
+
+        return response
+
+    def _invalidate_cache(self):
+        if self._cache:
+            self._cache_stats['invalidations'] += 1
+        self._cache = {}
+
+    def capture(self, command, timeout=None):
+        """
+        Execute a ``vtysh`` command sending its output to a file instead of
+        the terminal.
+
+        The command is executed with ``vtysh -c`` from a ``start-shell`` bash
+        shell, with its output redirected to a file in the shared directory of
+        the node. That file is read from the host side, so big outputs never
+        go through the pexpect terminal.
+
+        Since the command runs in a new ``vtysh`` process, this must be called
+        while this shell is in the exec (non configuration) context.
+
+        Only admins have access to ``start-shell``. If it is not available the
+        command is sent through this shell and its response is written to the
+        capture file, so the output does go through the terminal.
+
+        :param str command: ``vtysh`` command to execute.
+        :param int timeout: Timeout to wait for the command to finish.
+        :rtype: :class:`topology_docker_openswitch.capture.CapturedOutput`
+        :return: A memory-mapped view of the command output.
+        """
+        capture_files = _get_capture_files(self)
+
+        spawn = self._parent_connection._spawn
+
+        spawn.sendline('start-shell')
+        index = spawn.expect([self._prompt, BASH_START_SHELL_PROMPT])
+
+        if not bool(index):
+            self.send_command(command, timeout=timeout, silent=True)
+            response = self.get_response(silent=True)
+
+            with open(capture_files.host_path, 'wb') as fd:
+                fd.write(response.encode('utf-8'))
+
+            return CapturedOutput(capture_files.host_path)
+
+        timeout = timeout if timeout is not None else -1
+
+        spawn.sendline(
+            'vtysh -c {} > {} 2>&1'.format(
+                shlex_quote(command),
+                shlex_quote(capture_files.container_path)
+            )
+        )
+        spawn.expect(BASH_START_SHELL_PROMPT, timeout=timeout)
+
+        spawn.sendline('exit')
+        spawn.expect(self._prompt)
+
+        return CapturedOutput(capture_files.host_path)
+
     def _setup_shell(self, connection=None):
         """
         Get the shell ready to handle ``vtysh`` particularities.
@@ -310,4 +587,140 @@ class OpenSwitchVtyshShell(DockerShell):
             self._prompt = VTYSH_STANDARD_PROMPT
 
 
-__all__ = ['OpenSwitchVtyshShell']
+class LazyShell(object):
+    """
+    Proxy that delays the creation and setup of a shell until it is used.
+
+    The shell object is created the first time any of its attributes is
+    accessed. Calls to ``_setup_shell`` received before the shell is used are
+    recorded and replayed right before the first command is sent through it,
+    so connections only pay the setup round trips of the shells that are
+    actually used.
+
+    :param factory: Shell class or any callable that returns a shell.
+    :param args: Positional arguments for the factory.
+    :param kwargs: Keyword arguments for the factory.
+    """
+
+    # Accessing any of these attributes means that the shell is going to be
+    # used, so any pending setup is done first.
+    _USE_ATTRIBUTES = (
+        'send_command', 'get_response', 'execute', 'enter', 'capture'
+    )
+
+    def __init__(self, factory, *args, **kwargs):
+        object.__setattr__(self, '_lazy_factory', factory)
+        object.__setattr__(self, '_lazy_args', (args, kwargs))
+        object.__setattr__(self, '_lazy_shell', None)
+        object.__setattr__(self, '_lazy_attributes', {})
+        object.__setattr__(self, '_lazy_setup', None)
+
+    @property
+    def is_set_up(self):
+        """
+        True if the shell was already set up, or if it never needed to be.
+        """
+        return self._lazy_setup is None
+
+    def _get_shell(self):
+        if self._lazy_shell is None:
+            args, kwargs = self._lazy_args
+            shell = self._lazy_factory(*args, **kwargs)
+
+            for name, value in self._lazy_attributes.items():
+                setattr(shell, name, value)
+
+            object.__setattr__(self, '_lazy_shell', shell)
+        return self._lazy_shell
+
+    def _run_pending_setup(self):
+        if self._lazy_setup is not None:
+            args, kwargs = self._lazy_setup
+            object.__setattr__(self, '_lazy_setup', None)
+
+            shell = self._get_shell()
+            _trace_shell(shell)
+
+            start = time()
+            shell._setup_shell(*args, **kwargs)
+            _record_shell_overhead(shell, time() - start)
+
+    def _setup_shell(self, *args, **kwargs):
+        """
+        Record the setup of the shell, it is done the first time the shell is
+        used.
+        """
+        object.__setattr__(self, '_lazy_setup', (args, kwargs))
+
+    def exit(self, *args, **kwargs):
+        """
+        Exit the shell, unless it was never used.
+        """
+        if self._lazy_shell is None or self._lazy_setup is not None:
+            return
+
+        _trace_shell(self._lazy_shell)
+        return self._lazy_shell.exit(*args, **kwargs)
+
+    def __call__(self, *args, **kwargs):
+        self._run_pending_setup()
+        return self._get_shell()(*args, **kwargs)
+
+    def __getattr__(self, name):
+        if name in self._USE_ATTRIBUTES:
+            self._run_pending_setup()
+        return getattr(self._get_shell(), name)
+
+    def __setattr__(self, name, value):
+        if self._lazy_shell is None:
+            self._lazy_attributes[name] = value
+        else:
+            setattr(self._lazy_shell, name, value)
+
+
+def _trace_shell(shell):
+    """
+    Attribute the next terminal operations of the connection of a shell to
+    it, if the connection is traced.
+
+    :param shell: The shell that is going to use the terminal.
+    """
+    tracer = getattr(
+        getattr(shell, '_parent_connection', None), 'tracer', None
+    )
+    if tracer is not None:
+        tracer.shell = shell.__class__.__name__
+
+
+def _record_shell_overhead(shell, seconds):
+    """
+    Record the time spent setting up a shell, if its connection belongs to a
+    node.
+    """
+    node = getattr(
+        getattr(shell, '_parent_connection', None), '_node_identifier', None
+    )
+    if node is not None:
+        record_overhead(node, 'shell_setup', seconds)
+
+
+def _get_capture_files(shell):
+    """
+    Get the capture file paths to be used by a shell.
+
+    :param shell: The shell that is going to make the capture.
+    :rtype: :class:`topology_docker_openswitch.capture.CaptureFiles`
+    """
+    if shell._shared_dir is None or shell._shared_dir_mount is None:
+        raise Exception(
+            'Output capture requires the shared_dir and shared_dir_mount '
+            'arguments of the shell to be set.'
+        )
+
+    return CaptureFiles(
+        shell._shared_dir, shell._shared_dir_mount,
+        shell.__class__.__name__
+    )
+
+
+__all__ = ['OpenSwitchVtyshShell', 'LazyShell']
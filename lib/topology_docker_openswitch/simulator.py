@@ -0,0 +1,433 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Simulator of the console of an OpenSwitch container.
+
+This module is a small program that plays the console the OpenSwitch
+connections and shells talk to, so they can be developed, tested and
+benchmarked without booting an image. It is meant to be run in a PTY, like
+pexpect does, and only uses the standard library.
+
+It simulates:
+
+- The ``login:`` and ``Password:`` prompts, with the echo disabled while the
+  password is typed.
+- The ``vtysh`` prompts, standard and forced with ``set prompt`` (which can be
+  made unsupported, like in older images), the configuration modes and the
+  ``hostname`` command.
+- ``start-shell``, the ``bash`` prompts, ``export PS1``, ``stty`` changes of
+  the terminal echo and the ``swns`` namespace shell. ``echo`` and
+  ``vtysh -c`` commands can have their output redirected to a file, like
+  ``capture`` does.
+- A configurable latency before every response and configurable output sizes.
+  ``show big N`` prints ``N`` bytes.
+- The replay of a session recorded with
+  :class:`topology_docker_openswitch.recording.SessionRecorder`. Recorded
+  commands get their recorded responses, optionally with their recorded
+  timing, if they are sent to the shell they were recorded from. The
+  simulator exits on commands that are not in the recording if it is strict.
+
+Run it with ``python -m topology_docker_openswitch.simulator --help`` to see
+its options.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+import sys
+from re import compile as regex
+from time import sleep
+from argparse import ArgumentParser
+from os.path import splitext, abspath
+
+from shlex import split as shlex_split
+
+from six.moves import shlex_quote
+
+
+BASH_PROMPT = 'bash-4.3$ '
+
+SIMULATOR_VERSION = 'OpenSwitch 0.4.0 (simulator)'
+
+# Boolean options that are disabled unless given, the rest are enabled unless
+# their --no- variant is given.
+_DISABLED_BY_DEFAULT = ('strict',)
+
+# Bash commands, or groups of commands, with their output redirected to a
+# file, like the ones of the capture method of the shells.
+_REDIRECT = regex(r'^(.+?)\s*>\s*(\S+)\s+2>&1$')
+_GROUP_REDIRECT = regex(r'^\{\s+(.+?);?\s+\}\s*>\s*(\S+)\s+2>&1$')
+
+
+class ConsoleSimulator(object):
+    """
+    Simulated OpenSwitch console.
+
+    :param str hostname: Initial hostname of the switch.
+    :param str user: User that is allowed to log in.
+    :param str password: Password of the user.
+    :param bool login: Start with the login prompts, or directly in vtysh.
+    :param bool set_prompt: Support the vtysh ``set prompt`` command.
+    :param bool start_shell: Support the vtysh ``start-shell`` command.
+    :param float latency: Seconds to wait before every response.
+    :param int output_size: Number of bytes printed by ``show`` commands that
+     have no specific output.
+    :param str replay: Path of a session file whose recorded commands are
+     answered with their recorded responses.
+    :param float time_scale: Factor applied to the recorded duration of the
+     replayed exchanges, 0 to answer them at once.
+    :param bool strict: Exit when a command that is not in the replayed
+     recording is received, instead of simulating it.
+    :param stdin: Input file, ``sys.stdin`` by default.
+    :param stdout: Output file, ``sys.stdout`` by default.
+    """
+
+    def __init__(self, hostname='switch', user='admin', password='admin',
+                 login=True, set_prompt=True, start_shell=True, latency=0.0,
+                 output_size=0, replay=None, time_scale=0.0, strict=False,
+                 stdin=None, stdout=None):
+        self.hostname = hostname
+        self.user = user
+        self.password = password
+        self.login = login
+        self.set_prompt = set_prompt
+        self.start_shell = start_shell
+        self.latency = latency
+        self.output_size = output_size
+        self.time_scale = time_scale
+        self.strict = strict
+        self.running_config = []
+
+        self._replay = None
+        if replay is not None:
+            from topology_docker_openswitch.recording import (
+                SessionReplay, load_session
+            )
+            self._replay = SessionReplay(load_session(replay))
+
+        self._stdin = stdin or sys.stdin
+        self._stdout = stdout or sys.stdout
+        self._forced_prompt = None
+
+    def run(self):
+        """
+        Run the console until the input is closed or vtysh is exited.
+        """
+        try:
+            if self.login:
+                self._login()
+            self._vtysh()
+        except EOFError:
+            pass
+
+    def set_echo(self, enabled):
+        """
+        Enable or disable the echo of the terminal, if there is one.
+        """
+        if not self._stdin.isatty():
+            return
+
+        from termios import tcgetattr, tcsetattr, TCSANOW, ECHO
+
+        attributes = tcgetattr(self._stdin)
+        if enabled:
+            attributes[3] |= ECHO
+        else:
+            attributes[3] &= ~ECHO
+        tcsetattr(self._stdin, TCSANOW, attributes)
+
+    def write(self, text):
+        self._stdout.write(text)
+        self._stdout.flush()
+
+    def read(self, prompt):
+        """
+        Show a prompt and read a line.
+
+        :rtype: str
+        :return: The line, without surrounding whitespace.
+        """
+        self.write(prompt)
+
+        line = self._stdin.readline()
+        if not line:
+            raise EOFError()
+
+        if self.latency:
+            sleep(self.latency)
+        return line.strip()
+
+    def _replay_command(self, context, command):
+        """
+        Answer a command from the replayed recording.
+
+        :param str context: Console context the command was received in,
+         ``vtysh``, ``bash`` or ``swns``.
+        :rtype: bool
+        :return: True if the command was recorded in that context and
+         answered.
+        """
+        if self._replay is None or (context, command) not in self._replay:
+            return False
+
+        response, duration = self._replay.answer(context, command)
+
+        if self.time_scale:
+            sleep(duration * self.time_scale)
+        if response:
+            self.write('{}\n'.format(response))
+        return True
+
+    def _unrecorded(self, command):
+        """
+        Exit on a command that is not in the replayed recording, if strict.
+        """
+        if self._replay is None or not self.strict:
+            return
+
+        self.write('% Command not in the recording: {}\n'.format(command))
+        raise EOFError()
+
+    def _login(self):
+        while True:
+            user = self.read('{} login: '.format(self.hostname))
+
+            self.set_echo(False)
+            password = self.read('Password: ')
+            self.set_echo(True)
+            self.write('\n')
+
+            if user == self.user and password == self.password:
+                return
+
+            self.write('\nLogin incorrect\n')
+
+    def _vtysh_prompt(self, mode):
+        name = self._forced_prompt or self.hostname
+        return '{}{}# '.format(name, '({})'.format(mode) if mode else '')
+
+    def _vtysh(self):
+        mode = None
+
+        while True:
+            command = self.read(self._vtysh_prompt(mode))
+            words = command.split()
+
+            if not words:
+                continue
+
+            replayed = self._replay_command('vtysh', command)
+
+            if command.startswith('set prompt ') and self.set_prompt:
+                self._forced_prompt = command[len('set prompt '):]
+
+            elif command == 'start-shell' and self.start_shell:
+                self._bash(BASH_PROMPT, 'bash')
+
+            elif command in ['exit', 'end']:
+                if mode is None and command == 'exit':
+                    return
+                mode = None
+
+            elif words[0] == 'configure':
+                mode = 'config'
+
+            elif mode is not None:
+                if not replayed:
+                    self._unrecorded(command)
+                self.running_config.append(command)
+                if words[0] == 'hostname' and len(words) == 2:
+                    self.hostname = words[1]
+                elif words[0] == 'interface':
+                    mode = 'config-if'
+
+            elif not replayed:
+                self._exec(command)
+
+    def _exec(self, command):
+        """
+        Run a command of the exec (non configuration) context of vtysh.
+        """
+        words = command.split()
+        self._unrecorded(command)
+
+        if words[0] == 'show':
+            self._show(words[1:])
+        else:
+            self.write('% Unknown command.\n')
+
+    def _show(self, words):
+        if words == ['version']:
+            self.write('{}\n'.format(SIMULATOR_VERSION))
+        elif words == ['running-config']:
+            self.write('Current configuration:\n!\n')
+            for line in self.running_config:
+                self.write('{}\n'.format(line))
+        elif len(words) == 2 and words[0] == 'big':
+            self._output(int(words[1]))
+        else:
+            self._output(self.output_size)
+
+    def _output(self, size):
+        # Lines of 80 bytes with the newline, written in blocks to keep the
+        # number of writes low for big outputs.
+        line = '{}\n'.format('x' * 79)
+        lines = size // len(line)
+
+        for start in range(0, lines, 1024):
+            self.write(line * min(1024, lines - start))
+
+    def _bash(self, prompt, context):
+        while True:
+            line = self.read(prompt)
+            if self._replay_command(context, line):
+                continue
+
+            redirect = _GROUP_REDIRECT.match(line.strip())
+            if redirect:
+                self._redirect(*redirect.groups())
+                continue
+
+            for command in line.split(';'):
+                command = command.strip()
+                redirect = _REDIRECT.match(command)
+
+                if redirect:
+                    self._redirect(*redirect.groups())
+                elif not command:
+                    continue
+                elif command == 'exit':
+                    return
+                elif command.startswith('export PS1='):
+                    prompt = ''.join(
+                        shlex_split(command[len('export PS1='):])
+                    )
+                elif command == 'stty -echo':
+                    self.set_echo(False)
+                elif command in ['stty echo', 'stty sane']:
+                    self.set_echo(True)
+                elif command.startswith('echo '):
+                    self.write('{}\n'.format(command[len('echo '):]))
+                elif command.startswith('vtysh -c '):
+                    self._exec(shlex_split(command)[2])
+                elif command.endswith('vtysh'):
+                    self._vtysh()
+                elif command.endswith('ip netns exec swns bash'):
+                    self._bash(prompt, 'swns')
+                else:
+                    self._unrecorded(command)
+
+    def _redirect(self, commands, path):
+        """
+        Run bash commands, separated by ``;``, with their output written to a
+        file.
+
+        Only the commands that print something are supported: ``echo`` and
+        ``vtysh -c``.
+        """
+        stdout = self._stdout
+
+        with open(''.join(shlex_split(path)), 'w') as fd:
+            self._stdout = fd
+            try:
+                for command in commands.split(';'):
+                    command = command.strip()
+                    if command.startswith('vtysh -c '):
+                        self._exec(shlex_split(command)[2])
+                    elif command.startswith('echo '):
+                        self.write('{}\n'.format(command[len('echo '):]))
+                    else:
+                        self._unrecorded(command)
+            finally:
+                self._stdout = stdout
+
+
+def simulator_command(**options):
+    """
+    Get the command line that runs the simulator with the given options.
+
+    :param options: Keyword arguments of :class:`ConsoleSimulator`, except
+     ``stdin`` and ``stdout``.
+    :rtype: str
+    """
+    command = [sys.executable, '{}.py'.format(splitext(abspath(__file__))[0])]
+
+    for name, value in sorted(options.items()):
+        option = '--{}'.format(name.replace('_', '-'))
+
+        if value is None:
+            continue
+        if value is True:
+            if name in _DISABLED_BY_DEFAULT:
+                command.append(option)
+        elif value is False:
+            if name not in _DISABLED_BY_DEFAULT:
+                command.append('--no-{}'.format(name.replace('_', '-')))
+        else:
+            command.extend([option, str(value)])
+
+    return ' '.join(shlex_quote(part) for part in command)
+
+
+def main(argv=None):
+    parser = ArgumentParser(description='OpenSwitch console simulator')
+    parser.add_argument('--hostname', default='switch')
+    parser.add_argument('--user', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument(
+        '--no-login', dest='login', action='store_false',
+        help='Start directly in vtysh'
+    )
+    parser.add_argument(
+        '--no-set-prompt', dest='set_prompt', action='store_false',
+        help='Do not support the vtysh set prompt command'
+    )
+    parser.add_argument(
+        '--no-start-shell', dest='start_shell', action='store_false',
+        help='Do not support the vtysh start-shell command'
+    )
+    parser.add_argument(
+        '--latency', type=float, default=0.0,
+        help='Seconds to wait before every response'
+    )
+    parser.add_argument(
+        '--output-size', type=int, default=0,
+        help='Bytes printed by show commands without a specific output'
+    )
+    parser.add_argument(
+        '--replay', metavar='SESSION',
+        help='Answer the commands recorded in this session file'
+    )
+    parser.add_argument(
+        '--time-scale', type=float, default=0.0,
+        help='Factor applied to the recorded durations, 0 to not wait'
+    )
+    parser.add_argument(
+        '--strict', action='store_true',
+        help='Exit on commands that are not in the replayed session'
+    )
+    args = parser.parse_args(argv)
+
+    ConsoleSimulator(**vars(args)).run()
+
+
+__all__ = ['ConsoleSimulator', 'simulator_command']
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Tracing of the terminal operations of the connections.
+
+Every ``send``, ``sendline`` and ``expect`` done through a traced connection
+is recorded with its duration, the node, connection and shell it belongs to
+and, for expects, the patterns, the index of the one that matched and the
+number of bytes consumed. What is sent right after a password prompt is
+recorded by its size only. The traces can be exported in the Chrome trace event
+format, which ``chrome://tracing`` and Perfetto open.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from re import compile as regex
+from json import dump
+from time import time
+from threading import Lock
+from collections import OrderedDict
+
+from six import string_types
+
+
+# Name of the shell of the events that happen outside of any shell, like the
+# login of the connection.
+CONSOLE = 'console'
+
+# Prompts that ask for a secret, what is sent after them is not recorded.
+_SECRET_PROMPT = regex(r'(?i)password')
+
+_TRACERS = []
+_TRACERS_LOCK = Lock()
+_TRACING = {'enabled': False}
+
+
+class ConsoleTracer(object):
+    """
+    Recorder of the terminal operations of one connection.
+
+    The shells set the :attr:`shell` attribute before they use the terminal,
+    so the events are attributed to them.
+
+    :param str node: Identifier of the node of the connection.
+    :param str connection: Identifier of the connection.
+    """
+
+    def __init__(self, node, connection):
+        self.node = node
+        self.connection = connection
+        self.shell = None
+        self.events = []
+
+    def add(self, operation, start, duration, **details):
+        """
+        Record an event.
+
+        :param str operation: Name of the operation, ``sendline`` for example.
+        :param float start: Start time, in seconds since the epoch.
+        :param float duration: Duration in seconds.
+        :param details: Additional details of the event.
+        """
+        self.events.append(
+            (operation, self.shell or CONSOLE, start, duration, details)
+        )
+
+
+def _pattern_names(pattern):
+    if not isinstance(pattern, (list, tuple)):
+        pattern = [pattern]
+
+    names = []
+    for item in pattern:
+        if isinstance(item, string_types):
+            names.append(item)
+        elif hasattr(item, 'pattern'):
+            names.append(item.pattern)
+        else:
+            names.append(getattr(item, '__name__', str(item)))
+    return names
+
+
+def _size(value):
+    if isinstance(value, (string_types, bytes)):
+        return len(value)
+    return 0
+
+
+class TracedSpawn(object):
+    """
+    Proxy of a pexpect spawn that records its ``send``, ``sendline`` and
+    ``expect`` calls in a tracer.
+
+    Any other attribute is read from, and written to, the spawn.
+
+    The data sent after an expect that matched a password prompt is recorded
+    by its size, so passwords never end up in the traces.
+
+    :param spawn: The pexpect spawn.
+    :param tracer: The tracer.
+    :type tracer: :class:`ConsoleTracer`
+    """
+
+    def __init__(self, spawn, tracer):
+        object.__setattr__(self, '_spawn', spawn)
+        object.__setattr__(self, '_tracer', tracer)
+        object.__setattr__(self, '_secret', False)
+
+    def send(self, s):
+        start = time()
+        written = self._spawn.send(s)
+        self._tracer.add('send', start, time() - start, **self._sent(s))
+        return written
+
+    def sendline(self, s=''):
+        start = time()
+        written = self._spawn.sendline(s)
+        self._tracer.add('sendline', start, time() - start, **self._sent(s))
+        return written
+
+    def _sent(self, s):
+        """
+        Get the details of the data sent, only its size if it is a secret.
+        """
+        if self._secret:
+            object.__setattr__(self, '_secret', False)
+            return {'size': _size(s)}
+        return {'data': s}
+
+    def expect(self, pattern, *args, **kwargs):
+        return self._traced_expect('expect', pattern, args, kwargs)
+
+    def expect_exact(self, pattern, *args, **kwargs):
+        return self._traced_expect('expect_exact', pattern, args, kwargs)
+
+    def _traced_expect(self, operation, pattern, args, kwargs):
+        spawn = self._spawn
+        start = time()
+        details = {'patterns': _pattern_names(pattern)}
+
+        try:
+            index = getattr(spawn, operation)(pattern, *args, **kwargs)
+            details['index'] = index
+
+            after = spawn.after
+            if isinstance(after, bytes):
+                after = after.decode('utf-8', 'ignore')
+            object.__setattr__(
+                self, '_secret', isinstance(after, string_types) and
+                _SECRET_PROMPT.search(after) is not None
+            )
+
+            return index
+        except Exception as error:
+            details['error'] = error.__class__.__name__
+            raise
+        finally:
+            details['scanned'] = _size(spawn.before) + _size(spawn.after)
+            self._tracer.add(operation, start, time() - start, **details)
+
+    def __getattr__(self, name):
+        return getattr(self._spawn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._spawn, name, value)
+
+
+def enable_tracing(enabled=True):
+    """
+    Trace every OpenSwitch connection created from now on.
+
+    :param bool enabled: False to stop tracing new connections.
+    """
+    _TRACING['enabled'] = enabled
+
+
+def tracing_enabled():
+    """
+    Tell if new connections are traced.
+
+    :rtype: bool
+    """
+    return _TRACING['enabled']
+
+
+def create_tracer(node, connection):
+    """
+    Create a tracer and register it to be exported by
+    :func:`export_chrome_trace`.
+
+    :param str node: Identifier of the node of the connection.
+    :param str connection: Identifier of the connection.
+    :rtype: :class:`ConsoleTracer`
+    """
+    tracer = ConsoleTracer(node, connection)
+    with _TRACERS_LOCK:
+        _TRACERS.append(tracer)
+    return tracer
+
+
+def clear_tracers():
+    """
+    Forget the registered tracers and their events.
+    """
+    with _TRACERS_LOCK:
+        del _TRACERS[:]
+
+
+def chrome_trace(tracers=None):
+    """
+    Convert the events of some tracers to the Chrome trace event format.
+
+    Every node is a process and every connection and shell pair is a thread,
+    timestamps and durations are in microseconds.
+
+    :param list tracers: The tracers, all the registered ones by default.
+    :rtype: dict
+    """
+    if tracers is None:
+        with _TRACERS_LOCK:
+            tracers = list(_TRACERS)
+
+    events = []
+    pids = OrderedDict()
+    tids = OrderedDict()
+
+    for tracer in tracers:
+        pid = pids.setdefault(tracer.node, len(pids) + 1)
+
+        for operation, shell, start, duration, details in tracer.events:
+            thread = '{} {}'.format(tracer.connection, shell)
+            tid = tids.setdefault((pid, thread), len(tids) + 1)
+
+            events.append(OrderedDict([
+                ('name', operation),
+                ('cat', shell),
+                ('ph', 'X'),
+                ('ts', int(start * 1000000)),
+                ('dur', int(duration * 1000000)),
+                ('pid', pid),
+                ('tid', tid),
+                ('args', details),
+            ]))
+
+    for node, pid in pids.items():
+        events.append(OrderedDict([
+            ('name', 'process_name'), ('ph', 'M'), ('pid', pid),
+            ('args', {'name': node}),
+        ]))
+
+    for (pid, thread), tid in tids.items():
+        events.append(OrderedDict([
+            ('name', 'thread_name'), ('ph', 'M'), ('pid', pid), ('tid', tid),
+            ('args', {'name': thread}),
+        ]))
+
+    return OrderedDict([
+        ('traceEvents', events),
+        ('displayTimeUnit', 'ms'),
+    ])
+
+
+def export_chrome_trace(path, tracers=None):
+    """
+    Write the events of some tracers to a Chrome trace JSON file.
+
+    :param str path: Path of the file.
+    :param list tracers: The tracers, all the registered ones by default.
+    """
+    with open(path, 'w') as fd:
+        dump(chrome_trace(tracers), fd)
+
+
+__all__ = [
+    'ConsoleTracer', 'TracedSpawn', 'enable_tracing', 'tracing_enabled',
+    'create_tracer', 'clear_tracers', 'chrome_trace', 'export_chrome_trace'
+]
@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Pool of pre-warmed OpenSwitch containers.
+
+Most of the boot time of an OpenSwitch node is spent by ``/sbin/init`` bringing
+up the system before any port of the topology is needed. A warm pool keeps a
+number of containers of an image already booted up to that point, so a node
+that claims one of them only has its ports wired and its interfaces created.
+
+A refill thread boots new containers in the background to keep the pool at
+its target size. Warm containers are created by OpenSwitch nodes, so they have
+exactly the settings of the containers of the nodes that claim them.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from shutil import copyfile, rmtree
+from itertools import count
+from logging import getLogger
+from threading import Thread, Event
+from subprocess import call
+from os.path import join, dirname, normpath, abspath
+
+from six.moves import queue
+
+from topology_docker_openswitch.admission import get_boot_admission
+
+
+LOG = getLogger(__name__)
+
+SETUP_SCRIPT = join(dirname(normpath(abspath(__file__))), 'openswitch_setup')
+
+# Arguments of the OpenSwitch nodes that change how their containers are
+# created. A node only claims warm containers created with the same values.
+CONTAINER_KWARGS = (
+    'image', 'registry', 'binds', 'environment', 'privileged', 'tty',
+    'shared_dir_base', 'shared_dir_mount', 'tmpfs_logs',
+    'create_host_config_kwargs', 'create_container_kwargs'
+)
+
+# Values the OpenSwitch nodes use for those arguments when they are not given.
+CONTAINER_DEFAULTS = {
+    'image': 'topology/ops:latest',
+    'environment': {'container': 'docker'}
+}
+
+_WARM_POOLS = {}
+
+
+class WarmContainer(object):
+    """
+    A booted container waiting in a :class:`WarmPool`.
+
+    :param str container_id: Container identifier.
+    :param str name: Container name.
+    :param str shared_dir: Host directory mounted in the container.
+    """
+
+    def __init__(self, container_id, name, shared_dir):
+        self.container_id = container_id
+        self.name = name
+        self.shared_dir = shared_dir
+
+
+class ClaimedContainerClient(object):
+    """
+    docker-py client of a node that claimed a warm container.
+
+    Creating the container of the node returns the claimed container instead
+    of creating a new one. Everything else is done by the real client.
+
+    :param client: The docker-py client of the node.
+    :param container: The claimed container.
+    :type container: :class:`WarmContainer`
+    """
+
+    def __init__(self, client, container):
+        self.client = client
+        self._container = container
+
+    def create_container(self, *args, **kwargs):
+        return {'Id': self._container.container_id}
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+class WarmPool(object):
+    """
+    Pool of containers booted up to the topology dependent stages of the
+    OpenSwitch setup.
+
+    The containers are created by
+    :class:`topology_docker_openswitch.openswitch.OpenSwitchNode` objects
+    with the given arguments, through the same docker-py calls as the
+    containers of any other node.
+
+    :param int size: Number of booted containers to keep ready.
+    :param node_kwargs: Arguments of the nodes that create the containers.
+     Only the ones in :data:`CONTAINER_KWARGS` are used.
+    """
+
+    def __init__(self, size=2, **node_kwargs):
+        self.size = size
+        self.node_kwargs = dict(CONTAINER_DEFAULTS)
+        self.node_kwargs.update(
+            (name, value) for name, value in node_kwargs.items()
+            if name in CONTAINER_KWARGS and value is not None
+        )
+        self.image = self.node_kwargs['image']
+
+        self._ids = count()
+        self._ready = queue.Queue()
+        self._wakeup = Event()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """
+        Start the refill thread.
+        """
+        self._running = True
+        self._thread = Thread(target=self._refill)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the refill thread and remove the containers that were not
+        claimed.
+        """
+        self._running = False
+        self._wakeup.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        while True:
+            try:
+                self._remove(self._ready.get_nowait())
+            except queue.Empty:
+                break
+
+    @property
+    def ready(self):
+        """
+        Number of containers ready to be claimed.
+        """
+        return self._ready.qsize()
+
+    def claim(self):
+        """
+        Take a booted container out of the pool.
+
+        :rtype: :class:`WarmContainer`
+        :return: The container, or None if there is no container ready. The
+         caller owns the container from then on.
+        """
+        try:
+            container = self._ready.get_nowait()
+        except queue.Empty:
+            container = None
+
+        self._wakeup.set()
+        return container
+
+    def _refill(self):
+        while self._running:
+            self._wakeup.clear()
+
+            if self._ready.qsize() >= self.size:
+                self._wakeup.wait(1)
+                continue
+
+            try:
+                self._ready.put(self._boot())
+            except Exception as error:
+                LOG.warning(
+                    'Unable to boot a warm {} container: {}'.format(
+                        self.image, error
+                    )
+                )
+                self._wakeup.wait(10)
+
+    def _boot(self):
+        # Warm boots take an admission slot like the boots of the nodes.
+        admission = get_boot_admission()
+        slot = admission.acquire() if admission is not None else None
+
+        try:
+            return self._boot_container()
+        finally:
+            if slot is not None:
+                admission.release(slot)
+
+    def _boot_container(self):
+        from topology_docker_openswitch.openswitch import OpenSwitchNode
+
+        node = OpenSwitchNode(
+            'warm{}'.format(next(self._ids)), warm_pool=False,
+            **self.node_kwargs
+        )
+        container = WarmContainer(
+            node.container_id, node._container_name, node.shared_dir
+        )
+
+        try:
+            node.start()
+            copyfile(
+                SETUP_SCRIPT, join(node.shared_dir, 'openswitch_setup.py')
+            )
+            node._docker_exec(
+                'python {}/openswitch_setup.py -d --prewarm'.format(
+                    node.shared_dir_mount
+                )
+            )
+        except Exception:
+            self._remove(container)
+            raise
+
+        LOG.info('Warm container {} ready.'.format(container.name))
+        return container
+
+    def _remove(self, container):
+        call(['docker', 'rm', '--force', container.container_id])
+        rmtree(container.shared_dir, ignore_errors=True)
+
+
+def _freeze(value):
+    """
+    Get a hashable version of a value made of dictionaries and lists.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted(
+            ((key, _freeze(val)) for key, val in value.items()), key=repr
+        ))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(element) for element in value)
+    return value
+
+
+def _pool_key(node_kwargs):
+    """
+    Get the key of the warm pool of the nodes created with some arguments.
+
+    :param dict node_kwargs: Arguments of the nodes.
+    :rtype: tuple
+    """
+    settings = dict(CONTAINER_DEFAULTS)
+    settings.update(
+        (name, value) for name, value in node_kwargs.items()
+        if name in CONTAINER_KWARGS and value is not None
+    )
+    return _freeze(settings)
+
+
+def start_warm_pool(size=2, **node_kwargs):
+    """
+    Start a warm pool to be used by the OpenSwitch nodes created with the
+    given arguments.
+
+    See :class:`WarmPool` for the meaning of the arguments.
+
+    :rtype: :class:`WarmPool`
+    """
+    key = _pool_key(node_kwargs)
+
+    if key in _WARM_POOLS:
+        raise Exception(
+            'A warm pool for these node arguments is already running: '
+            '{}'.format(node_kwargs)
+        )
+
+    pool = WarmPool(size=size, **node_kwargs)
+    pool.start()
+    _WARM_POOLS[key] = pool
+    return pool
+
+
+def get_warm_pool(**node_kwargs):
+    """
+    Get the warm pool of the nodes created with some arguments.
+
+    The arguments that do not change how the container is created are
+    ignored, see :data:`CONTAINER_KWARGS`.
+
+    :rtype: :class:`WarmPool`
+    :return: The pool, or None if no pool was started for them.
+    """
+    return _WARM_POOLS.get(_pool_key(node_kwargs), None)
+
+
+def stop_warm_pools():
+    """
+    Stop all the warm pools, removing their unclaimed containers.
+    """
+    while _WARM_POOLS:
+        _WARM_POOLS.popitem()[1].stop()
+
+
+__all__ = [
+    'CONTAINER_KWARGS', 'CONTAINER_DEFAULTS', 'ClaimedContainerClient',
+    'WarmPool', 'WarmContainer', 'start_warm_pool', 'get_warm_pool',
+    'stop_warm_pools'
+]
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Worker connections of a node, used for background commands.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from six.moves import queue
+
+
+# Names of the additional connections used for background commands start
+# with this prefix.
+WORKER_CONNECTION_PREFIX = 'worker'
+
+
+class WorkerConnections(object):
+    """
+    Additional connections of a node that run one background command at a
+    time each.
+
+    A worker connection is created, through the ``connect`` method of the
+    node, the first time it is needed. The last worker that finished a command
+    is the first one to be used again, so new connections are only created
+    when several commands run at the same time.
+
+    :param node: The node.
+    :param int size: Number of worker connections.
+    :param str connection_type: Type of the worker connections.
+    """
+
+    def __init__(self, node, size, connection_type='docker'):
+        self.names = [
+            '{}{}'.format(WORKER_CONNECTION_PREFIX, index)
+            for index in range(int(size))
+        ]
+
+        self._node = node
+        self._connection_type = connection_type
+        self._connected = set()
+        self._free = queue.LifoQueue()
+
+        for name in reversed(self.names):
+            self._free.put(name)
+
+    def __contains__(self, connection):
+        return connection in self.names
+
+    def __len__(self):
+        return len(self.names)
+
+    def connected(self):
+        """
+        Get the worker connections that are connected.
+
+        :rtype: list
+        """
+        return [name for name in self.names if name in self._connected]
+
+    def send_command(self, command, shell='bash', silent=True, timeout=None):
+        """
+        Send a command through a free worker connection.
+
+        :param str command: Command to send.
+        :param str shell: Name of the shell to use.
+        :param bool silent: Do not log the command and its response.
+        :param int timeout: Seconds to wait for a free worker.
+        :rtype: str
+        :return: The response of the command.
+        """
+        if not self.names:
+            raise Exception(
+                'Node {} has no worker connections.'.format(
+                    self._node.identifier
+                )
+            )
+
+        worker = self._free.get(timeout=timeout)
+
+        try:
+            if worker not in self._connected:
+                self._node.connect(
+                    connection=worker, connection_type=self._connection_type
+                )
+                self._connected.add(worker)
+
+            shellobj = self._node.get_connection(
+                connection=worker
+            ).get_shell(shell)
+            shellobj.send_command(command, silent=silent)
+            return shellobj.get_response(silent=silent)
+        finally:
+            self._free.put(worker)
+
+    def disconnect(self):
+        """
+        Disconnect the worker connections that are connected. They are
+        connected again if they are needed later.
+        """
+        for name in self.connected():
+            self._connected.discard(name)
+            self._node.get_connection(connection=name).disconnect()
+
+
+__all__ = ['WORKER_CONNECTION_PREFIX', 'WorkerConnections']
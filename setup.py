@@ -62,6 +62,7 @@ setup(
     version=find_version('lib/topology_docker_openswitch/__init__.py'),
     package_dir={'': 'lib'},
     packages=find_packages('lib'),
+    package_data={'topology_docker_openswitch': ['openswitch_setup']},
 
     # Dependencies
     install_requires=find_requirements('requirements.txt'),
@@ -88,7 +89,7 @@ setup(
         'Programming Language :: Python :: 2',
         'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.4',
+        'Programming Language :: Python :: 3.5',
     ],
 
     # Entry points
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Benchmark suite for topology_docker_openswitch.
+
+The benchmarks run against local stand-ins of the OpenSwitch console and of
+the container commands, so no images are needed. Run them with::
+
+    python -m test.benchmarks --save baseline
+    python -m test.benchmarks --compare baseline
+
+See :mod:`test.benchmarks.runner` for more information.
+"""
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Benchmarks of the OpenSwitch connections and shells.
+
+The connections are attached to the console simulator, see
+:mod:`topology_docker_openswitch.simulator`.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from topology_docker_openswitch.connection import (
+    OpenswitchSimulatorConnection, OpenswitchSSHConnection
+)
+from topology_docker_openswitch.shell import OpenSwitchVtyshShell
+from topology_docker_openswitch.simulator import simulator_command
+
+from test.benchmarks.runner import benchmark
+
+
+LARGE_OUTPUT = 1024 * 1024
+
+
+class SimulatedNode(object):
+    """
+    The attributes of a node the connections need.
+    """
+
+    identifier = 'simulator'
+    container_id = 'simulator'
+
+    def __init__(self):
+        self.shared_dir = mkdtemp()
+
+
+class SimulatedSSHConnection(OpenswitchSSHConnection):
+    """
+    SSH connection attached to the console simulator.
+
+    The simulator plays a connection multiplexed over a running SSH master,
+    which is already authenticated.
+    """
+
+    def _get_connect_command(self):
+        self._multiplexed = True
+        return simulator_command(login=False)
+
+
+def connected_vtysh(**simulator_options):
+    """
+    Create a simulator connection with a vtysh shell.
+
+    :return: The node, the connection and the shell.
+    """
+    node = SimulatedNode()
+    connection = OpenswitchSimulatorConnection(
+        '0', node, **simulator_options
+    )
+    shell = OpenSwitchVtyshShell()
+    connection._register_shell('vtysh', shell)
+    connection.connect()
+    return node, connection, connection.get_shell('vtysh')
+
+
+def login(timer, rounds, connection_class):
+    node = SimulatedNode()
+
+    try:
+        for i in range(rounds):
+            connection = connection_class('0', node)
+            with timer:
+                connection.connect()
+            connection.disconnect()
+    finally:
+        rmtree(node.shared_dir)
+
+
+@benchmark(rounds=20)
+def docker_login(timer, rounds):
+    """
+    Connect and log in through the docker connection.
+    """
+    login(timer, rounds, OpenswitchSimulatorConnection)
+
+
+@benchmark(rounds=20)
+def ssh_login(timer, rounds):
+    """
+    Connect through the SSH connection, multiplexed.
+    """
+    login(timer, rounds, SimulatedSSHConnection)
+
+
+def handle_prompt(timer, rounds, set_prompt):
+    node, connection, shell = connected_vtysh(set_prompt=set_prompt)
+
+    try:
+        for i in range(rounds):
+            with timer:
+                shell._handle_prompt()
+    finally:
+        connection.disconnect()
+        rmtree(node.shared_dir)
+
+
+@benchmark(rounds=50)
+def vtysh_handle_prompt_forced(timer, rounds):
+    """
+    Prompt detection of an image that supports ``set prompt``.
+    """
+    handle_prompt(timer, rounds, True)
+
+
+@benchmark(rounds=50)
+def vtysh_handle_prompt_standard(timer, rounds):
+    """
+    Prompt detection of an image that does not support ``set prompt``.
+    """
+    handle_prompt(timer, rounds, False)
+
+
+@benchmark(rounds=200)
+def vtysh_round_trip(timer, rounds):
+    """
+    Send a command and read its response.
+    """
+    node, connection, shell = connected_vtysh()
+
+    try:
+        for i in range(rounds):
+            with timer:
+                shell.send_command('show version', silent=True)
+                shell.get_response(silent=True)
+    finally:
+        connection.disconnect()
+        rmtree(node.shared_dir)
+
+
+@benchmark(rounds=5)
+def vtysh_large_output(timer, rounds):
+    """
+    Read a 1 MiB response, the sample is the time per MiB.
+    """
+    node, connection, shell = connected_vtysh()
+
+    try:
+        for i in range(rounds):
+            with timer:
+                shell.send_command(
+                    'show big {}'.format(LARGE_OUTPUT), silent=True,
+                    timeout=60
+                )
+                shell.get_response(silent=True)
+    finally:
+        connection.disconnect()
+        rmtree(node.shared_dir)
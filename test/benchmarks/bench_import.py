@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Benchmarks of the import time of the pytest plugin.
+
+The plugin is loaded by every pytest run through its entry point, so its
+imports are part of the startup time of every run, even the ones that never
+create an OpenSwitch node.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from sys import executable
+from subprocess import check_output
+
+from test.benchmarks.runner import benchmark
+
+
+IMPORT_TIME = '''
+from time import time
+import pytest
+start = time()
+import topology_docker_openswitch.plugin.plugin
+print(time() - start)
+'''
+
+
+@benchmark(rounds=10)
+def plugin_import(timer, rounds):
+    """
+    Import the plugin in a new interpreter, after pytest.
+    """
+    for i in range(rounds):
+        timer.record(float(check_output([executable, '-c', IMPORT_TIME])))
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Benchmarks of the setup script that runs inside the OpenSwitch containers.
+
+The script is loaded as a module and the system commands it runs are replaced
+by stand-ins that answer like a container with a topology of 48 ports, so the
+benchmarks measure the script itself and not the commands.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from time import time
+from types import ModuleType
+from shutil import rmtree
+from tempfile import mkdtemp
+from os import makedirs
+from os.path import join
+
+from yaml import safe_load
+
+from topology_docker_openswitch.warmpool import SETUP_SCRIPT
+
+from test.benchmarks.runner import benchmark
+
+
+PORTS = 48
+
+
+def load_setup_script():
+    """
+    Load the setup script as a module, with its commands replaced by
+    stand-ins.
+
+    :return: The module and the temporary directory used as its shared
+     directory and hardware description directory.
+    """
+    with open(SETUP_SCRIPT) as fd:
+        source = fd.read()
+
+    tmpdir = mkdtemp()
+    module = ModuleType(str('openswitch_setup'))
+    module.__file__ = join(tmpdir, 'openswitch_setup.py')
+    exec(compile(source, SETUP_SCRIPT, 'exec'), module.__dict__)
+
+    hwdesc_dir = join(tmpdir, 'hwdesc')
+    makedirs(hwdesc_dir)
+    with open(join(hwdesc_dir, 'ports.yaml'), 'w') as fd:
+        fd.write('ports:\n')
+        for port in range(1, PORTS + 1):
+            fd.write('  - name: {}\n'.format(port))
+
+    labels = ' '.join(
+        ['lo', 'eth0'] + ['port{}'.format(port) for port in range(PORTS)]
+    )
+
+    def check_output(command, shell=False):
+        if 'ls /var/run/netns' in command:
+            return 'swns\n'
+        if command == ['ls', '/sys/class/net/']:
+            return labels
+        return ''
+
+    module.hwdesc_dir = hwdesc_dir
+    module.check_output = check_output
+    module.check_call = lambda *args, **kwargs: 0
+    module.load = safe_load
+
+    return module, tmpdir
+
+
+@benchmark(rounds=50)
+def create_interfaces(timer, rounds):
+    """
+    Map the port labels of a 48 ports topology and create the remaining
+    interfaces.
+    """
+    module, tmpdir = load_setup_script()
+
+    try:
+        for i in range(rounds):
+            with timer:
+                module.create_interfaces()
+    finally:
+        rmtree(tmpdir)
+
+
+@benchmark(rounds=20)
+def wait_check_overshoot(timer, rounds):
+    """
+    Time between a waited condition becoming true and the wait returning.
+    """
+    module, tmpdir = load_setup_script()
+
+    try:
+        for i in range(rounds):
+            ready = time() + 0.05
+            module.wait_check(
+                lambda: time() >= ready, 'benchmark', 'benchmark failed'
+            )
+            timer.record(time() - ready)
+    finally:
+        rmtree(tmpdir)
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Minimal benchmark runner.
+
+Benchmarks are functions registered with the :func:`benchmark` decorator.
+They receive a :class:`Timer` and the number of rounds to run, do their own
+setup and record one sample per round. The statistics of every benchmark are
+printed and can be saved to a JSON file in ``.benchmarks`` to be compared with
+later runs.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from json import dump, load
+from time import time
+from datetime import datetime
+from importlib import import_module
+from argparse import ArgumentParser
+from collections import OrderedDict
+from traceback import format_exc
+from os import makedirs
+from os.path import join, exists
+from platform import python_version, node
+
+
+RESULTS_DIR = '.benchmarks'
+
+BENCHMARK_MODULES = [
+    'test.benchmarks.bench_setup',
+    'test.benchmarks.bench_console',
+    'test.benchmarks.bench_import',
+]
+
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(rounds=20):
+    """
+    Register a benchmark function.
+
+    :param int rounds: Default number of rounds of the benchmark.
+    """
+    def decorator(function):
+        BENCHMARKS[function.__name__] = (function, rounds)
+        return function
+    return decorator
+
+
+class Timer(object):
+    """
+    Collector of the samples of a benchmark.
+
+    It is used as a context manager around the measured code, or samples that
+    are computed by the benchmark are added with :meth:`record`. Samples are
+    seconds, lower is better.
+    """
+
+    def __init__(self):
+        self.samples = []
+        self._start = None
+
+    def __enter__(self):
+        self._start = time()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        if type is None:
+            self.samples.append(time() - self._start)
+
+    def record(self, sample):
+        self.samples.append(sample)
+
+
+def statistics(samples):
+    """
+    Compute the statistics of a list of samples.
+
+    :rtype: dict
+    """
+    ordered = sorted(samples)
+    size = len(ordered)
+    mean = sum(ordered) / size
+    middle = size // 2
+
+    if size % 2:
+        median = ordered[middle]
+    else:
+        median = (ordered[middle - 1] + ordered[middle]) / 2
+
+    return OrderedDict([
+        ('rounds', size),
+        ('min', ordered[0]),
+        ('median', median),
+        ('mean', mean),
+        ('max', ordered[-1]),
+        ('stdev', (
+            sum((sample - mean) ** 2 for sample in ordered) / size
+        ) ** 0.5),
+    ])
+
+
+def run_benchmarks(names=None, rounds=None):
+    """
+    Run the registered benchmarks.
+
+    :param list names: Substrings of the names of the benchmarks to run, all
+     of them by default.
+    :param int rounds: Number of rounds of every benchmark, overrides their
+     defaults.
+    :rtype: dict
+    :return: The statistics of every benchmark that ran, the error of the
+     ones that failed, and the reason of the benchmark modules that were
+     skipped because they could not be imported.
+    """
+    results = OrderedDict()
+
+    for module in BENCHMARK_MODULES:
+        try:
+            import_module(module)
+        except ImportError as error:
+            results[module] = {'skipped': str(error)}
+            print('{} SKIPPED: {}'.format(module, error))
+
+    for name, (function, default_rounds) in BENCHMARKS.items():
+        if names and not any(selected in name for selected in names):
+            continue
+
+        timer = Timer()
+        print('{} ...'.format(name), end=' ')
+
+        try:
+            function(timer, rounds or default_rounds)
+        except Exception:
+            results[name] = {'error': format_exc()}
+            print('failed')
+            continue
+
+        results[name] = statistics(timer.samples)
+        print('{:.6f} s'.format(results[name]['median']))
+
+    return results
+
+
+def save_results(results, name):
+    """
+    Save benchmark results in the results directory.
+
+    :rtype: str
+    :return: The path of the results file.
+    """
+    if not exists(RESULTS_DIR):
+        makedirs(RESULTS_DIR)
+
+    path = join(RESULTS_DIR, '{}.json'.format(name))
+    with open(path, 'w') as fd:
+        dump(OrderedDict([
+            ('date', datetime.now().isoformat()),
+            ('python', python_version()),
+            ('host', node()),
+            ('results', results),
+        ]), fd, indent=4)
+    return path
+
+
+def compare_results(results, name, threshold=0.2):
+    """
+    Compare benchmark results with a saved run.
+
+    The medians are compared, a benchmark regresses if its median is more
+    than ``threshold`` times slower than the saved one.
+
+    :rtype: list
+    :return: Names of the benchmarks that regressed.
+    """
+    with open(join(RESULTS_DIR, '{}.json'.format(name))) as fd:
+        baseline = load(fd)['results']
+
+    regressions = []
+    print('\n{:<40} {:>12} {:>12} {:>8}'.format(
+        'benchmark', name, 'current', 'ratio'
+    ))
+
+    for benchmark_name, stats in results.items():
+        previous = baseline.get(benchmark_name, {})
+        if 'median' not in stats or 'median' not in previous:
+            continue
+
+        ratio = stats['median'] / previous['median'] \
+            if previous['median'] else float('inf')
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(benchmark_name)
+
+        print('{:<40} {:>12.6f} {:>12.6f} {:>7.2f}x{}'.format(
+            benchmark_name, previous['median'], stats['median'], ratio,
+            ' REGRESSION' if regressed else ''
+        ))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = ArgumentParser(
+        description='Run the topology_docker_openswitch benchmarks'
+    )
+    parser.add_argument(
+        'names', nargs='*',
+        help='Run only the benchmarks whose names contain these strings'
+    )
+    parser.add_argument(
+        '--rounds', type=int, default=None,
+        help='Number of rounds of every benchmark'
+    )
+    parser.add_argument(
+        '--save', metavar='NAME',
+        help='Save the results as .benchmarks/NAME.json'
+    )
+    parser.add_argument(
+        '--compare', metavar='NAME',
+        help='Compare the results with .benchmarks/NAME.json'
+    )
+    parser.add_argument(
+        '--threshold', type=float, default=0.2,
+        help='Slowdown ratio over which a benchmark regresses'
+    )
+    parser.add_argument(
+        '--allow-skipped', action='store_true',
+        help='Do not fail if some benchmark modules can not be imported'
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(names=args.names, rounds=args.rounds)
+
+    if args.save:
+        print('Results saved in {}'.format(save_results(results, args.save)))
+
+    failed = [name for name, stats in results.items() if 'error' in stats]
+    for name in failed:
+        print('\n{} failed:\n{}'.format(name, results[name]['error']))
+
+    skipped = [name for name, stats in results.items() if 'skipped' in stats]
+    if skipped and not args.allow_skipped:
+        print('\nSkipped benchmark modules, install their dependencies or '
+              'run with --allow-skipped:')
+        for name in skipped:
+            print('    {}: {}'.format(name, results[name]['skipped']))
+    else:
+        skipped = []
+
+    regressions = []
+    if args.compare:
+        regressions = compare_results(
+            results, args.compare, threshold=args.threshold
+        )
+
+    return 1 if failed or skipped or regressions else 0
+
+
+__all__ = ['benchmark', 'Timer', 'run_benchmarks', 'main']
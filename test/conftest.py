@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Fixtures shared by the test suite.
+
+The connections and shells are tested against the console simulator, see
+:mod:`topology_docker_openswitch.simulator`. The connection and shell modules
+are imported by the fixtures, so the tests that do not use them can run
+without ``topology_docker``.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+import sys
+
+from pytest import fixture
+
+
+# The asyncio connections and shells need Python 3.5 or newer.
+collect_ignore = []
+if sys.version_info < (3, 5):
+    collect_ignore.append('test_aio.py')
+
+
+class SimulatedNode(object):
+    """
+    The attributes of a node the connections and shells need.
+
+    The simulator runs in the host, so the shared directory is mounted on
+    itself.
+
+    :param str shared_dir: Shared directory of the node.
+    """
+
+    identifier = 'simulator'
+    container_id = 'simulator'
+
+    def __init__(self, shared_dir):
+        self.shared_dir = shared_dir
+        self.shared_dir_mount = shared_dir
+
+
+def register_shells(connection, node):
+    """
+    Register the shells of an OpenSwitch node in a connection, lazily, like
+    :meth:`OpenSwitchNode._register_shells` does.
+    """
+    from topology_docker_openswitch.shell import (
+        OpenSwitchVtyshShell, OpenSwitchBashShell, OpenSwitchBashSwnsShell,
+        OpenSwitchVsctlShell, LazyShell
+    )
+
+    shell_kwargs = {
+        'shared_dir': node.shared_dir,
+        'shared_dir_mount': node.shared_dir_mount
+    }
+
+    for name, shell_class in [
+        ('vtysh', OpenSwitchVtyshShell),
+        ('bash', OpenSwitchBashShell),
+        ('bash_swns', OpenSwitchBashSwnsShell),
+        ('vsctl', OpenSwitchVsctlShell),
+    ]:
+        connection._register_shell(
+            name, LazyShell(shell_class, **shell_kwargs)
+        )
+
+
+@fixture
+def simulated_node(tmpdir):
+    """
+    Node with a temporary shared directory.
+    """
+    return SimulatedNode(str(tmpdir))
+
+
+@fixture
+def simulator_connection(request, simulated_node):
+    """
+    Factory of connected simulator connections with the shells of an
+    OpenSwitch node. The connections are disconnected when the test finishes.
+
+    The factory takes the identifier of the connection, the connection class,
+    :class:`OpenswitchSimulatorConnection` by default, and its keyword
+    arguments.
+    """
+    from topology_docker_openswitch.connection import (
+        OpenswitchSimulatorConnection
+    )
+
+    connections = []
+
+    def create(identifier='0', connection_class=None, **kwargs):
+        connection = (connection_class or OpenswitchSimulatorConnection)(
+            identifier, simulated_node, **kwargs
+        )
+        register_shells(connection, simulated_node)
+        connection.connect()
+        connections.append(connection)
+        return connection
+
+    def disconnect():
+        for connection in connections:
+            try:
+                connection.disconnect()
+            except Exception:
+                # The console may have been closed by the test.
+                pass
+
+    request.addfinalizer(disconnect)
+    return create
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_docker_openswitch.admission.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from threading import Thread, Event
+
+from topology_docker_openswitch.admission import BootAdmission, boot_slots
+
+
+def test_admission(tmpdir):
+    """
+    Check that boots wait for a free slot and are admitted in order.
+    """
+    directory = str(tmpdir)
+    admission = BootAdmission(
+        slots=2, directory=directory, poll_interval=0.01,
+        check_headroom=False
+    )
+
+    first = admission.acquire()
+    second = admission.acquire()
+
+    # Another process of the host uses the same lock files.
+    other = BootAdmission(
+        slots=2, directory=directory, poll_interval=0.01,
+        check_headroom=False
+    )
+    admitted = []
+    done = Event()
+
+    def boot(name):
+        slot = other.acquire()
+        admitted.append(name)
+        done.wait()
+        other.release(slot)
+
+    threads = [Thread(target=boot, args=(name,)) for name in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+
+    threads[0].join(0.2)
+    assert admitted == []
+
+    admission.release(first)
+    threads[0].join(0.2)
+    assert len(admitted) == 1
+
+    admission.release(second)
+    done.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert sorted(admitted) == ['a', 'b']
+
+
+def test_boot_slots():
+    """
+    Check that the host can boot at least one switch.
+    """
+    assert boot_slots() >= 1
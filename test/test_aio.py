@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_docker_openswitch.aio.
+
+The connections and shells are tested against the console simulator. The
+coroutines are run with the event loop directly, so this module has no
+Python 3.5 syntax and is only skipped in older versions by the conftest.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+import asyncio
+
+from pytest import fixture, raises
+
+from topology_docker_openswitch.aio import (
+    AsyncSpawn, AsyncOpenswitchConnection, AsyncOpenswitchDockerConnection
+)
+from topology_docker_openswitch.simulator import (
+    SIMULATOR_VERSION, simulator_command
+)
+
+
+class AsyncSimulatorConnection(AsyncOpenswitchDockerConnection):
+    """
+    asyncio connection to a local simulator of the console.
+
+    :param simulator_options: Keyword arguments of
+     :class:`topology_docker_openswitch.simulator.ConsoleSimulator`.
+    """
+
+    def __init__(self, timeout=10, **simulator_options):
+        super(AsyncSimulatorConnection, self).__init__(
+            'simulator', timeout=timeout
+        )
+        self._simulator_options = simulator_options
+
+    def _get_connect_command(self):
+        return simulator_command(
+            user=self._user, password=self._password,
+            **self._simulator_options
+        )
+
+
+@fixture
+def loop(request):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    def close():
+        asyncio.set_event_loop(None)
+        loop.close()
+
+    request.addfinalizer(close)
+    return loop
+
+
+@fixture
+def connect(request, loop):
+    """
+    Factory of connected asyncio simulator connections. The connections are
+    disconnected when the test finishes.
+    """
+    connections = []
+
+    def create(**kwargs):
+        connection = AsyncSimulatorConnection(**kwargs)
+        connections.append(connection)
+        loop.run_until_complete(connection.connect())
+        return connection
+
+    def disconnect():
+        for connection in connections:
+            loop.run_until_complete(connection.disconnect())
+
+    request.addfinalizer(disconnect)
+    return create
+
+
+def test_spawn(loop):
+    """
+    Check the matches, the timeout and the end of the output of a spawn.
+    """
+    spawn = AsyncSpawn('sh -c "echo first second; sleep 0.5"', timeout=5)
+    loop.run_until_complete(spawn.start())
+
+    try:
+        # The pattern that matches first in the output is chosen.
+        assert loop.run_until_complete(
+            spawn.expect(['second', 'first'])
+        ) == 1
+        assert spawn.after == 'first'
+
+        with raises(asyncio.TimeoutError):
+            loop.run_until_complete(spawn.expect('third', timeout=0.1))
+
+        with raises(EOFError):
+            loop.run_until_complete(spawn.expect('third'))
+        assert not spawn.isalive()
+    finally:
+        loop.run_until_complete(spawn.close())
+
+
+def test_shells(loop, connect):
+    """
+    Check the login and every shell, in an order that enters and exits vtysh
+    from the other shells.
+    """
+    connection = connect(hostname='ops1')
+    assert connection.is_connected()
+
+    def execute(shell, command):
+        return loop.run_until_complete(
+            connection.get_shell(shell).execute(command)
+        )
+
+    assert execute('bash', 'echo bash') == 'bash'
+    assert execute('vtysh', 'show version') == SIMULATOR_VERSION
+    assert execute('bash_swns', 'echo swns') == 'swns'
+    assert execute('vsctl', 'show') == ''
+    assert execute('vtysh', 'show version') == SIMULATOR_VERSION
+
+    loop.run_until_complete(connection.disconnect())
+    assert not connection.is_connected()
+
+
+def test_unsupported_prompt(loop, connect):
+    """
+    Check that vtysh falls back to the standard prompt if it can not be
+    changed.
+    """
+    connection = connect(set_prompt=False)
+    vtysh = connection.get_shell('vtysh')
+
+    assert loop.run_until_complete(vtysh.execute('show version')) == \
+        SIMULATOR_VERSION
+    assert loop.run_until_complete(
+        connection.get_shell('bash').execute('echo bash')
+    ) == 'bash'
+
+
+def test_concurrent_sessions(loop, connect):
+    """
+    Check that one event loop drives several sessions at the same time.
+    """
+    connections = [connect(latency=0.1) for i in range(3)]
+
+    responses = loop.run_until_complete(asyncio.gather(*[
+        connection.get_shell('vtysh').execute('show version')
+        for connection in connections
+    ]))
+    assert responses == [SIMULATOR_VERSION] * 3
+
+    responses = loop.run_until_complete(asyncio.gather(*[
+        connection.get_shell('bash').execute('echo {}'.format(index))
+        for index, connection in enumerate(connections)
+    ]))
+    assert responses == ['0', '1', '2']
+
+
+def test_abstract_connection():
+    """
+    Check that connections that do not implement the login can not be
+    created.
+    """
+    class CommandOnlyConnection(AsyncOpenswitchConnection):
+        def _get_connect_command(self):
+            return 'true'
+
+    with raises(TypeError):
+        CommandOnlyConnection()
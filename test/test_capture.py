@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for the output capture of the OpenSwitch shells.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from os.path import exists
+
+
+def test_vtysh_capture(simulator_connection):
+    """
+    Check that a vtysh command output is captured in a file through
+    start-shell, and that the shell is usable afterwards.
+    """
+    vtysh = simulator_connection().get_shell('vtysh')
+
+    with vtysh.capture('show big 8000') as output:
+        assert len(output) == 8000
+        assert len(list(output.lines())) == 100
+        path = output.path
+
+    assert not exists(path)
+
+    assert vtysh('show version') == 'OpenSwitch 0.4.0 (simulator)'
+
+
+def test_vtysh_capture_without_start_shell(
+        simulator_connection, simulated_node):
+    """
+    Check that the output is captured through the terminal when start-shell
+    is not available.
+    """
+    simulated_node.container_id = 'no-start-shell'
+    vtysh = simulator_connection(start_shell=False).get_shell('vtysh')
+    assert simulated_node.no_start_shell_users == {'admin'}
+
+    with vtysh.capture('show version') as output:
+        assert output.text() == 'OpenSwitch 0.4.0 (simulator)'
+
+    assert vtysh('show version') == 'OpenSwitch 0.4.0 (simulator)'
+
+
+def test_bash_capture(simulator_connection):
+    """
+    Check that a bash command output is captured in a file.
+    """
+    bash = simulator_connection().get_shell('bash')
+
+    with bash.capture('echo captured') as output:
+        assert output.text() == 'captured\n'
+
+    # The output of every command of a compound command is captured.
+    with bash.capture('echo first; echo second') as output:
+        assert output.text() == 'first\nsecond\n'
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_docker_openswitch.cgroup.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from json import load
+from os import getpid, getppid, makedirs
+from os.path import join
+
+from topology_docker_openswitch.cgroup import (
+    ResourceSampler, cpu_usage, pids_current, process_usage
+)
+
+
+CONTAINER_ID = 'a' * 64
+
+
+def write(path, text):
+    with open(path, 'w') as fd:
+        fd.write(text)
+
+
+def fake_cgroup(root):
+    """
+    Create the unified cgroup hierarchy of a container with this process in
+    it.
+    """
+    cgroup = join(root, 'system.slice', 'docker-{}.scope'.format(CONTAINER_ID))
+    makedirs(cgroup)
+
+    write(join(root, 'cgroup.controllers'), 'cpu memory pids\n')
+    write(join(cgroup, 'cpu.stat'), 'usage_usec 1000000\nuser_usec 0\n')
+    write(join(cgroup, 'memory.current'), '1048576\n')
+    write(join(cgroup, 'pids.current'), '12\n')
+    write(join(cgroup, 'cgroup.procs'), '{}\n'.format(getpid()))
+
+    return cgroup
+
+
+def test_usage(tmpdir):
+    """
+    Check the usage read from the cgroup files.
+    """
+    root = str(tmpdir)
+    fake_cgroup(root)
+
+    assert cpu_usage(CONTAINER_ID, root=root) == 1000000000
+    assert pids_current(CONTAINER_ID, root=root) == 12
+    assert cpu_usage('b' * 64, root=root) is None
+
+    processes = process_usage(CONTAINER_ID, root=root)
+    assert len(processes) == 1
+    cpu, rss = list(processes.values())[0]
+    assert cpu >= 0
+    assert rss > 0
+
+
+def test_sampler(tmpdir):
+    """
+    Check the samples, summary and file of the resource sampler.
+    """
+    root = str(tmpdir)
+    cgroup = fake_cgroup(root)
+    path = join(root, 'resources.json')
+
+    sampler = ResourceSampler(CONTAINER_ID, interval=60, path=path, root=root)
+    sampler.sample()
+
+    write(join(cgroup, 'cpu.stat'), 'usage_usec 900000000\n')
+    write(join(cgroup, 'memory.current'), '3145728\n')
+    sampler.sample()
+
+    first, second = sampler.samples
+    assert first['cpu_percent'] is None
+    assert second['cpu_percent'] > 0
+    assert second['memory'] == 3145728
+
+    results = sampler.stop()
+    summary = results['summary']
+    assert summary['samples'] == 2
+    assert summary['memory'] == {'mean': 2097152, 'max': 3145728}
+    assert summary['pids'] == 12
+    assert len(summary['processes']) == 1
+
+    with open(path) as fd:
+        assert load(fd)['summary'] == summary
+
+
+def _process_name(pid):
+    with open('/proc/{}/stat'.format(pid)) as fd:
+        stat = fd.read()
+    return stat[stat.find('(') + 1:stat.rfind(')')]
+
+
+def test_nested_process_usage(tmpdir):
+    """
+    Check that the processes of the child cgroups of a container are found,
+    in the unified and in the cgroup v1 hierarchies.
+    """
+    unified = join(str(tmpdir), 'unified')
+    legacy = join(str(tmpdir), 'legacy')
+
+    for cgroup in [
+        fake_cgroup(unified),
+        join(legacy, 'cpuacct', 'docker', CONTAINER_ID)
+    ]:
+        services = join(cgroup, 'system.slice')
+        makedirs(join(services, 'switchd.service'))
+        makedirs(join(services, 'sshd.service'))
+
+        write(join(cgroup, 'cgroup.procs'), '')
+        write(join(services, 'cgroup.procs'), '')
+        write(
+            join(services, 'switchd.service', 'cgroup.procs'),
+            '{}\n'.format(getpid())
+        )
+        write(
+            join(services, 'sshd.service', 'cgroup.procs'),
+            '{}\n999999999\n'.format(getppid())
+        )
+
+    for root in [unified, legacy]:
+        processes = process_usage(CONTAINER_ID, root=root)
+        assert _process_name(getpid()) in processes
+        assert _process_name(getppid()) in processes
+        assert all(rss > 0 for cpu, rss in processes.values())
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_docker_openswitch.connection.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+import sys
+from io import BytesIO
+from os import chmod, environ, makedirs, pathsep
+from os.path import join, exists
+
+from pytest import fixture
+from topology_docker.connection import DockerSSHConnection
+
+from topology_docker_openswitch import connection as connection_module
+from topology_docker_openswitch.connection import (
+    OpenswitchSSHConnection, OpenswitchSimulatorConnection
+)
+from topology_docker_openswitch.shell import VTYSH_STANDARD_PROMPT
+from topology_docker_openswitch.simulator import (
+    SIMULATOR_VERSION, simulator_command
+)
+
+from .conftest import SimulatedNode, register_shells
+
+
+# Stand-in of the ssh client. Control operations succeed if the control
+# socket exists, and exit removes it. Sessions are played by the simulator,
+# already logged in like the sessions multiplexed over a master.
+FAKE_SSH = """#!{python}
+import os
+import sys
+
+args = sys.argv[1:]
+
+if '-O' in args:
+    control_path = args[args.index('-S') + 1]
+    if not os.path.exists(control_path):
+        sys.exit(255)
+    if args[args.index('-O') + 1] == 'exit':
+        os.remove(control_path)
+    sys.exit(0)
+
+with open({log!r}, 'a') as fd:
+    fd.write(' '.join(args) + '\\n')
+
+os.execv('/bin/sh', ['/bin/sh', '-c', {simulator!r}])
+"""
+
+
+class SimulatedSSHCommand(DockerSSHConnection):
+    def _get_connect_command(self):
+        return 'ssh admin@simulator'
+
+
+class SimulatedSSHConnection(OpenswitchSSHConnection, SimulatedSSHCommand):
+    """
+    SSH connection to the simulator through the ssh stand-in.
+    """
+
+
+def _text(value):
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return value
+
+
+def _sent_lines(connection):
+    # The password is traced by its size only.
+    return [
+        details.get('data') for operation, shell, start, duration, details
+        in connection.tracer.events if operation == 'sendline'
+    ]
+
+
+@fixture
+def fake_ssh(tmpdir, monkeypatch):
+    """
+    Put the ssh stand-in first in the PATH and start a master.
+
+    :return: The control path of the master and the log of the sessions.
+    """
+    bin_dir = join(str(tmpdir), 'bin')
+    control_dir = join(str(tmpdir), 'control')
+    log = join(str(tmpdir), 'ssh.log')
+    makedirs(bin_dir)
+    makedirs(control_dir)
+
+    ssh = join(bin_dir, 'ssh')
+    with open(ssh, 'w') as fd:
+        fd.write(FAKE_SSH.format(
+            python=sys.executable, log=log,
+            simulator=simulator_command(login=False)
+        ))
+    chmod(ssh, 0o755)
+
+    monkeypatch.setenv('PATH', pathsep.join([bin_dir, environ['PATH']]))
+    monkeypatch.setattr(connection_module, 'SSH_CONTROL_DIR', control_dir)
+
+    control_path = join(control_dir, 'simulator-admin')
+    open(control_path, 'w').close()
+
+    return control_path, log
+
+
+def test_login(simulator_connection):
+    """
+    Check that the docker connection logs in without delays, reaches the
+    vtysh prompt and disables the echo of the terminal.
+    """
+    connection = simulator_connection(hostname='ops1', trace=True)
+    assert connection.login_time is not None
+
+    # One line per prompt, and the console preparation in one more line.
+    lines = _sent_lines(connection)
+    assert lines[:2] == ['admin', None]
+    assert lines[2:] == ['start-shell', 'stty -echo; exit']
+
+    spawn = connection._spawn
+    spawn.sendline('show version')
+    spawn.expect(VTYSH_STANDARD_PROMPT)
+
+    output = _text(spawn.before)
+    assert SIMULATOR_VERSION in output
+    assert 'show version' not in output
+    assert _text(spawn.after).endswith('ops1# ')
+
+
+def test_console_log(simulator_connection):
+    """
+    Check that the console output goes to the ring buffer instead of the log
+    of the framework, and is written there when the log is flushed.
+    """
+    connection = simulator_connection(log_buffer_size=4096)
+    assert connection._spawn.logfile_read is connection.log
+
+    framework = BytesIO()
+    connection._framework_log = framework
+
+    assert connection.get_shell('vtysh')('show version') == SIMULATOR_VERSION
+    assert framework.getvalue() == b''
+    assert SIMULATOR_VERSION in connection.log_tail()
+
+    connection.flush_log()
+    flushed = framework.getvalue()
+    assert SIMULATOR_VERSION in flushed.decode('utf-8')
+
+    connection.flush_log()
+    assert framework.getvalue() == flushed
+
+
+def test_login_without_start_shell(simulator_connection, simulated_node):
+    """
+    Check that the console preparation is skipped for users without
+    start-shell, and only tried once for each node.
+    """
+    first = simulator_connection('0', start_shell=False, trace=True)
+    assert _sent_lines(first)[2:] == ['start-shell']
+    assert simulated_node.no_start_shell_users == {'admin'}
+
+    second = simulator_connection('1', start_shell=False, trace=True)
+    assert _sent_lines(second)[2:] == []
+
+    assert second.get_shell('vtysh')('show version') == SIMULATOR_VERSION
+
+    # Other nodes are not affected.
+    other_node = SimulatedNode(simulated_node.shared_dir)
+    other_node.container_id = 'other'
+    third = OpenswitchSimulatorConnection('2', other_node, trace=True)
+    register_shells(third, other_node)
+    third.connect()
+    try:
+        assert _sent_lines(third)[2:] == ['start-shell', 'stty -echo; exit']
+    finally:
+        third.disconnect()
+
+
+def test_ssh_multiplexing(fake_ssh, simulator_connection):
+    """
+    Check that SSH connections are multiplexed over a running master, reach
+    the vtysh prompt, and close the master when the last one is
+    disconnected.
+    """
+    control_path, log = fake_ssh
+
+    first = simulator_connection(
+        '0', connection_class=SimulatedSSHConnection
+    )
+    second = simulator_connection(
+        '1', connection_class=SimulatedSSHConnection
+    )
+
+    for connection in (first, second):
+        assert connection._multiplexed
+        assert connection.login_time is not None
+        assert connection.get_shell('vtysh')('show version') == \
+            SIMULATOR_VERSION
+
+    with open(log) as fd:
+        sessions = fd.read().splitlines()
+    assert len(sessions) == 2
+    assert all(
+        'ControlPath={}'.format(control_path) in session
+        for session in sessions
+    )
+
+    first.disconnect()
+    assert exists(control_path)
+
+    second.disconnect()
+    assert not exists(control_path)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_docker_openswitch.fanout.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from time import time
+from threading import Condition
+
+from topology_docker_openswitch.fanout import fan_out
+
+
+class Rendezvous(object):
+    """
+    Lets threads wait until a number of them arrived, like a barrier.
+
+    :param int parties: Number of threads to wait for.
+    """
+
+    def __init__(self, parties):
+        self.parties = parties
+        self.arrived = 0
+        self._condition = Condition()
+
+    def wait(self, timeout=10):
+        """
+        Wait until all the parties arrived.
+
+        :rtype: bool
+        :return: False if the timeout expired first.
+        """
+        deadline = time() + timeout
+
+        with self._condition:
+            self.arrived += 1
+            self._condition.notify_all()
+
+            while self.arrived < self.parties:
+                remaining = deadline - time()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+
+            return True
+
+
+class FakeShell(object):
+
+    def __init__(self, identifier, rendezvous):
+        self._identifier = identifier
+        self._rendezvous = rendezvous
+        self._last = None
+
+    def send_command(self, command):
+        if self._identifier == 'broken':
+            raise Exception('Connection lost')
+
+        # The first command of every node waits for the other nodes, so it
+        # only completes if all of them run at the same time.
+        if self._last is None and not self._rendezvous.wait():
+            raise Exception('Commands did not run concurrently')
+        self._last = command
+
+    def get_response(self):
+        return '{} {}'.format(self._identifier, self._last)
+
+
+class FakeNode(object):
+
+    def __init__(self, identifier, rendezvous, node_type='openswitch'):
+        self.identifier = identifier
+        self.metadata = {'type': node_type}
+        self._shell = FakeShell(identifier, rendezvous)
+
+    def get_shell(self, shell):
+        assert shell == 'vtysh'
+        return self._shell
+
+
+def test_fan_out():
+    """
+    Check that commands run concurrently and failures are isolated.
+    """
+    rendezvous = Rendezvous(4)
+    nodes = [
+        FakeNode('ops{}'.format(index), rendezvous) for index in range(4)
+    ] + [
+        FakeNode('broken', rendezvous),
+        FakeNode('hs1', rendezvous, node_type='host')
+    ]
+
+    results = fan_out(nodes, ['show version', 'show vlan'], max_workers=5)
+
+    assert all(results['ops{}'.format(index)].ok for index in range(4))
+    assert rendezvous.arrived == 4
+    assert sorted(results) == ['broken', 'ops0', 'ops1', 'ops2', 'ops3']
+    assert results['ops2'].ok
+    assert results['ops2'].responses == [
+        'ops2 show version', 'ops2 show vlan'
+    ]
+    assert not results['broken'].ok
+    assert 'Connection lost' in str(results['broken'].error)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_docker_openswitch.openswitch.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+import platform
+from os import symlink
+from os.path import join, islink
+from socket import socket, AF_UNIX, SOCK_STREAM
+
+from topology_docker_openswitch.openswitch import (
+    OpenSwitchNode, tmpfs_host_config, _linux_distribution
+)
+
+
+def _bare_node(shared_dir):
+    """
+    Create an OpenSwitch node without a container, with only the attributes
+    the OVSDB methods need.
+    """
+    node = OpenSwitchNode.__new__(OpenSwitchNode)
+    node._shared_dir = shared_dir
+    node.shared_dir_mount = '/tmp'
+    node._ovsdb_link = None
+    node._snapshot = None
+    node._restores = 0
+    return node
+
+
+def test_tmpfs_host_config():
+    """
+    Check the host config arguments of a node with its logs on a tmpfs.
+    """
+    assert tmpfs_host_config('64m') == {'tmpfs': {'/var/log': 'size=64m'}}
+
+    # The host config arguments of the node are kept, without modifying them.
+    create_host_config_kwargs = {
+        'privileged': True,
+        'tmpfs': {'/run': 'size=16m'},
+    }
+    assert tmpfs_host_config('64m', create_host_config_kwargs) == {
+        'privileged': True,
+        'tmpfs': {'/run': 'size=16m', '/var/log': 'size=64m'},
+    }
+    assert create_host_config_kwargs == {
+        'privileged': True,
+        'tmpfs': {'/run': 'size=16m'},
+    }
+
+
+def test_linux_distribution(monkeypatch, tmpdir):
+    """
+    Check that the Linux distribution is read from the os-release file if
+    the platform module can not find it.
+    """
+    monkeypatch.delattr(platform, 'linux_distribution', raising=False)
+
+    os_release = tmpdir.join('os-release')
+    os_release.write('ID=debian\nNAME="Debian GNU/Linux"\nVERSION_ID="8"\n')
+    assert _linux_distribution(str(os_release)) == 'Debian GNU/Linux'
+
+    os_release.write('ID=unknown\n')
+    assert _linux_distribution(str(os_release)) == ''
+    assert _linux_distribution(str(tmpdir.join('missing'))) == ''
+
+
+def test_ovsdb_link(tmpdir):
+    """
+    Check that the link to an OVSDB socket with a long path is created once
+    and reused.
+    """
+    server = socket(AF_UNIX, SOCK_STREAM)
+    server.bind(str(tmpdir.join('db.sock')))
+    server.listen(4)
+
+    shared_dir = str(tmpdir.mkdir('shared' * 20))
+    symlink(str(tmpdir.join('db.sock')), join(shared_dir, 'db.sock'))
+    node = _bare_node(shared_dir)
+
+    try:
+        first = node.get_ovsdb()
+        link_path = node._ovsdb_link
+        assert islink(link_path)
+
+        second = node.get_ovsdb()
+        assert node._ovsdb_link == link_path
+
+        first.close()
+        second.close()
+    finally:
+        server.close()
+
+
+class EmptySnapshot(object):
+    """
+    Snapshot without tables, false in a boolean context.
+    """
+
+    def __len__(self):
+        return 0
+
+    def restore(self, client):
+        return 0
+
+
+def test_restore_empty_snapshot(tmpdir):
+    """
+    Check that a snapshot given to restore is used even if it is false.
+    """
+    node = _bare_node(str(tmpdir))
+    node._get_ovsdb_client = lambda: None
+    node._snapshot = object()
+
+    assert node.restore(EmptySnapshot()) == 0
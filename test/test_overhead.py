@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_docker_openswitch.overhead.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from topology_docker_openswitch.overhead import OverheadRegistry, PHASES
+
+
+def test_overhead():
+    """
+    Check the totals and the slowest nodes and tests of the overhead.
+    """
+    registry = OverheadRegistry()
+
+    registry.test = 'test_a.py::test_one'
+    registry.record('ops1', 'boot', 10.0)
+    registry.record('ops2', 'boot', 12.0)
+    registry.record('ops1', 'login', 1.0)
+    registry.record('ops1', 'shell_setup', 0.5)
+
+    registry.test = 'test_b.py::test_two'
+    registry.record('ops1', 'login', 2.0)
+    registry.record('ops1', 'teardown', 3.0)
+
+    totals = registry.totals()
+    assert tuple(totals.keys()) == PHASES
+    assert totals == {
+        'admission': 0.0, 'boot': 22.0, 'login': 3.0, 'shell_setup': 0.5,
+        'teardown': 3.0
+    }
+
+    assert registry.totals(test='test_b.py::test_two') == {
+        'admission': 0.0, 'boot': 0.0, 'login': 2.0, 'shell_setup': 0.0,
+        'teardown': 3.0
+    }
+
+    assert registry.slowest('node') == [('ops1', 16.5), ('ops2', 12.0)]
+    assert registry.slowest('test', count=1) == [
+        ('test_a.py::test_one', 23.5)
+    ]
+
+    registry.clear()
+    assert registry.records == []
@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_docker_openswitch.ovsdb.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from json import dumps, JSONDecoder
+from uuid import UUID, uuid4
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from threading import Thread
+from socket import socket, AF_UNIX, SOCK_STREAM
+
+from pytest import fixture, raises
+
+from topology_docker_openswitch.ovsdb import (
+    OvsdbClient, OvsdbError, OvsdbReplica, OvsdbSnapshot, NamedUuid,
+    encode_datum, decode_datum
+)
+
+
+UUID_1 = '3b3b0a2c-0f4a-4b8c-9a1b-6f0c3e7e8d01'
+
+
+def fake_server(server_socket, handler, connections):
+    """
+    Serve one connection answering every request with handler(request).
+
+    Before answering the first request an echo request and an update
+    notification are sent, the client must deal with both transparently.
+    """
+    connection, _ = server_socket.accept()
+    connections.append(connection)
+    decoder = JSONDecoder()
+    buffered = ''
+    first = True
+
+    while True:
+        if not buffered:
+            data = connection.recv(65536)
+            if not data:
+                break
+            buffered = data.decode('utf-8')
+
+        request, end = decoder.raw_decode(buffered)
+        buffered = buffered[end:].lstrip()
+
+        if 'result' in request:
+            # Reply to our echo request.
+            continue
+
+        if first:
+            connection.sendall(dumps({
+                'method': 'echo', 'params': [], 'id': 'echo'
+            }).encode('utf-8'))
+            connection.sendall(dumps({
+                'method': 'update', 'params': [None, {}], 'id': None
+            }).encode('utf-8'))
+            first = False
+
+        response = dumps({
+            'id': request['id'], 'error': None,
+            'result': handler(request)
+        }).encode('utf-8')
+
+        # Send the response in two pieces to exercise partial reads.
+        connection.sendall(response[:7])
+        connection.sendall(response[7:])
+
+    connection.close()
+
+
+def serve(request, handler):
+    """
+    Start a fake server with the given handler and connect a client to it.
+    """
+    tmpdir = mkdtemp()
+    path = join(tmpdir, 'db.sock')
+    connections = []
+
+    server_socket = socket(AF_UNIX, SOCK_STREAM)
+    server_socket.bind(path)
+    server_socket.listen(1)
+
+    thread = Thread(
+        target=fake_server, args=(server_socket, handler, connections)
+    )
+    thread.daemon = True
+    thread.start()
+
+    client = OvsdbClient(path=path, timeout=5)
+
+    def finalizer():
+        client.close()
+        server_socket.close()
+        rmtree(tmpdir)
+
+    request.addfinalizer(finalizer)
+    return client, connections
+
+
+@fixture
+def ovsdb(request):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+
+        if request['method'] == 'monitor':
+            return {'Interface': {UUID_1: {'new': {
+                'name': '1', 'link_state': 'down'
+            }}}}
+
+        operations = request['params'][1:]
+        results = []
+
+        for operation in operations:
+            if operation['op'] == 'select':
+                results.append({'rows': [{
+                    '_uuid': ['uuid', UUID_1],
+                    'name': '1',
+                    'other_config': ['map', [['speed', '1000']]],
+                    'ports': ['set', [['uuid', UUID_1]]]
+                }]})
+            elif operation['op'] == 'insert':
+                results.append({'uuid': ['uuid', UUID_1]})
+            else:
+                results.append({
+                    'error': 'constraint violation', 'details': 'bad'
+                })
+        return results
+
+    client, connections = serve(request, handler)
+    return client, requests, connections
+
+
+@fixture
+def database(request):
+    """
+    Fake server that keeps an in-memory database with two tables, Port rows
+    reference Interface rows.
+    """
+    tables = {'Interface': {}, 'Port': {}, 'Daemon': {}}
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+
+        if request['method'] == 'get_schema':
+            return {'tables': {
+                'Interface': {'columns': {
+                    'name': {'mutable': False}, 'link_state': {}
+                }},
+                'Port': {'columns': {
+                    'name': {}, 'interfaces': {},
+                    'lacp_status': {'category': 'status'},
+                    'hw_ready_state': {'ephemeral': True}
+                }},
+                'Daemon': {'columns': {'name': {}}}
+            }}
+
+        names = {}
+        results = []
+
+        def resolve(value):
+            if isinstance(value, list):
+                if value and value[0] == 'named-uuid':
+                    return ['uuid', names[value[1]]]
+                return [resolve(element) for element in value]
+            return value
+
+        for operation in request['params'][1:]:
+            rows = tables[operation['table']]
+            where = operation.get('where', [])
+            matching = [
+                uuid for uuid in rows
+                if not where or uuid == where[0][2][1]
+            ]
+
+            if operation['op'] == 'select':
+                results.append({'rows': [
+                    dict(rows[uuid], _uuid=['uuid', uuid])
+                    for uuid in matching
+                ]})
+            elif operation['op'] == 'insert':
+                uuid = str(uuid4())
+                names[operation['uuid-name']] = uuid
+                rows[uuid] = operation['row']
+                results.append({'uuid': ['uuid', uuid]})
+            elif operation['op'] == 'update':
+                for uuid in matching:
+                    rows[uuid].update(operation['row'])
+                results.append({'count': len(matching)})
+            elif operation['op'] == 'delete':
+                for uuid in matching:
+                    del rows[uuid]
+                results.append({'count': len(matching)})
+
+        # Named UUIDs may be used before the operation that defines them.
+        for rows in tables.values():
+            for uuid, row in rows.items():
+                rows[uuid] = dict(
+                    (column, resolve(value)) for column, value in row.items()
+                )
+
+        return results
+
+    client, _ = serve(request, handler)
+    return client, tables, requests
+
+
+def test_datum_encoding():
+    """
+    Check that Python values round trip through the OVSDB representation.
+    """
+    value = {'a': [UUID(UUID_1)]}
+    encoded = encode_datum(value)
+
+    assert encoded == ['map', [['a', ['set', [['uuid', UUID_1]]]]]]
+    assert decode_datum(encoded) == value
+    assert encode_datum(NamedUuid('row0')) == ['named-uuid', 'row0']
+
+
+def test_multi_operation_transaction(ovsdb):
+    """
+    Check that several operations are sent in one typed transaction.
+    """
+    client, requests, _ = ovsdb
+    notifications = []
+    client.add_notification_handler(
+        lambda method, params: notifications.append(method)
+    )
+
+    transaction = client.transaction()
+    transaction.select('Interface', where=[('name', '==', '1')])
+    port = transaction.insert('Port', {'name': '1', 'vlan_tag': set()})
+    results = transaction.commit()
+
+    assert len(requests) == 1
+    assert requests[0]['method'] == 'transact'
+    assert requests[0]['params'][2]['uuid-name'] == port.name
+    assert notifications == ['update']
+
+    row = results[0]['rows'][0]
+    assert row['_uuid'] == UUID(UUID_1)
+    assert row['other_config'] == {'speed': '1000'}
+    assert row['ports'] == [UUID(UUID_1)]
+    assert results[1]['uuid'] == UUID(UUID_1)
+
+
+def test_transaction_error(ovsdb):
+    """
+    Check that operation errors are raised as exceptions.
+    """
+    client, _, _ = ovsdb
+
+    with raises(OvsdbError) as error:
+        transaction = client.transaction()
+        transaction.delete('Port')
+        transaction.commit()
+
+    assert 'constraint violation' in str(error.value)
+
+
+def test_replica_wait_for(ovsdb):
+    """
+    Check that the replica follows monitor updates and wakes up waiters.
+    """
+    client, requests, connections = ovsdb
+
+    replica = OvsdbReplica(client, ['Interface'])
+    replica.start()
+
+    try:
+        assert requests[0]['method'] == 'monitor'
+        assert replica.rows('Interface')[UUID_1]['link_state'] == 'down'
+
+        def link_up(rows):
+            return [row for row in rows if row['link_state'] == 'up']
+
+        with raises(Exception):
+            replica.wait_for('Interface', link_up, timeout=0.1)
+
+        connections[0].sendall(dumps({
+            'method': 'update', 'id': None, 'params': [
+                requests[0]['params'][1],
+                {'Interface': {UUID_1: {
+                    'old': {'link_state': 'down'},
+                    'new': {'name': '1', 'link_state': 'up'}
+                }}}
+            ]
+        }).encode('utf-8'))
+
+        assert replica.wait_for('Interface', link_up, timeout=5)
+    finally:
+        replica.stop()
+
+
+def test_snapshot_restore(database):
+    """
+    Check that a snapshot is restored with one transaction of differences.
+    """
+    client, tables, requests = database
+
+    transaction = client.transaction()
+    interface = transaction.insert(
+        'Interface', {'name': '1', 'link_state': 'down'}
+    )
+    transaction.insert('Port', {'name': '1', 'interfaces': [interface]})
+    transaction.commit()
+
+    snapshot = OvsdbSnapshot.take(client)
+    interface_uuid = list(tables['Interface'])[0]
+
+    assert OvsdbSnapshot.take(client).restore(client) == 0
+
+    # Change a column, delete the interface and add a new port.
+    transaction = client.transaction()
+    transaction.update('Port', {'name': 'renamed', 'interfaces': set()})
+    transaction.delete(
+        'Interface', where=[('_uuid', '==', UUID(interface_uuid))]
+    )
+    transaction.insert('Port', {'name': '2', 'interfaces': set()})
+    transaction.commit()
+
+    del requests[:]
+    assert snapshot.restore(client) == 3
+    assert len(requests) == 2
+
+    assert len(tables['Interface']) == 1
+    assert len(tables['Port']) == 1
+    assert len(tables['Daemon']) == 0
+
+    new_interface_uuid = list(tables['Interface'])[0]
+    port = list(tables['Port'].values())[0]
+    assert new_interface_uuid != interface_uuid
+    assert port['name'] == '1'
+    assert decode_datum(port['interfaces']) == [UUID(new_interface_uuid)]
+
+    # The snapshot follows the new UUIDs, nothing is left to restore.
+    assert snapshot.restore(client) == 0
+
+
+def test_snapshot_daemon_changes(database):
+    """
+    Check that restoring a snapshot of some tables leaves the rows and
+    columns written by the daemons alone.
+    """
+    client, tables, requests = database
+
+    transaction = client.transaction()
+    transaction.insert('Port', {'name': '1', 'interfaces': set()})
+    transaction.commit()
+
+    snapshot = OvsdbSnapshot.take(
+        client, tables=['Port', 'Interface', 'VLAN']
+    )
+    assert sorted(snapshot.tables) == ['Interface', 'Port']
+    assert all(
+        sorted(row) == ['interfaces', 'name']
+        for row in snapshot.rows('Port').values()
+    )
+
+    # The daemons report the status of the port and register themselves.
+    transaction = client.transaction()
+    transaction.update(
+        'Port', {'lacp_status': {'bond_speed': '1000'},
+                 'hw_ready_state': 'ready'}
+    )
+    transaction.insert('Daemon', {'name': 'ops-lacpd'})
+    transaction.commit()
+
+    assert snapshot.restore(client) == 0
+
+    # The configuration is restored, the status is kept.
+    transaction = client.transaction()
+    transaction.update('Port', {'name': 'renamed'})
+    transaction.commit()
+
+    assert snapshot.restore(client) == 1
+
+    port = list(tables['Port'].values())[0]
+    assert port['name'] == '1'
+    assert port['hw_ready_state'] == 'ready'
+    assert len(tables['Daemon']) == 1
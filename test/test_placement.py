@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_docker_openswitch.placement.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from topology_docker_openswitch.placement import (
+    CpuPlacement, resource_limits
+)
+
+
+def test_placement():
+    """
+    Check that CPUs are assigned round robin, leaving the first one free.
+    """
+    placement = CpuPlacement(cpus=range(5))
+
+    assert [placement.allocate() for i in range(5)] == [
+        '1', '2', '3', '4', '1'
+    ]
+    assert placement.allocate(2) == '2,3'
+    assert placement.allocate(3) == '1,2,4'
+    assert placement.allocate(10) == '1,2,3,4'
+
+    small = CpuPlacement(cpus=[0, 1])
+    assert [small.allocate() for i in range(3)] == ['0', '1', '0']
+
+
+def test_shared_placement(tmpdir):
+    """
+    Check that placements that share a file continue the same round robin.
+    """
+    path = str(tmpdir.join('cpus'))
+    first = CpuPlacement(cpus=range(5), path=path)
+    second = CpuPlacement(cpus=range(5), path=path)
+
+    assert first.allocate() == '1'
+    assert second.allocate() == '2'
+    assert first.allocate(2) == '3,4'
+    assert second.allocate() == '1'
+
+    # Placements with fewer CPUs wrap around their own list.
+    assert CpuPlacement(cpus=range(3), path=path).allocate() == '2'
+
+
+def test_resource_limits():
+    """
+    Check the container update arguments of the resource limits.
+    """
+    assert resource_limits() == {}
+
+    assert resource_limits(cpus='1.5', mem_limit='512m', cpuset='0-3') == {
+        'cpu_period': 100000,
+        'cpu_quota': 150000,
+        'mem_limit': '512m',
+        'cpuset_cpus': '0-3',
+    }
+
+    assert 'cpuset_cpus' in resource_limits(cpuset='auto')
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for the imports of module topology_docker_openswitch.plugin.plugin.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from sys import executable
+from subprocess import check_output
+
+
+# Modules the plugin must not import, they are only needed once nodes are
+# created.
+HEAVY_MODULES = ('topology', 'topology_docker', 'pexpect')
+
+LOADED_MODULES = '''
+import sys
+import pytest
+before = set(sys.modules)
+import topology_docker_openswitch.plugin.plugin
+print(' '.join(sorted(set(sys.modules) - before)))
+'''
+
+
+def test_plugin_import():
+    """
+    Check that loading the plugin does not import the node module and its
+    dependencies.
+    """
+    loaded = check_output(
+        [executable, '-c', LOADED_MODULES]
+    ).decode('utf-8').split()
+
+    assert 'topology_docker_openswitch.plugin.plugin' in loaded
+
+    heavy = [
+        module for module in loaded
+        if module == 'topology_docker_openswitch.openswitch' or
+        module.split('.')[0] in HEAVY_MODULES
+    ]
+    assert heavy == []
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_docker_openswitch.recording.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from os.path import join
+
+from pytest import raises
+
+from topology_docker_openswitch.connection import OpenswitchReplayConnection
+from topology_docker_openswitch.recording import (
+    SessionRecorder, SessionReplay, load_session
+)
+from topology_docker_openswitch.shell import VTYSH_STANDARD_PROMPT
+from topology_docker_openswitch.simulator import SIMULATOR_VERSION
+
+
+def record_session(path):
+    recorder = SessionRecorder(path)
+
+    for shell, command, response in [
+        ('OpenSwitchVtyshShell', 'show version', 'OpenSwitch recorded'),
+        ('OpenSwitchVtyshShell', 'show vlan', 'No vlan is configured'),
+        ('OpenSwitchVtyshShell', 'configure terminal', ''),
+        ('OpenSwitchVtyshShell', 'vlan 10', ''),
+        ('OpenSwitchVtyshShell', 'end', ''),
+        ('OpenSwitchVtyshShell', 'show vlan', 'VLAN10 up'),
+        ('OpenSwitchBashShell', 'uname -r', '4.4.0-recorded'),
+        ('OpenSwitchVsctlShell', 'ovs-vsctl get System . cur_cfg', '12'),
+        ('OpenSwitchBashSwnsShell', 'ip link show 1', '1: <UP>'),
+    ]:
+        recorder.command_sent(shell, command)
+        recorder.response_read(response)
+
+    # Commands with custom matches are discarded.
+    recorder.command_sent('OpenSwitchVtyshShell', 'reboot')
+    recorder.discard()
+    recorder.response_read('Do you want to continue (y/n)?')
+
+    recorder.save()
+    return recorder
+
+
+def test_session_file(tmpdir):
+    """
+    Check that a recorded session is loaded and answered in order, in the
+    context of the shell it was recorded from.
+    """
+    path = join(str(tmpdir), 'session.json.gz')
+    recorder = record_session(path)
+
+    exchanges = load_session(path)
+    assert exchanges == recorder.exchanges
+    assert len(exchanges) == 9
+    assert 'reboot' not in [exchange['command'] for exchange in exchanges]
+
+    replay = SessionReplay(exchanges)
+    assert ('vtysh', 'show vlan') in replay
+    assert ('bash', 'show vlan') not in replay
+    assert ('vtysh', 'show interface') not in replay
+    assert ('bash', 'ovs-vsctl get System . cur_cfg') in replay
+    assert ('swns', 'ip link show 1') in replay
+    assert ('bash', 'ip link show 1') not in replay
+
+    responses = [replay.answer('vtysh', 'show vlan')[0] for i in range(3)]
+    assert responses == [
+        'No vlan is configured', 'VLAN10 up', 'VLAN10 up'
+    ]
+
+
+def test_record(simulator_connection, tmpdir):
+    """
+    Check that the commands sent through the shells of a connection are
+    recorded with their responses and the name of their shell.
+    """
+    path = join(str(tmpdir), 'session.json.gz')
+    connection = simulator_connection(record=path)
+
+    connection.get_shell('vtysh')('show version')
+    connection.get_shell('bash')('echo bash')
+    connection.get_shell('vsctl')('show')
+
+    # Commands with custom matches are not recorded.
+    vtysh = connection.get_shell('vtysh')
+    vtysh.send_command('show version', matches=[VTYSH_STANDARD_PROMPT])
+
+    connection.disconnect()
+
+    assert [
+        (exchange['shell'], exchange['command'], exchange['response'])
+        for exchange in load_session(path)
+    ] == [
+        ('OpenSwitchVtyshShell', 'show version', SIMULATOR_VERSION),
+        ('OpenSwitchBashShell', 'echo bash', 'bash'),
+        ('OpenSwitchVsctlShell', 'ovs-vsctl show', ''),
+    ]
+
+
+def test_replay(simulator_connection, tmpdir):
+    """
+    Check that a replay connection answers the recorded commands in the
+    shells they were recorded from, and closes the console on the commands
+    that are not in the recording.
+    """
+    path = join(str(tmpdir), 'session.json.gz')
+    record_session(path)
+
+    connection = simulator_connection(
+        connection_class=OpenswitchReplayConnection, replay=path
+    )
+    vtysh = connection.get_shell('vtysh')
+
+    assert vtysh('show version') == 'OpenSwitch recorded'
+    assert vtysh('show vlan') == 'No vlan is configured'
+    vtysh('configure terminal')
+    vtysh('vlan 10')
+    vtysh('end')
+    assert vtysh('show vlan') == 'VLAN10 up'
+
+    assert connection.get_shell('bash')('uname -r') == '4.4.0-recorded'
+    assert connection.get_shell('vsctl')('get System . cur_cfg') == '12'
+    assert connection.get_shell('bash_swns')('ip link show 1') == '1: <UP>'
+
+    # Recorded, but from another shell.
+    with raises(Exception):
+        connection.get_shell('bash')('ip link show 1')
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_docker_openswitch.rest.
+
+The connection is tested against a local HTTPS stub of ``restd``.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from json import dumps
+from os import devnull
+from os.path import join
+from threading import Thread
+from subprocess import call
+from ssl import create_default_context, Purpose
+
+from pytest import fixture, raises, skip
+from six.moves.BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from six.moves.socketserver import ThreadingMixIn
+
+from topology_docker_openswitch.rest import OpenswitchRestConnection, RestError
+
+
+class RestdStub(BaseHTTPRequestHandler):
+    """
+    Answers like ``restd``.
+
+    - ``POST /login`` sets the session cookie.
+    - ``/missing`` does not exist.
+    - ``/drop`` closes the connection without answering.
+    - Anything else answers its method and path in JSON.
+
+    If the ``close_idle`` attribute of the server is set, the connection is
+    closed after every response without telling the client, like a server
+    that closes idle keep-alive connections.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):  # noqa
+        self._answer()
+
+    do_PUT = do_POST = do_DELETE = do_GET  # noqa
+
+    def _answer(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+
+        self.server.requests.append((
+            self.command, self.path, self.headers.get('Cookie'),
+            self.client_address
+        ))
+
+        if self.path == '/drop':
+            self.close_connection = True
+            return
+
+        headers = {}
+
+        if self.path == '/login':
+            status, body = 200, ''
+            headers['Set-Cookie'] = \
+                'user=netop; Path=/; HttpOnly; ' \
+                'Expires=Wed, 21 Oct 2026 07:28:00 GMT'
+        elif self.path == '/missing':
+            status, body = 404, 'Not found'
+        else:
+            status, body = 200, dumps(
+                {'method': self.command, 'path': self.path}
+            )
+            headers['Content-Type'] = 'application/json'
+
+        body = body.encode('utf-8')
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+        if self.server.close_idle:
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+class RestdServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        HTTPServer.__init__(self, *args, **kwargs)
+        self.requests = []
+        self.close_idle = False
+
+    def connections(self):
+        """
+        Number of TCP connections the requests came through.
+        """
+        return len(set(request[3] for request in self.requests))
+
+    def methods(self):
+        return [request[:2] for request in self.requests]
+
+
+@fixture(scope='module')
+def certificate(tmpdir_factory):
+    """
+    Self signed certificate and key of the stub, like the ones of ``restd``.
+    """
+    directory = str(tmpdir_factory.mktemp('certificate'))
+    cert, key = join(directory, 'cert.pem'), join(directory, 'key.pem')
+
+    try:
+        with open(devnull, 'w') as null:
+            generated = call([
+                'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+                '-days', '1', '-subj', '/CN=localhost', '-keyout', key,
+                '-out', cert
+            ], stdout=null, stderr=null) == 0
+    except OSError:
+        generated = False
+
+    if not generated:
+        skip('openssl is needed to create the certificate of the stub')
+
+    return cert, key
+
+
+@fixture
+def restd(request, certificate):
+    server = RestdServer(('127.0.0.1', 0), RestdStub)
+
+    context = create_default_context(Purpose.CLIENT_AUTH)
+    context.load_cert_chain(*certificate)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+
+    thread = Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    def shutdown():
+        server.shutdown()
+        server.server_close()
+
+    request.addfinalizer(shutdown)
+    return server
+
+
+@fixture
+def rest(request, restd, simulated_node):
+    connection = OpenswitchRestConnection(
+        'rest', simulated_node, address='127.0.0.1',
+        port=restd.server_address[1], timeout=5
+    )
+    connection.connect()
+    request.addfinalizer(connection.disconnect)
+    return connection
+
+
+def test_requests(restd, rest):
+    """
+    Check the login, the session cookie, the errors and the reuse of the
+    persistent connections.
+    """
+    assert rest.is_connected()
+    assert rest.login_time is not None
+
+    assert rest.get('/rest/v1/system') == {
+        'method': 'GET', 'path': '/rest/v1/system'
+    }
+    assert rest.put('/rest/v1/system', {'hostname': 'ops1'})['method'] == \
+        'PUT'
+
+    with raises(RestError) as error:
+        rest.get('/missing')
+    assert error.value.status == 404
+
+    assert restd.methods() == [
+        ('POST', '/login'), ('GET', '/rest/v1/system'),
+        ('PUT', '/rest/v1/system'), ('GET', '/missing')
+    ]
+    assert all(request[2] == 'user=netop' for request in restd.requests[1:])
+
+    # All of them go through one persistent connection.
+    assert restd.connections() == 1
+
+    rest.disconnect()
+    assert not rest.is_connected()
+
+
+def test_many(restd, rest):
+    """
+    Check that bulk requests are spread across the pool.
+    """
+    paths = ['/rest/v1/system/interfaces/{}'.format(i) for i in range(12)]
+
+    responses = rest.get_many(paths)
+    assert sorted(responses.keys()) == sorted(paths)
+    assert all(
+        response['path'] == path for path, response in responses.items()
+    )
+
+    responses = rest.put_many(dict((path, {}) for path in paths))
+    assert all(response['method'] == 'PUT' for response in responses.values())
+
+    # At most pool_size persistent connections.
+    assert restd.connections() <= 4
+
+
+def test_retries(restd, rest):
+    """
+    Check that only idempotent requests are retried when a pooled connection
+    was closed by the server.
+    """
+    restd.close_idle = True
+
+    rest.get('/rest/v1/system')
+    rest.get('/rest/v1/system')
+    rest.post('/rest/v1/system/vlans', {'name': 'VLAN10'})
+
+    assert restd.methods()[1:] == [
+        ('GET', '/rest/v1/system'), ('GET', '/rest/v1/system'),
+        ('POST', '/rest/v1/system/vlans')
+    ]
+
+    # A request that fails on a fresh connection is not sent again.
+    with raises(Exception):
+        rest.post('/drop', {})
+    assert restd.methods()[-1] == ('POST', '/drop')
+    assert restd.methods().count(('POST', '/drop')) == 1
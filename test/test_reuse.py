@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_docker_openswitch.plugin.reuse.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from topology_docker_openswitch.plugin import reuse
+from topology_docker_openswitch.plugin.reuse import TopologyPool, topology_key
+
+
+class FakeNode(object):
+
+    def __init__(self, identifier):
+        self.identifier = identifier
+        self.container_id = identifier
+        self.metadata = {'type': 'openswitch'}
+        self.snapshots = 0
+        self.restores = 0
+
+    def snapshot(self):
+        self.snapshots += 1
+
+    def restore(self):
+        self.restores += 1
+
+
+class FakeManager(object):
+
+    def __init__(self, *identifiers):
+        self.nodes = dict(
+            (identifier, FakeNode(identifier)) for identifier in identifiers
+        )
+        self.built = True
+
+    def get(self, identifier):
+        return self.nodes[identifier]
+
+    def unbuild(self):
+        self.built = False
+
+
+def test_topology_key():
+    """
+    Check that only identical topologies share a key.
+    """
+    key = topology_key('[image="topology/ops:latest"] ops1', 'docker')
+
+    assert key == topology_key(
+        '[image="topology/ops:latest"] ops1', 'docker'
+    )
+    assert key != topology_key('[image="topology/ops:1.0"] ops1', 'docker')
+    assert key != topology_key(
+        '[image="topology/ops:latest"] ops1', 'docker',
+        inject={'nodes': {'ops1': {'image': 'other'}}}
+    )
+
+
+def test_reuse(monkeypatch):
+    """
+    Check that released topologies are restored and handed out again, and
+    that idle ones are unbuilt when over the memory budget.
+    """
+    monkeypatch.setattr(reuse, 'memory_usage', lambda container_id: 100)
+    pool = TopologyPool(memory_budget=250)
+
+    first = FakeManager('ops1', 'ops2')
+    assert pool.acquire('a') is None
+    assert pool.adopt('a', first)
+    assert first.get('ops1').snapshots == 1
+
+    # The test module unbuilds its topology, it goes back to the pool.
+    first.unbuild()
+    assert first.built
+    assert pool.acquire('b') is None
+    assert pool.acquire('a') is first
+    assert first.get('ops2').restores == 1
+    assert pool.acquire('a') is None
+
+    # A second topology goes over the budget, but the first one is in use.
+    second = FakeManager('ops1')
+    pool.adopt('b', second)
+    assert len(pool) == 2
+
+    first.unbuild()
+    assert not first.built
+    assert len(pool) == 1
+
+    pool.clear()
+    assert not second.built
+    assert len(pool) == 0
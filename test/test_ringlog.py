@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_docker_openswitch.ringlog.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from gzip import open as gzip_open
+from os.path import join, exists
+from io import BytesIO
+
+from topology_docker_openswitch.ringlog import RingBufferLog
+
+
+def _spilled(path):
+    with gzip_open(path, 'rb') as spill:
+        return spill.read()
+
+
+def test_wraparound():
+    """
+    Check that only the newest bytes are kept, splitting the chunk that
+    partially overflows.
+    """
+    log = RingBufferLog(10)
+
+    log.write('0123456')
+    log.write(b'')
+    assert log.tail() == '0123456'
+
+    log.write('789abc')
+    assert len(log) == 10
+    assert log.spilled == 3
+    assert log.tail() == '3456789abc'
+    assert log.tail(4) == '9abc'
+
+    log.write('x' * 25)
+    assert log.tail() == 'x' * 10
+    assert log.spilled == 28
+
+    # Nothing is written without a spill path.
+    log.close()
+
+
+def test_spill(tmpdir):
+    """
+    Check that the overflow is appended to the spill file in blocks, and that
+    the spill file and the memory hold all the output.
+    """
+    path = join(str(tmpdir), 'console.log.gz')
+    log = RingBufferLog(8, spill_path=path, spill_block_size=6)
+
+    log.write('abcdefgh')
+    log.write('ijkl')
+    assert not exists(path)
+
+    log.write('mn')
+    assert _spilled(path) == b'abcdef'
+
+    log.write('o')
+    log.close()
+    assert _spilled(path) == b'abcdefg'
+    assert log.tail() == 'hijklmno'
+
+    # Every close appends a new gzip member.
+    log.write('pqr')
+    log.close()
+    assert _spilled(path) + log.tail().encode('utf-8') == \
+        'abcdefghijklmnopqr'.encode('utf-8')
+
+
+def test_dump():
+    """
+    Check that only the data written since the last dump is dumped, and only
+    the part of it still held in memory.
+    """
+    framework = BytesIO()
+    log = RingBufferLog(8)
+
+    log.write(b'login: ')
+    position = log.dump(framework)
+    assert framework.getvalue() == b'login: '
+
+    assert log.dump(framework, position) == position
+    assert framework.getvalue() == b'login: '
+
+    log.write(b'admin\nPassword: ')
+    log.dump(framework, position)
+    assert framework.getvalue() == b'login: ssword: '
+    assert log.tail() == 'ssword: '
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for the lazy setup of the shells of module
+topology_docker_openswitch.shell.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from pytest import mark
+
+from topology_docker_openswitch.shell import VTYSH_FORCED_PROMPT
+from topology_docker_openswitch.simulator import SIMULATOR_VERSION
+
+
+@mark.parametrize('shell, command, response', [
+    ('bash', 'echo bash', 'bash'),
+    ('bash_swns', 'echo swns', 'swns'),
+    ('vsctl', 'show', ''),
+])
+def test_shell_before_vtysh(simulator_connection, shell, command, response):
+    """
+    Check that the bash based shells can be used before vtysh is set up, and
+    that vtysh is set up when it is used after them.
+    """
+    connection = simulator_connection()
+    vtysh = connection.get_shell('vtysh')
+    assert not vtysh.is_set_up
+
+    # The bash shells exit to the vtysh standard prompt.
+    assert connection.get_shell(shell)(command) == response
+    assert connection.get_shell(shell)(command) == response
+    assert not vtysh.is_set_up
+
+    assert vtysh('show version') == SIMULATOR_VERSION
+    assert vtysh.is_set_up
+    assert vtysh._prompt == VTYSH_FORCED_PROMPT
+
+    # And to the forced prompt once vtysh is set up.
+    assert connection.get_shell(shell)(command) == response
+    assert vtysh('show version') == SIMULATOR_VERSION
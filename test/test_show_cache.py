@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for the show command cache of the vtysh shell.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+
+def test_cache_invalidated_by_configuration(simulator_connection):
+    """
+    Check that a cached show command is queried again after a configuration
+    command.
+    """
+    vtysh = simulator_connection().get_shell('vtysh')
+    vtysh.enable_cache()
+
+    before = vtysh('show running-config')
+    assert 'vlan 10' not in before
+    assert vtysh('show  running-config') == before
+    assert vtysh.cache_stats == {'hits': 1, 'misses': 1, 'invalidations': 0}
+
+    vtysh('configure terminal')
+    vtysh('vlan 10')
+    vtysh('end')
+
+    after = vtysh('show running-config')
+    assert 'vlan 10' in after
+    assert vtysh.cache_stats == {'hits': 1, 'misses': 2, 'invalidations': 1}
+
+    vtysh.disable_cache()
+    vtysh('show running-config')
+    assert vtysh.cache_stats['misses'] == 2
+
+
+def test_cache_invalidated_by_generation(simulator_connection):
+    """
+    Check that the cache is cleared when the configuration generation
+    changes, even if no command was sent through the shell.
+    """
+    generation = [1]
+
+    vtysh = simulator_connection().get_shell('vtysh')
+    vtysh.enable_cache(generation=lambda: generation[0])
+
+    vtysh('show version')
+    vtysh('show version')
+    assert vtysh.cache_stats == {'hits': 1, 'misses': 1, 'invalidations': 0}
+
+    generation[0] = 2
+    assert vtysh('show version') == 'OpenSwitch 0.4.0 (simulator)'
+    assert vtysh.cache_stats == {'hits': 1, 'misses': 2, 'invalidations': 1}
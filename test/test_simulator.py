@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_docker_openswitch.simulator.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from os.path import join
+
+from topology_docker_openswitch.shell import (
+    VTYSH_FORCED_PROMPT, VTYSH_STANDARD_PROMPT
+)
+from topology_docker_openswitch.simulator import SIMULATOR_VERSION
+
+
+def test_simulator(simulator_connection):
+    """
+    Check the prompts, the configuration and the outputs of the simulator,
+    through the shells of a simulator connection.
+    """
+    connection = simulator_connection(hostname='ops1')
+    vtysh = connection.get_shell('vtysh')
+
+    assert vtysh('show version') == SIMULATOR_VERSION
+    assert vtysh._prompt == VTYSH_FORCED_PROMPT
+
+    vtysh('configure terminal')
+    vtysh('hostname ops2')
+    vtysh('end')
+    assert 'hostname ops2' in vtysh('show running-config').splitlines()
+
+    assert len(vtysh('show big 8000').splitlines()) == 8000 // 80
+
+    assert connection.get_shell('bash')('echo bash') == 'bash'
+    assert connection.get_shell('bash_swns')('echo swns') == 'swns'
+    assert vtysh('show version') == SIMULATOR_VERSION
+
+
+def test_simulator_without_set_prompt(simulator_connection):
+    """
+    Check that older images without set prompt are simulated.
+    """
+    connection = simulator_connection(set_prompt=False, hostname='ops1')
+    vtysh = connection.get_shell('vtysh')
+
+    assert vtysh('show version') == SIMULATOR_VERSION
+    assert vtysh._prompt == VTYSH_STANDARD_PROMPT
+
+
+def test_simulator_redirect(simulator_connection, tmpdir):
+    """
+    Check that the output of bash commands is redirected to files.
+    """
+    bash = simulator_connection().get_shell('bash')
+    vtysh_path = join(str(tmpdir), 'vtysh.out')
+    echo_path = join(str(tmpdir), 'echo.out')
+
+    assert bash(
+        "vtysh -c 'show big 800' > {} 2>&1".format(vtysh_path)
+    ) == ''
+    assert bash('echo captured > {} 2>&1'.format(echo_path)) == ''
+
+    with open(vtysh_path) as fd:
+        assert len(fd.read().splitlines()) == 10
+    with open(echo_path) as fd:
+        assert fd.read() == 'captured\n'
+
+    assert bash(
+        "{{ echo first; vtysh -c 'show version'; }} > {} 2>&1".format(
+            echo_path
+        )
+    ) == ''
+
+    with open(echo_path) as fd:
+        assert fd.read() == 'first\n{}\n'.format(SIMULATOR_VERSION)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_docker_openswitch.tracing.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from json import load
+from os.path import join
+
+from pexpect import spawn, TIMEOUT
+
+from topology_docker_openswitch.simulator import simulator_command
+from topology_docker_openswitch.tracing import (
+    ConsoleTracer, TracedSpawn, export_chrome_trace
+)
+
+
+VTYSH_PROMPT = r'(\r\n)?switch(\([-\w\s]+\))?[#>] '
+
+
+def test_tracing(tmpdir):
+    """
+    Check that the operations of a traced spawn are recorded and exported.
+    """
+    tracer = ConsoleTracer('ops1', '0')
+    console = TracedSpawn(
+        spawn(
+            simulator_command(login=False, output_size=4000),
+            encoding='utf-8', timeout=5
+        ),
+        tracer
+    )
+
+    console.expect(VTYSH_PROMPT)
+
+    tracer.shell = 'OpenSwitchVtyshShell'
+    console.sendline('show interface')
+    assert console.expect([TIMEOUT, VTYSH_PROMPT]) == 1
+
+    try:
+        console.expect('never', timeout=0.1)
+    except TIMEOUT:
+        pass
+
+    console.close()
+
+    operations = [event[:2] for event in tracer.events]
+    assert operations == [
+        ('expect', 'console'),
+        ('sendline', 'OpenSwitchVtyshShell'),
+        ('expect', 'OpenSwitchVtyshShell'),
+        ('expect', 'OpenSwitchVtyshShell'),
+    ]
+
+    details = tracer.events[2][-1]
+    assert details['index'] == 1
+    assert details['patterns'] == ['TIMEOUT', VTYSH_PROMPT]
+    assert details['scanned'] >= 4000
+    assert tracer.events[3][-1]['error'] == 'TIMEOUT'
+
+    path = join(str(tmpdir), 'trace.json')
+    export_chrome_trace(path, [tracer])
+
+    with open(path) as fd:
+        trace = load(fd)
+
+    events = [
+        event for event in trace['traceEvents'] if event['ph'] == 'X'
+    ]
+    assert len(events) == 4
+    assert all(event['pid'] == 1 for event in events)
+    assert set(event['tid'] for event in events) == set([1, 2])
+
+    names = dict(
+        (event['name'], event['args']['name'])
+        for event in trace['traceEvents'] if event['ph'] == 'M' and
+        event['name'] == 'process_name'
+    )
+    assert names == {'process_name': 'ops1'}
+
+
+def test_password_redacted():
+    """
+    Check that what is sent after a password prompt is recorded by its size.
+    """
+    tracer = ConsoleTracer('ops1', '0')
+    console = TracedSpawn(
+        spawn(
+            simulator_command(password='s3cret'), encoding='utf-8',
+            timeout=5
+        ),
+        tracer
+    )
+
+    console.expect(r'(?<!Last )login:')
+    console.sendline('admin')
+    console.expect('Password:')
+    console.sendline('s3cret')
+    console.expect(VTYSH_PROMPT)
+    console.sendline('show version')
+    console.expect(VTYSH_PROMPT)
+    console.close()
+
+    sent = [
+        details for operation, shell, start, duration, details
+        in tracer.events if operation == 'sendline'
+    ]
+    assert sent == [
+        {'data': 'admin'}, {'size': 6}, {'data': 'show version'}
+    ]
+    assert 's3cret' not in repr(tracer.events)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_docker_openswitch.warmpool.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from time import sleep, time
+from itertools import count
+
+from topology_docker_openswitch import warmpool
+from topology_docker_openswitch.warmpool import (
+    WarmPool, WarmContainer, ClaimedContainerClient, get_warm_pool
+)
+
+
+class FakeWarmPool(WarmPool):
+    """
+    Warm pool that boots fake containers instead of docker ones.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(FakeWarmPool, self).__init__(*args, **kwargs)
+        self.ids = count()
+        self.removed = []
+
+    def _boot(self):
+        sleep(0.01)
+        container_id = 'container{}'.format(next(self.ids))
+        return WarmContainer(container_id, container_id, '/nonexistent')
+
+    def _remove(self, container):
+        self.removed.append(container.container_id)
+
+
+def wait_ready(pool, ready):
+    deadline = time() + 5
+    while pool.ready != ready and time() < deadline:
+        sleep(0.01)
+    return pool.ready
+
+
+def test_warm_pool():
+    """
+    Check that the pool is refilled after claims and emptied when stopped.
+    """
+    pool = FakeWarmPool(size=2)
+    assert pool.claim() is None
+
+    pool.start()
+
+    try:
+        assert wait_ready(pool, 2) == 2
+
+        claimed = pool.claim()
+        assert claimed.container_id == 'container0'
+        assert wait_ready(pool, 2) == 2
+    finally:
+        pool.stop()
+
+    assert sorted(pool.removed) == ['container1', 'container2']
+    assert pool.ready == 0
+
+
+def test_pool_key(monkeypatch):
+    """
+    Check that nodes only get the pool of containers created with the same
+    container arguments.
+    """
+    pool = FakeWarmPool(
+        size=1, tmpfs_logs='64m',
+        create_host_config_kwargs={
+            'port_bindings': {22: 2222}, 'mem_limit': '1g'
+        }
+    )
+    monkeypatch.setattr(warmpool, '_WARM_POOLS', {
+        warmpool._pool_key(pool.node_kwargs): pool
+    })
+
+    # Defaults, the order of the dictionaries and the arguments that do not
+    # change the container do not matter.
+    assert get_warm_pool(
+        image='topology/ops:latest', environment={'container': 'docker'},
+        tmpfs_logs='64m', binds=None, type='openswitch',
+        create_host_config_kwargs={
+            'mem_limit': '1g', 'port_bindings': {22: 2222}
+        }
+    ) is pool
+
+    for different in [
+        {'tmpfs_logs': '32m'},
+        {'environment': {'container': 'docker', 'DEBUG': '1'}},
+        {'binds': '/opt:/opt'},
+        {'create_host_config_kwargs': {'port_bindings': {22: 2222}}},
+        {'privileged': False},
+    ]:
+        kwargs = {
+            'tmpfs_logs': '64m', 'create_host_config_kwargs': {
+                'port_bindings': {22: 2222}, 'mem_limit': '1g'
+            }
+        }
+        kwargs.update(different)
+        assert get_warm_pool(**kwargs) is None
+
+
+def test_claimed_container_client():
+    """
+    Check that the client of a node that claimed a warm container does not
+    create a new one.
+    """
+    class Client(object):
+        def create_container(self, **kwargs):
+            raise AssertionError('Container created')
+
+        def inspect_container(self, container_id):
+            return {'Id': container_id}
+
+    client = ClaimedContainerClient(
+        Client(), WarmContainer('warm0', 'warm0_1', '/nonexistent')
+    )
+
+    assert client.create_container(image='topology/ops:latest') == {
+        'Id': 'warm0'
+    }
+    assert client.inspect_container('warm0') == {'Id': 'warm0'}
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_docker_openswitch.workers.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from threading import Thread
+
+from pytest import raises
+
+from topology_docker_openswitch.connection import (
+    OpenswitchSimulatorConnection
+)
+from topology_docker_openswitch.simulator import SIMULATOR_VERSION
+from topology_docker_openswitch.workers import WorkerConnections
+
+from .conftest import SimulatedNode, register_shells
+
+
+class WorkerNode(SimulatedNode):
+    """
+    Node whose connections are attached to the console simulator.
+    """
+
+    def __init__(self, shared_dir, **simulator_options):
+        super(WorkerNode, self).__init__(shared_dir)
+        self.connections = {}
+        self.created = []
+        self._simulator_options = simulator_options
+
+    def available_connections(self):
+        return list(self.connections.keys())
+
+    def connect(self, connection=None, connection_type=None):
+        connectionobj = OpenswitchSimulatorConnection(
+            connection, self, **self._simulator_options
+        )
+        register_shells(connectionobj, self)
+        connectionobj.connect()
+
+        self.connections[connection] = connectionobj
+        self.created.append(connection)
+
+    def get_connection(self, connection=None):
+        return self.connections[connection]
+
+
+def test_workers(tmpdir):
+    """
+    Check that worker connections are created when needed, reused and
+    disconnected.
+    """
+    node = WorkerNode(str(tmpdir))
+    workers = WorkerConnections(node, 2)
+
+    assert 'worker1' in workers
+    assert '0' not in workers
+    assert workers.connected() == []
+
+    try:
+        # Consecutive commands reuse the same connection.
+        for i in range(3):
+            assert workers.send_command(
+                'show version', shell='vtysh'
+            ) == SIMULATOR_VERSION
+        assert node.created == ['worker0']
+        assert workers.connected() == ['worker0']
+    finally:
+        workers.disconnect()
+
+    assert workers.connected() == []
+    assert not node.connections['worker0']._spawn.isalive()
+
+    # They are connected again if they are needed after a disconnection.
+    try:
+        workers.send_command('show version', shell='vtysh')
+        assert node.created == ['worker0', 'worker0']
+    finally:
+        workers.disconnect()
+
+
+def test_concurrent_workers(tmpdir):
+    """
+    Check that commands sent at the same time use different workers, up to
+    the number of workers.
+    """
+    node = WorkerNode(str(tmpdir), latency=0.2)
+    workers = WorkerConnections(node, 2)
+    responses = []
+
+    def send():
+        responses.append(workers.send_command('show version', shell='vtysh'))
+
+    threads = [Thread(target=send) for i in range(4)]
+
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+    finally:
+        workers.disconnect()
+
+    assert responses == [SIMULATOR_VERSION] * 4
+    assert sorted(node.created) == ['worker0', 'worker1']
+
+
+def test_no_workers(tmpdir):
+    """
+    Check that nodes without workers can not send background commands.
+    """
+    workers = WorkerConnections(WorkerNode(str(tmpdir)), 0)
+
+    with raises(Exception) as error:
+        workers.send_command('ls')
+    assert 'no worker connections' in str(error.value)